@@ -3,20 +3,39 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from .extensions import db, migrate
 from .routes import register_blueprints
+from .commands import register_commands
+from .policy import init_policy
+from .roster import init_roster
+from .employee_search import init_employee_search
+from .report_cache import init_report_cache
+from .archive import init_archive
+from .storage import configure_storage, init_storage
+from .schema import prepare_schema
+from .metrics import init_metrics
+from .services.job_service import init_report_jobs
+from .services.punch_journal import init_punch_journal
 import os
 
 def create_app(config_name='default'):
     app = Flask(__name__)
     
     # Load configuration
-    from .config import config
+    from config import config
     app.config.from_object(config[config_name])
     
-    # Initialize extensions
+    # Initialize extensions; engine options must be in place before db.init_app
+    configure_storage(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_storage(app)
+    init_metrics(app)
+    migrate.init_app(app, db, directory=app.config['MIGRATIONS_DIR'])
     CORS(app, origins=app.config['CORS_ORIGINS'])
     JWTManager(app)
+    init_policy(app)
+    init_roster(app)
+    init_employee_search(app)
+    init_report_cache(app)
+    init_archive(app)
     
     # Create instance folder
     try:
@@ -24,11 +43,19 @@ def create_app(config_name='default'):
     except OSError:
         pass
     
+    # Background report jobs keep their results in the instance folder
+    init_report_jobs(app)
+    
     # Register blueprints
     register_blueprints(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Register CLI commands
+    register_commands(app)
+    
+    # Create database tables, or verify they are migrated
+    prepare_schema(app)
+    
+    # Replays unapplied punches on startup, so it needs the tables in place
+    init_punch_journal(app)
     
     return app
\ No newline at end of file
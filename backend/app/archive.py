@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import date
+from flask import current_app, has_app_context
+from sqlalchemy import MetaData, Table, Column, Index, select, union_all
+from .extensions import db
+from .models import Attendance, ArchivedYear
+from .serializers import ATTENDANCE_SERIALIZER
+
+# Archive tables are kept out of db.metadata so create_all leaves them
+# alone; the archive command creates each one when it closes a year
+archive_metadata = MetaData()
+_archive_tables = {}
+_archive_tables_lock = threading.Lock()
+
+def archive_table(year):
+    with _archive_tables_lock:
+        table = _archive_tables.get(year)
+        if table is None:
+            name = f'attendance_archive_{year}'
+            table = Table(
+                name,
+                archive_metadata,
+                *[Column(column.name, column.type, primary_key=column.primary_key) for column in Attendance.__table__.columns],
+                Index(f'ix_{name}_employee_date', 'employee_id', 'date'),
+                Index(f'ix_{name}_date', 'date')
+            )
+            _archive_tables[year] = table
+        return table
+
+class ArchiveCatalog:
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self._years = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def years(self):
+        years = self._years
+        if years is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return years
+        
+        with self._lock:
+            self._years = frozenset(year for (year,) in db.session.query(ArchivedYear.year))
+            self._checked_at = time.monotonic()
+            return self._years
+    
+    def invalidate(self):
+        with self._lock:
+            self._years = None
+
+def init_archive(app):
+    app.extensions['attendance_archive'] = ArchiveCatalog(app.config['ARCHIVE_REFRESH_SECONDS'])
+
+def archived_years():
+    if not has_app_context() or 'attendance_archive' not in current_app.extensions:
+        return frozenset()
+    return current_app.extensions['attendance_archive'].years()
+
+def invalidate_archive():
+    if has_app_context() and 'attendance_archive' in current_app.extensions:
+        current_app.extensions['attendance_archive'].invalidate()
+
+def archive_cutoff():
+    # Rows dated before the cutoff live only in their year's archive table
+    years = archived_years()
+    return date(max(years) + 1, 1, 1) if years else None
+
+def attendance_tables(start_date=None, end_date=None):
+    cutoff = archive_cutoff()
+    tables = [
+        archive_table(year) for year in sorted(archived_years(), reverse=True)
+        if (start_date is None or year >= start_date.year) and (end_date is None or year <= end_date.year)
+    ]
+    if cutoff is None or end_date is None or end_date >= cutoff or not tables:
+        tables.insert(0, Attendance.__table__)
+    return tables
+
+def attendance_source(start_date, end_date, criteria):
+    # A range inside one table reads that table; a range that crosses the
+    # cutoff becomes a UNION ALL of per-table filtered selects, so each branch
+    # still uses its own (employee_id, date) index. Callers joining a bare
+    # table must apply the criteria themselves, e.g. in the join condition
+    tables = attendance_tables(start_date, end_date)
+    if len(tables) == 1:
+        return tables[0]
+    return union_all(*[select(table).where(*criteria(table)) for table in tables]).subquery('attendance_all')
+
+def attendance_query(start_date, end_date, criteria):
+    source = attendance_source(start_date, end_date, criteria)
+    if isinstance(source, Table):
+        return db.session.query(source).filter(*criteria(source)), source
+    return db.session.query(source), source
+
+def attendance_serializer(source):
+    if source is Attendance.__table__:
+        return ATTENDANCE_SERIALIZER
+    return ATTENDANCE_SERIALIZER.rebind(source)
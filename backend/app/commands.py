@@ -0,0 +1,49 @@
+from datetime import datetime
+import click
+from .services.aggregate_service import AggregateService
+from .services.archive_service import ArchiveService
+
+def register_commands(app):
+    @app.cli.command('rebuild-aggregates')
+    @click.option('--start-date', help='First date to rebuild (YYYY-MM-DD)')
+    @click.option('--end-date', help='Last date to rebuild (YYYY-MM-DD)')
+    def rebuild_aggregates(start_date, end_date):
+        # Backfill the daily rollup table from the raw attendance rows
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        
+        buckets = AggregateService().rebuild(start_date, end_date)
+        click.echo(f'Rebuilt {buckets} daily aggregate buckets')
+    
+    @app.cli.command('recalculate-attendance')
+    @click.option('--start-date', help='First date to recalculate (YYYY-MM-DD)')
+    @click.option('--end-date', help='Last date to recalculate (YYYY-MM-DD)')
+    @click.option('--department', help='Only recalculate this department')
+    def recalculate_attendance(start_date, end_date, department):
+        # Reapply the current policy to status, late and overtime minutes
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        
+        from .services.recalculation_service import RecalculationService
+        try:
+            result = RecalculationService().recalculate(start_date, end_date, department)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        
+        click.echo(f"Scanned {result['scanned']} rows, updated {result['updated']} across {result['dates']} dates")
+    
+    @app.cli.command('archive-attendance')
+    @click.option('--before-year', type=int, help='Archive every year before this one (default: the current year)')
+    def archive_attendance(before_year):
+        # Move closed years out of the hot attendance table
+        before_year = before_year or datetime.now().year
+        
+        try:
+            archived = ArchiveService().archive_before(before_year)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        
+        for entry in archived:
+            click.echo(f"Archived {entry['row_count']} attendance rows from {entry['year']}")
+        if not archived:
+            click.echo(f'No attendance before {before_year} left to archive')
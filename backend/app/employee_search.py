@@ -0,0 +1,396 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from itertools import filterfalse, islice
+from flask import current_app, has_app_context
+from sqlalchemy import func, or_
+from .extensions import db
+from .models import Employee
+from .serializers import EMPLOYEE_SERIALIZER
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('employee_id', 'name', 'email', 'department')
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+# Match groups at least 1/16 of the roster are paged by walking the name order
+DENSE_GROUP_RATIO = 16
+
+# Field values are also indexed in pieces split here, so a value shared by
+# many employees (an e-mail domain) is checked once rather than per employee
+SEGMENT_SEPARATOR = '@'
+
+def _trigrams(value):
+    return {value[index:index + 3] for index in range(len(value) - 2)}
+
+def _tokens(values):
+    # Whole field values and the words inside them, for prefix lookups
+    return set(values) - {''}, {word for value in values for word in WORD_PATTERN.findall(value)}
+
+def _segments(values):
+    return {segment for value in values for segment in value.split(SEGMENT_SEPARATOR) if len(segment) >= 3}
+
+class SearchState:
+    # One generation of the index; EmployeeSearchIndex serializes access
+    def __init__(self, validator=(None, 0)):
+        # roster_validator() as of this generation, advanced by apply()
+        self.validator = validator
+        self.records = {}
+        self.texts = {}
+        self.sort_keys = {}
+        self.inactive = set()
+        self.postings = {}
+        # Distinct field segments with their records, and trigram -> segments
+        self.segments = {}
+        self.segment_postings = {}
+        # Parallel sorted arrays: a prefix is one bisect range in each
+        self.field_keys = []
+        self.field_ids = []
+        self.word_keys = []
+        self.word_ids = []
+        self.ordered_keys = []
+        self.ordered_ids = []
+    
+    def add(self, record, sort=True):
+        record_id = record['id']
+        values = [(record[field] or '').lower() for field in SEARCH_FIELDS]
+        
+        self.records[record_id] = record
+        # NUL separators keep substrings from spanning two fields
+        self.texts[record_id] = '\0'.join(values)
+        sort_key = ((record['name'] or '').lower(), record['employee_id'])
+        self.sort_keys[record_id] = sort_key
+        if not record['is_active']:
+            self.inactive.add(record_id)
+        
+        for trigram in set().union(*[_trigrams(value) for value in values]):
+            self.postings.setdefault(trigram, set()).add(record_id)
+        
+        for segment in _segments(values):
+            segment_ids = self.segments.get(segment)
+            if segment_ids is None:
+                segment_ids = self.segments[segment] = set()
+                for trigram in _trigrams(segment):
+                    self.segment_postings.setdefault(trigram, set()).add(segment)
+            segment_ids.add(record_id)
+        
+        field_tokens, word_tokens = _tokens(values)
+        for keys, ids, tokens in (
+            (self.field_keys, self.field_ids, field_tokens),
+            (self.word_keys, self.word_ids, word_tokens),
+            (self.ordered_keys, self.ordered_ids, [sort_key])
+        ):
+            for token in tokens:
+                if sort:
+                    index = bisect_left(keys, token)
+                    while index < len(keys) and keys[index] == token and ids[index] < record_id:
+                        index += 1
+                    keys.insert(index, token)
+                    ids.insert(index, record_id)
+                else:
+                    keys.append(token)
+                    ids.append(record_id)
+    
+    def remove(self, record_id):
+        record = self.records.pop(record_id, None)
+        if record is None:
+            return
+        
+        values = self.texts.pop(record_id).split('\0')
+        sort_key = self.sort_keys.pop(record_id)
+        self.inactive.discard(record_id)
+        
+        for trigram in set().union(*[_trigrams(value) for value in values]):
+            postings = self.postings.get(trigram)
+            if postings is not None:
+                postings.discard(record_id)
+                if not postings:
+                    del self.postings[trigram]
+        
+        for segment in _segments(values):
+            segment_ids = self.segments[segment]
+            segment_ids.discard(record_id)
+            if not segment_ids:
+                del self.segments[segment]
+                for trigram in _trigrams(segment):
+                    segment_postings = self.segment_postings[trigram]
+                    segment_postings.discard(segment)
+                    if not segment_postings:
+                        del self.segment_postings[trigram]
+        
+        field_tokens, word_tokens = _tokens(values)
+        for keys, ids, tokens in (
+            (self.field_keys, self.field_ids, field_tokens),
+            (self.word_keys, self.word_ids, word_tokens),
+            (self.ordered_keys, self.ordered_ids, [sort_key])
+        ):
+            for token in tokens:
+                index = bisect_left(keys, token)
+                while index < len(keys) and keys[index] == token:
+                    if ids[index] == record_id:
+                        del keys[index]
+                        del ids[index]
+                        break
+                    index += 1
+    
+    def apply(self, change, updated_at=None):
+        # A write made by this process: a record to (re)index or an id to
+        # drop. The validator follows it, so the next refresh only rebuilds
+        # for changes made elsewhere
+        latest, count = self.validator
+        if isinstance(change, dict):
+            count += change['id'] not in self.records
+            if updated_at is not None and (latest is None or updated_at > latest):
+                latest = updated_at
+            self.remove(change['id'])
+            self.add(change)
+        elif change in self.records:
+            count -= 1
+            self.remove(change)
+        self.validator = (latest, count)
+    
+    def sort(self):
+        # Bulk loads append unsorted and sort once at the end
+        for keys, ids in (
+            (self.field_keys, self.field_ids),
+            (self.word_keys, self.word_ids),
+            (self.ordered_keys, self.ordered_ids)
+        ):
+            pairs = sorted(zip(keys, ids))
+            keys[:] = [key for key, _ in pairs]
+            ids[:] = [record_id for _, record_id in pairs]
+    
+    def search(self, term, limit, offset, active_only):
+        field_matches = self._prefix_ids(self.field_keys, self.field_ids, term)
+        word_matches = self._prefix_ids(self.word_keys, self.word_ids, term) - field_matches
+        if len(term) >= 3:
+            other_matches = self._substring_ids(term) - field_matches - word_matches
+        else:
+            other_matches = set()
+        
+        groups = [field_matches, word_matches, other_matches]
+        inactive = self.inactive if active_only else set()
+        counts = [len(group) - len(group & inactive) for group in groups]
+        total = sum(counts)
+        
+        # Only the groups that overlap the requested window are ordered
+        results = []
+        skip = offset
+        for group, count in zip(groups, counts):
+            if len(results) >= limit:
+                break
+            if skip >= count:
+                skip -= count
+                continue
+            wanted = skip + limit - len(results)
+            if count * DENSE_GROUP_RATIO >= len(self.records):
+                # A broad term matches much of the roster: walking the name
+                # order finds the first page after a few rows, or in C after
+                # many when the matches share a name prefix
+                matches = filter(group.__contains__, self.ordered_ids)
+                if inactive:
+                    matches = filterfalse(inactive.__contains__, matches)
+                ordered = list(islice(matches, wanted))
+            else:
+                ordered = heapq.nsmallest(wanted, group - inactive, key=self.sort_keys.__getitem__)
+            results.extend(self.records[record_id] for record_id in ordered[skip:])
+            skip = 0
+        
+        return results, total
+    
+    @staticmethod
+    def _prefix_ids(keys, ids, term):
+        return set(ids[bisect_left(keys, term):bisect_left(keys, term + '\uffff')])
+    
+    def _substring_ids(self, term):
+        # Intersect the two rarest postings, then confirm against the text;
+        # more intersections cost more than they save on common trigrams
+        if len(term) > 3 and SEGMENT_SEPARATOR not in term:
+            return self._segment_ids(term)
+        
+        postings = sorted((self.postings.get(trigram, ()) for trigram in _trigrams(term)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        
+        if len(term) == 3:
+            return postings[0]
+        
+        texts = self.texts
+        candidates = postings[0] & postings[1] if len(postings) > 1 else postings[0]
+        return {record_id for record_id in candidates if term in texts[record_id]}
+    
+    def _segment_ids(self, term):
+        # Same as above over distinct segments: a term without the separator
+        # lies within one segment, and a common one is confirmed only once
+        postings = sorted((self.segment_postings.get(trigram, ()) for trigram in _trigrams(term)), key=len)
+        if not postings[0]:
+            return set()
+        
+        candidates = postings[0] & postings[1] if len(postings) > 1 else postings[0]
+        matches = [self.segments[segment] for segment in candidates if term in segment]
+        if len(matches) == 1:
+            return matches[0]
+        return set().union(*matches)
+
+def load_search_state():
+    state = SearchState(roster_validator())
+    for record in EMPLOYEE_SERIALIZER.all(Employee.query):
+        state.add(record, sort=False)
+    state.sort()
+    return state
+
+def search_database(term, limit, offset, active_only):
+    # Answers while the first generation is built: the same fields matched
+    # anywhere, ordered by name without the index's prefix ranking
+    query = Employee.query.filter(
+        or_(*[getattr(Employee, field).icontains(term, autoescape=True) for field in SEARCH_FIELDS])
+    )
+    if active_only:
+        query = query.filter(Employee.is_active.is_(True))
+    
+    total = query.count()
+    page = query.order_by(Employee.name, Employee.employee_id).offset(offset).limit(limit)
+    return EMPLOYEE_SERIALIZER.all(page), total
+
+def roster_validator():
+    return tuple(db.session.query(func.max(Employee.updated_at), func.count(Employee.id)).one())
+
+class EmployeeSearchIndex:
+    # In-memory trigram index over the searchable employee fields. Terms of
+    # three or more characters match anywhere in a field; shorter terms match
+    # the start of a field or of a word. Results rank field prefixes first,
+    # then word prefixes, then other substrings, each by name.
+    def __init__(self, refresh_seconds=300, background=True):
+        self.refresh_seconds = refresh_seconds
+        # Builds run on their own thread while the previous generation, or
+        # the database before the first one, answers searches
+        self.background = background
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked_at = 0.0
+        # Writes made while a build runs, replayed onto the new generation
+        self._pending = None
+        # The roster changed after the running build started reading it
+        self._stale = False
+    
+    def search(self, term, limit=20, offset=0, active_only=True):
+        term = term.strip().lower()
+        if not term:
+            return [], 0
+        
+        with self._lock:
+            if self._state is None:
+                if self._pending is None:
+                    self._build(current_app._get_current_object())
+            elif self._pending is None and time.monotonic() - self._checked_at >= self.refresh_seconds:
+                self._refresh()
+            
+            if self._state is not None:
+                return self._state.search(term, limit, offset, active_only)
+        
+        return search_database(term, limit, offset, active_only)
+    
+    def warm(self):
+        # First request of a serving process: build before anyone searches
+        if self.background and self._state is None and self._pending is None:
+            with self._lock:
+                if self._state is None and self._pending is None:
+                    self._build(current_app._get_current_object())
+    
+    def add(self, record, updated_at=None):
+        with self._lock:
+            if self._state is not None:
+                self._state.apply(record, updated_at)
+            if self._pending is not None:
+                self._pending.append((record, updated_at))
+    
+    def remove(self, record_id):
+        with self._lock:
+            if self._state is not None:
+                self._state.apply(record_id)
+            if self._pending is not None:
+                self._pending.append((record_id, None))
+    
+    def invalidate(self):
+        # After bulk writes; the current generation answers until the
+        # rebuild finishes
+        with self._lock:
+            if self._state is not None or self._pending is not None:
+                self._build(current_app._get_current_object())
+    
+    def stats(self):
+        state = self._state
+        return {
+            'built': state is not None,
+            'rebuilding': self._pending is not None,
+            'employees': len(state.records) if state else 0,
+            'trigrams': len(state.postings) if state else 0
+        }
+    
+    def _refresh(self):
+        # The refresh interval bounds staleness when another process changes
+        # employees. An unchanged roster costs one aggregate query; a changed
+        # one is reloaded while this generation answers
+        self._checked_at = time.monotonic()
+        if roster_validator() != self._state.validator:
+            self._build(current_app._get_current_object())
+    
+    def _build(self, app):
+        # Called with the lock held
+        if not self.background:
+            self._state = load_search_state()
+            self._checked_at = time.monotonic()
+            return
+        
+        if self._pending is not None:
+            self._stale = True
+            return
+        
+        self._pending = []
+        self._stale = False
+        threading.Thread(target=self._load, args=(app,), name='employee-search-build', daemon=True).start()
+    
+    def _load(self, app):
+        state = None
+        try:
+            with app.app_context():
+                try:
+                    state = load_search_state()
+                finally:
+                    db.session.remove()
+        except Exception:
+            logger.exception('Building the employee search index failed')
+        
+        with self._lock:
+            if state is not None:
+                for change, updated_at in self._pending:
+                    state.apply(change, updated_at)
+                self._state = state
+                self._checked_at = time.monotonic()
+            self._pending = None
+            if self._stale:
+                self._build(app)
+
+def init_employee_search(app):
+    index = EmployeeSearchIndex(app.config['EMPLOYEE_SEARCH_REFRESH_SECONDS'], app.config['EMPLOYEE_SEARCH_BACKGROUND_BUILD'])
+    app.extensions['employee_search'] = index
+    app.before_request(index.warm)
+
+def get_employee_search():
+    return current_app.extensions['employee_search']
+
+def index_employee(employee):
+    if has_app_context() and 'employee_search' in current_app.extensions:
+        current_app.extensions['employee_search'].add(employee.to_dict(), employee.updated_at)
+
+def unindex_employee(record_id):
+    if has_app_context() and 'employee_search' in current_app.extensions:
+        current_app.extensions['employee_search'].remove(record_id)
+
+def invalidate_employee_search():
+    if has_app_context() and 'employee_search' in current_app.extensions:
+        current_app.extensions['employee_search'].invalidate()
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from .extensions import db
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+# Statements are logged without their parameters, and cut to this length
+SLOW_QUERY_LOG_CHARS = 1000
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, labels)} {_number(value)}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # Per label set: [count per bucket (the last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+    
+    def count(self, labels=()):
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+    
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == '+Inf' else f'le="{_number(bound)}"'
+                    lines.append(f'{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+class Metrics:
+    # Per-process registry; with several workers each one is scraped on its own
+    def __init__(self, slow_query_seconds=0.2):
+        self.slow_query_seconds = slow_query_seconds
+        endpoint = ('endpoint', 'method')
+        self.requests = Counter('http_requests_total', 'HTTP requests by endpoint and status.', endpoint + ('status',))
+        self.request_seconds = Histogram(
+            'http_request_duration_seconds', 'Time spent handling a request, until the view returns.', endpoint
+        )
+        self.request_statements = Histogram(
+            'http_request_sql_statements', 'SQL statements executed per request.', endpoint, STATEMENT_BUCKETS
+        )
+        self.request_sql_seconds = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent in SQL per request.', endpoint
+        )
+        # These also count statements from background threads (journal, report jobs)
+        self.statements = Counter('sql_statements_total', 'SQL statements executed.')
+        self.sql_seconds = Counter('sql_duration_seconds_total', 'Time spent executing SQL statements.')
+        self.slow_statements = Counter('sql_slow_statements_total', 'SQL statements slower than the slow-query threshold.')
+    
+    def render(self):
+        lines = []
+        for metric in (
+            self.requests, self.request_seconds, self.request_statements, self.request_sql_seconds,
+            self.statements, self.sql_seconds, self.slow_statements
+        ):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+    
+    def after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        
+        elapsed = time.perf_counter() - started
+        statements = g.pop('sql_statements')
+        sql_seconds = g.pop('sql_seconds')
+        labels = (request.endpoint or 'unmatched', request.method)
+        self.requests.inc(labels + (str(response.status_code),))
+        self.request_seconds.observe(elapsed, labels)
+        self.request_statements.observe(statements, labels)
+        self.request_sql_seconds.observe(sql_seconds, labels)
+        
+        # Lets the browser's network panel split database time from the rest
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={sql_seconds * 1000:.1f};desc="{statements} statements", app;dur={elapsed * 1000:.1f}'
+        )
+        return response
+    
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+    
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_started'].pop()
+        self.statements.inc()
+        self.sql_seconds.inc(amount=elapsed)
+        
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements += 1
+            g.sql_seconds += elapsed
+        
+        if self.slow_query_seconds and elapsed >= self.slow_query_seconds:
+            self.slow_statements.inc()
+            logger.warning('Slow query (%.1f ms): %s', elapsed * 1000, ' '.join(statement.split())[:SLOW_QUERY_LOG_CHARS])
+    
+    def handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute
+        started = exception_context.connection.info.get('metrics_started') if exception_context.connection else None
+        if started:
+            started.pop()
+
+def metrics_view():
+    return Response(current_app.extensions['metrics'].render(), mimetype='text/plain; version=0.0.4')
+
+def init_metrics(app):
+    # Nothing is hooked in when disabled, so requests and queries pay nothing
+    if not app.config['METRICS_ENABLED']:
+        return
+    
+    metrics = Metrics(slow_query_seconds=app.config['SLOW_QUERY_MS'] / 1000)
+    app.extensions['metrics'] = metrics
+    app.before_request(metrics.before_request)
+    app.after_request(metrics.after_request)
+    
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', metrics.before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', metrics.after_cursor_execute)
+        event.listen(db.engine, 'handle_error', metrics.handle_error)
+    
+    # Unauthenticated so Prometheus can scrape it; expose it on internal networks only
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+def get_metrics():
+    return current_app.extensions.get('metrics')
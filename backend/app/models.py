@@ -1,11 +1,12 @@
-from datetime import datetime, time
+from datetime import datetime
 from .extensions import db
 from .utils.date_utils import get_working_hours
+from .policy import get_policy
 
 class Employee(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.String(50), unique=True, nullable=False, index=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     department = db.Column(db.String(100))
     position = db.Column(db.String(100))
     email = db.Column(db.String(100), unique=True)
@@ -18,6 +19,11 @@ class Employee(db.Model):
     # Relationships
     attendances = db.relationship('Attendance', backref='employee_ref', lazy=True, cascade='all, delete-orphan')
     
+    __table_args__ = (
+        # Serves the active/department filter of the daily report join
+        db.Index('ix_employee_active_department', 'is_active', 'department'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -50,7 +56,11 @@ class Attendance(db.Model):
         db.UniqueConstraint('employee_id', 'date', name='unique_attendance_per_day'),
     )
     
-    def calculate_status(self, expected_check_in=time(9, 0)):
+    def calculate_status(self, expected_check_in=None, policy=None):
+        # Thresholds come from the cached policy, so this never queries settings
+        policy = policy or get_policy()
+        expected_check_in = expected_check_in or policy.work_start
+        
         if not self.check_in:
             self.status = 'Absent'
             return
@@ -60,15 +70,16 @@ class Attendance(db.Model):
             late_minutes = (check_in_time.hour * 60 + check_in_time.minute) - \
                           (expected_check_in.hour * 60 + expected_check_in.minute)
             self.late_minutes = late_minutes
-            self.status = 'Late' if late_minutes <= 30 else 'Half-day'
+            self.status = 'Late' if late_minutes <= policy.late_threshold_minutes else 'Half-day'
         else:
             self.status = 'Present'
         
         # Calculate overtime if checked out
         if self.check_out:
-            working_hours = get_working_hours(self.check_in, self.check_out)
-            if working_hours.total_seconds() / 3600 > 9:  # More than 9 hours
-                self.overtime_minutes = int((working_hours.total_seconds() / 3600 - 9) * 60)
+            working_hours = get_working_hours(self.check_in, self.check_out, policy.lunch_start, policy.lunch_end)
+            hours = working_hours.total_seconds() / 3600
+            if hours > policy.overtime_after_hours:
+                self.overtime_minutes = int((hours - policy.overtime_after_hours) * 60)
     
     def to_dict(self):
         return {
@@ -85,6 +96,46 @@ class Attendance(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class AttendanceDailyAggregate(db.Model):
+    # Rollup of attendance rows per (date, department, status), maintained
+    # by AggregateService in the same transaction as the attendance writes
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False)
+    department = db.Column(db.String(100), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('date', 'department', 'status', name='unique_daily_aggregate'),
+    )
+
+class ArchivedYear(db.Model):
+    # Closed years whose attendance rows were moved to attendance_archive_<year>
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'year': self.year,
+            'row_count': self.row_count,
+            'archived_at': self.archived_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+class Holiday(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'date': self.date.strftime('%Y-%m-%d'),
+            'name': self.name
+        }
+
 class AttendanceSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     key = db.Column(db.String(50), unique=True, nullable=False)
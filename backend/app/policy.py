@@ -0,0 +1,136 @@
+import threading
+import time as clock
+from datetime import datetime, date, timedelta
+from itertools import accumulate
+from flask import current_app, has_app_context
+
+# AttendanceSettings key bumped on every settings change
+POLICY_VERSION_KEY = 'policy_version'
+
+DEFAULT_POLICY_SETTINGS = {
+    'work_start_time': '09:00',
+    'late_threshold_minutes': '30',
+    'overtime_after_hours': '9',
+    'lunch_start_time': '12:00',
+    'lunch_end_time': '13:00',
+    'working_weekdays': '0,1,2,3,4'
+}
+
+def parse_policy_time(value):
+    return datetime.strptime(value, '%H:%M').time()
+
+def parse_weekdays(value):
+    return frozenset(int(day) for day in value.split(',') if day.strip())
+
+class AttendancePolicy:
+    def __init__(self, settings=None, version=0, holidays=()):
+        values = dict(DEFAULT_POLICY_SETTINGS)
+        values.update({key: value for key, value in (settings or {}).items() if key in values and value})
+        
+        self.version = version
+        self.work_start = parse_policy_time(values['work_start_time'])
+        self.late_threshold_minutes = int(values['late_threshold_minutes'])
+        self.overtime_after_hours = float(values['overtime_after_hours'])
+        self.lunch_start = parse_policy_time(values['lunch_start_time'])
+        self.lunch_end = parse_policy_time(values['lunch_end_time'])
+        self.working_weekdays = parse_weekdays(values['working_weekdays'])
+        self.holidays = frozenset(holidays)
+        
+        # year -> running count of working days, built on first use
+        self._year_prefix = {}
+    
+    def is_working_day(self, date_obj):
+        return date_obj.weekday() in self.working_weekdays and date_obj not in self.holidays
+    
+    def working_days(self, start_date, end_date):
+        # Two prefix-sum lookups per calendar year in the range
+        days = 0
+        for year in range(start_date.year, end_date.year + 1):
+            prefix = self._prefix(year)
+            first = max(start_date, date(year, 1, 1))
+            last = min(end_date, date(year, 12, 31))
+            if first <= last:
+                days += prefix[last.timetuple().tm_yday] - prefix[first.timetuple().tm_yday - 1]
+        return days
+    
+    def working_dates(self, start_date, end_date):
+        return [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+            if self.is_working_day(start_date + timedelta(days=offset))
+        ]
+    
+    def holidays_between(self, start_date, end_date):
+        return sorted(day for day in self.holidays if start_date <= day <= end_date)
+    
+    def _prefix(self, year):
+        prefix = self._year_prefix.get(year)
+        if prefix is None:
+            first = date(year, 1, 1)
+            days = (date(year + 1, 1, 1) - first).days
+            prefix = list(accumulate(
+                (self.is_working_day(first + timedelta(days=offset)) for offset in range(days)),
+                initial=0
+            ))
+            self._year_prefix[year] = prefix
+        return prefix
+    
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'work_start_time': self.work_start.strftime('%H:%M'),
+            'late_threshold_minutes': self.late_threshold_minutes,
+            'overtime_after_hours': self.overtime_after_hours,
+            'lunch_start_time': self.lunch_start.strftime('%H:%M'),
+            'lunch_end_time': self.lunch_end.strftime('%H:%M'),
+            'working_weekdays': sorted(self.working_weekdays)
+        }
+
+DEFAULT_POLICY = AttendancePolicy()
+
+class PolicyCache:
+    def __init__(self, refresh_seconds=30):
+        self.refresh_seconds = refresh_seconds
+        self._policy = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        # Fast path: no query at all until the refresh interval elapses
+        policy = self._policy
+        if policy is not None and clock.monotonic() - self._checked_at < self.refresh_seconds:
+            return policy
+        
+        with self._lock:
+            version = self._load_version()
+            if self._policy is None or self._policy.version != version:
+                self._policy = self._load()
+            self._checked_at = clock.monotonic()
+            return self._policy
+    
+    def invalidate(self):
+        with self._lock:
+            self._policy = None
+    
+    def _load_version(self):
+        # Imported here because the models import this module
+        from .models import AttendanceSettings
+        return int(AttendanceSettings.get_setting(POLICY_VERSION_KEY, 0))
+    
+    def _load(self):
+        from .models import AttendanceSettings, Holiday
+        settings = {setting.key: setting.value for setting in AttendanceSettings.query.all()}
+        holidays = [row.date for row in Holiday.query.with_entities(Holiday.date)]
+        return AttendancePolicy(settings, int(settings.get(POLICY_VERSION_KEY, 0)), holidays)
+
+def init_policy(app):
+    app.extensions['attendance_policy'] = PolicyCache(app.config['POLICY_REFRESH_SECONDS'])
+
+def get_policy():
+    if not has_app_context() or 'attendance_policy' not in current_app.extensions:
+        return DEFAULT_POLICY
+    return current_app.extensions['attendance_policy'].get()
+
+def invalidate_policy():
+    if has_app_context() and 'attendance_policy' in current_app.extensions:
+        current_app.extensions['attendance_policy'].invalidate()
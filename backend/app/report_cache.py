@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+class ReportCacheEntry:
+    def __init__(self, body, start_date, end_date, department, employee_id, expires_at):
+        self.body = body
+        self.size = len(body)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.department = department
+        self.employee_id = employee_id
+        self.expires_at = expires_at
+    
+    def is_affected(self, dates, departments, employee_ids):
+        if dates is not None and not any(self.start_date <= day <= self.end_date for day in dates):
+            return False
+        if departments is not None and self.department is not None and self.department not in departments:
+            return False
+        if employee_ids is not None and self.employee_id is not None and self.employee_id not in employee_ids:
+            return False
+        return True
+
+class ReportCache:
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+    
+    def set(self, key, body, start_date, end_date, department=None, employee_id=None):
+        # Bodies larger than the whole budget are never worth caching
+        if len(body) > self.max_bytes:
+            return
+        
+        entry = ReportCacheEntry(body, start_date, end_date, department, employee_id, time.monotonic() + self.ttl)
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = entry
+            self.size += entry.size
+            
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, dates=None, departments=None, employee_ids=None):
+        # None means "any": writes pass only the scopes they actually touched
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.is_affected(dates, departments, employee_ids):
+                    self._remove(key)
+                    self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups > 0 else 0
+        }
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+
+def init_report_cache(app):
+    app.extensions['report_cache'] = ReportCache(
+        max_entries=app.config['REPORT_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['REPORT_CACHE_MAX_BYTES'],
+        ttl=app.config['REPORT_CACHE_TTL']
+    )
+
+def get_report_cache():
+    return current_app.extensions['report_cache']
+
+def invalidate_reports(dates=None, departments=None, employee_ids=None):
+    if has_app_context() and 'report_cache' in current_app.extensions:
+        current_app.extensions['report_cache'].invalidate(dates, departments, employee_ids)
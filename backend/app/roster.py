@@ -0,0 +1,43 @@
+from flask import current_app, has_app_context
+from .models import Employee
+from .utils.lru_cache import LRUCache
+
+class RosterCache:
+    def __init__(self, max_size=50000, ttl=300):
+        # The TTL bounds staleness when another process changes the roster
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+    
+    def get(self, employee_id):
+        employee = self._cache.get(employee_id)
+        if employee is not None:
+            return employee
+        
+        record = Employee.query.filter_by(employee_id=employee_id).first()
+        if not record:
+            return None
+        
+        employee = record.to_dict()
+        self._cache.set(employee_id, employee)
+        return employee
+    
+    def invalidate(self, employee_id=None):
+        if employee_id is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(employee_id)
+    
+    def stats(self):
+        return self._cache.stats()
+
+def init_roster(app):
+    app.extensions['roster_cache'] = RosterCache(
+        max_size=app.config['ROSTER_CACHE_SIZE'],
+        ttl=app.config['ROSTER_CACHE_TTL']
+    )
+
+def get_roster():
+    return current_app.extensions['roster_cache']
+
+def invalidate_roster(employee_id=None):
+    if has_app_context() and 'roster_cache' in current_app.extensions:
+        current_app.extensions['roster_cache'].invalidate(employee_id)
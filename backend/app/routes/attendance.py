@@ -1,11 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from datetime import datetime, date
 from ..services.attendance_service import AttendanceService
-from ..utils.validators import validate_attendance_data
+from ..services.freshness_service import FreshnessService
+from ..services.policy_service import PolicyService
+from ..services.punch_journal import get_punch_journal
+from ..roster import get_roster
+from ..utils.http_cache import conditional_response
+from ..utils.validators import validate_attendance_data, validate_policy_settings, validate_holiday, validate_punch_event
 
 attendance_bp = Blueprint('attendance', __name__)
 attendance_service = AttendanceService()
+freshness_service = FreshnessService()
+policy_service = PolicyService()
+
+def journal_punch(employee_id, punch_type, notes):
+    # Journal mode: acknowledge once the punch is durable, apply it later
+    _, sequence = get_punch_journal().append([{'employee_id': employee_id, 'type': punch_type, 'notes': notes}])
+    return jsonify({'message': 'Punch accepted', 'sequence': sequence}), 202
 
 @attendance_bp.route('/check-in', methods=['POST'])
 @jwt_required()
@@ -16,10 +28,17 @@ def check_in():
     # Use employee ID from token or request body
     employee_id = data.get('employee_id') or current_user.get('employee_id')
     
-    if not employee_id:
-        return jsonify({'message': 'Employee ID is required'}), 400
+    errors = validate_punch_event({'employee_id': employee_id, 'type': 'check_in', 'notes': data.get('notes')})
+    if errors:
+        return jsonify({'message': '; '.join(errors)}), 400
     
     try:
+        if get_punch_journal():
+            employee = get_roster().get(employee_id)
+            if not employee or not employee['is_active']:
+                return jsonify({'message': 'Employee not found or inactive'}), 400
+            return journal_punch(employee_id, 'check_in', data.get('notes'))
+        
         result = attendance_service.check_in(employee_id, data.get('notes'))
         
         if not result['success']:
@@ -41,10 +60,14 @@ def check_out():
     
     employee_id = data.get('employee_id') or current_user.get('employee_id')
     
-    if not employee_id:
-        return jsonify({'message': 'Employee ID is required'}), 400
+    errors = validate_punch_event({'employee_id': employee_id, 'type': 'check_out', 'notes': data.get('notes')})
+    if errors:
+        return jsonify({'message': '; '.join(errors)}), 400
     
     try:
+        if get_punch_journal():
+            return journal_punch(employee_id, 'check_out', data.get('notes'))
+        
         result = attendance_service.check_out(employee_id, data.get('notes'))
         
         if not result['success']:
@@ -58,6 +81,68 @@ def check_out():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@attendance_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_punch():
+    data = request.get_json()
+    
+    # Accept either a bare array or {"events": [...]}
+    events = data.get('events') if isinstance(data, dict) else data
+    
+    if not isinstance(events, list) or not events:
+        return jsonify({'message': 'A non-empty list of punch events is required'}), 400
+    
+    max_batch_size = current_app.config['MAX_PUNCH_BATCH_SIZE']
+    if len(events) > max_batch_size:
+        return jsonify({'message': f'Batch size exceeds the limit of {max_batch_size} events'}), 413
+    
+    try:
+        journal = get_punch_journal()
+        if journal:
+            # Reject malformed events now; the rest are applied in the background
+            rejected = []
+            accepted = []
+            for index, event in enumerate(events):
+                errors = validate_punch_event(event)
+                if errors:
+                    rejected.append({
+                        'index': index,
+                        'employee_id': event.get('employee_id') if isinstance(event, dict) else None,
+                        'type': event.get('type') if isinstance(event, dict) else None,
+                        'success': False,
+                        'message': '; '.join(errors)
+                    })
+                else:
+                    accepted.append(event)
+            
+            response = {'accepted': len(accepted), 'rejected': rejected}
+            if accepted:
+                response['first_sequence'], response['last_sequence'] = journal.append(accepted)
+            return jsonify(response), 202
+        
+        results = attendance_service.batch_punch(events)
+        succeeded = sum(1 for result in results if result['success'])
+        
+        return jsonify({
+            'processed': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/journal', methods=['GET'])
+@jwt_required()
+def get_journal_status():
+    journal = get_punch_journal()
+    if not journal:
+        # Also the case for journal mode when no journal could be claimed
+        return jsonify({'mode': 'direct'})
+    
+    return jsonify({'mode': 'journal', **journal.status()})
+
 @attendance_bp.route('/status/today', methods=['GET'])
 @jwt_required()
 def get_today_status():
@@ -68,8 +153,16 @@ def get_today_status():
         return jsonify({'message': 'Employee ID is required'}), 400
     
     try:
-        status = attendance_service.get_today_status(employee_id)
-        return jsonify(status)
+        today = date.today()
+        
+        return conditional_response(
+            [
+                (today,),
+                freshness_service.attendance(today, today, employee_id=employee_id),
+                freshness_service.employees(employee_id=employee_id)
+            ],
+            lambda: jsonify(attendance_service.get_today_status(employee_id))
+        )
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -83,20 +176,61 @@ def get_attendance_history(employee_id):
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 30))
         
-        history, total = attendance_service.get_attendance_history(
-            employee_id=employee_id,
-            start_date=start_date,
-            end_date=end_date,
-            page=page,
-            per_page=per_page
-        )
+        try:
+            validators = [freshness_service.attendance(
+                datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None,
+                datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None,
+                employee_id=employee_id
+            )]
+        except ValueError:
+            return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        return jsonify({
-            'history': [record.to_dict() for record in history],
-            'total': total,
-            'page': page,
-            'per_page': per_page
-        })
+        # Cursor mode: pass cursor= (empty for the first page) to use keyset pagination
+        if 'cursor' in request.args:
+            include_total = request.args.get('include_total', 'false').lower() == 'true'
+            
+            def build_page():
+                try:
+                    history, next_cursor, total = attendance_service.get_attendance_history_page(
+                        employee_id=employee_id,
+                        start_date=start_date,
+                        end_date=end_date,
+                        cursor=request.args.get('cursor'),
+                        limit=per_page,
+                        with_total=include_total
+                    )
+                except ValueError as e:
+                    return jsonify({'message': str(e)}), 400
+                
+                response = {
+                    'history': history,
+                    'next_cursor': next_cursor,
+                    'per_page': per_page
+                }
+                if include_total:
+                    response['total'] = total
+                
+                return jsonify(response)
+            
+            return conditional_response(validators, build_page)
+        
+        def build():
+            history, total = attendance_service.get_attendance_history(
+                employee_id=employee_id,
+                start_date=start_date,
+                end_date=end_date,
+                page=page,
+                per_page=per_page
+            )
+            
+            return jsonify({
+                'history': history,
+                'total': total,
+                'page': page,
+                'per_page': per_page
+            })
+        
+        return conditional_response(validators, build)
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -118,6 +252,8 @@ def manual_attendance():
             'attendance': attendance.to_dict()
         }), 201
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -137,5 +273,115 @@ def update_attendance(attendance_id):
             'attendance': attendance.to_dict()
         })
         
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/settings', methods=['GET'])
+@jwt_required()
+def get_settings():
+    try:
+        return jsonify(policy_service.get_policy().to_dict())
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/settings', methods=['PUT'])
+@jwt_required()
+def update_settings():
+    data = request.get_json()
+    
+    errors = validate_policy_settings(data)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    try:
+        policy = policy_service.update_settings(data)
+        
+        return jsonify({
+            'message': 'Settings updated successfully',
+            'settings': policy.to_dict()
+        })
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/holidays', methods=['GET'])
+@jwt_required()
+def get_holidays():
+    try:
+        year = request.args.get('year', type=int)
+        holidays = policy_service.get_holidays(year)
+        
+        return jsonify({'holidays': [holiday.to_dict() for holiday in holidays]})
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/holidays', methods=['POST'])
+@jwt_required()
+def add_holiday():
+    data = request.get_json()
+    
+    errors = validate_holiday(data)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    try:
+        holiday = policy_service.add_holiday(
+            datetime.strptime(data['date'], '%Y-%m-%d').date(),
+            data['name'].strip()
+        )
+        
+        return jsonify({
+            'message': 'Holiday saved successfully',
+            'holiday': holiday.to_dict()
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/holidays/<date_str>', methods=['DELETE'])
+@jwt_required()
+def delete_holiday(date_str):
+    try:
+        holiday_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    try:
+        if not policy_service.delete_holiday(holiday_date):
+            return jsonify({'message': 'Holiday not found'}), 404
+        
+        return jsonify({'message': 'Holiday deleted successfully'})
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@attendance_bp.route('/recalculate', methods=['POST'])
+@jwt_required()
+def recalculate_attendance():
+    data = request.get_json() or {}
+    
+    try:
+        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date() if data.get('start_date') else None
+        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data.get('end_date') else None
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    if start_date and end_date and start_date > end_date:
+        return jsonify({'message': 'start_date must not be after end_date'}), 400
+    
+    try:
+        # NumPy loads with the service, on the first recalculation
+        from ..services.recalculation_service import RecalculationService
+        result = RecalculationService().recalculate(start_date, end_date, data.get('department'))
+        
+        return jsonify({
+            'message': 'Attendance recalculated successfully',
+            **result
+        })
+        
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': str(e)}), 500
\ No newline at end of file
@@ -1,12 +1,16 @@
-from flask import Blueprint, request, jsonify
+import json
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required
 from sqlalchemy.exc import IntegrityError
 from ..models import Employee, db
 from ..services.employee_service import EmployeeService
+from ..services.employee_import_service import EmployeeImportService
+from ..roster import get_roster
 from ..utils.validators import validate_employee_data
 
 employees_bp = Blueprint('employees', __name__)
 employee_service = EmployeeService()
+employee_import_service = EmployeeImportService()
 
 @employees_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -17,6 +21,31 @@ def get_employees():
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
+        # Cursor mode: pass cursor= (empty for the first page) to use keyset pagination
+        if 'cursor' in request.args:
+            include_total = request.args.get('include_total', 'false').lower() == 'true'
+            
+            try:
+                employees, next_cursor, total = employee_service.get_employees_page(
+                    active_only=active_only,
+                    department=department,
+                    cursor=request.args.get('cursor'),
+                    limit=per_page,
+                    with_total=include_total
+                )
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
+            
+            response = {
+                'employees': employees,
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if include_total:
+                response['total'] = total
+            
+            return jsonify(response)
+        
         employees, total = employee_service.get_employees(
             active_only=active_only,
             department=department,
@@ -25,7 +54,7 @@ def get_employees():
         )
         
         return jsonify({
-            'employees': [emp.to_dict() for emp in employees],
+            'employees': employees,
             'total': total,
             'page': page,
             'per_page': per_page,
@@ -35,6 +64,39 @@ def get_employees():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@employees_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_employees():
+    term = request.args.get('q', '').strip()
+    if not term:
+        return jsonify({'message': 'Search term q is required'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), current_app.config['MAX_SEARCH_RESULTS'])
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'message': 'limit and offset must be integers'}), 400
+    
+    active_only = request.args.get('active_only', 'true').lower() == 'true'
+    
+    try:
+        employees, total = employee_service.search_employees(term, limit=limit, offset=offset, active_only=active_only)
+        
+        return jsonify({
+            'employees': employees,
+            'total': total,
+            'limit': limit,
+            'offset': offset
+        })
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@employees_bp.route('/roster-cache', methods=['GET'])
+@jwt_required()
+def roster_cache_stats():
+    return jsonify(get_roster().stats())
+
 @employees_bp.route('/<employee_id>', methods=['GET'])
 @jwt_required()
 def get_employee(employee_id):
@@ -67,6 +129,25 @@ def create_employee():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@employees_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_employees():
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'message': 'A .csv or .xlsx file is required'}), 400
+    
+    try:
+        rows = employee_import_service.read_rows(upload.stream, upload.filename)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # One JSON object per line: each rejected row as it is found, then the summary
+    report = employee_import_service.import_employees(rows)
+    return Response(
+        stream_with_context(json.dumps(entry) + '\n' for entry in report),
+        mimetype='application/x-ndjson'
+    )
+
 @employees_bp.route('/<employee_id>', methods=['PUT'])
 @jwt_required()
 def update_employee(employee_id):
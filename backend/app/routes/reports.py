@@ -1,11 +1,61 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
+import gzip
 import io
+from ..policy import get_policy
+from ..report_cache import get_report_cache
+from ..services.freshness_service import FreshnessService
 from ..services.report_service import ReportService
+from ..services.job_service import get_report_jobs
+from ..utils.date_utils import get_month_range
+from ..utils.helpers import gzip_stream
+from ..utils.http_cache import conditional_response
+from ..utils.validators import validate_report_job
 
 reports_bp = Blueprint('reports', __name__)
 report_service = ReportService()
+freshness_service = FreshnessService()
+
+def accepts_gzip():
+    return 'gzip' in request.accept_encodings
+
+def report_format():
+    report_format = request.args.get('format', 'json')
+    if report_format not in ('json', 'columnar'):
+        raise ValueError('Unsupported format. Use json or columnar')
+    return report_format
+
+def cached_report(key, validators, build, start_date, end_date, department=None, employee_id=None, compress=False):
+    # The serialized body is cached, so a hit skips both the queries and the JSON encoding.
+    # The key carries the same validators as the ETag: a write committed by
+    # another worker, or not yet invalidated here, changes them, so a body
+    # is never served under an ETag it was not built for
+    cache = get_report_cache()
+    key = key + tuple(validators)
+    if compress:
+        key = key + ('gzip',)
+    body = cache.get(key)
+    
+    if body is None:
+        body = current_app.json.dumps(build()).encode()
+        if compress:
+            body = gzip.compress(body, compresslevel=6)
+        cache.set(key, body, start_date, end_date, department, employee_id)
+    
+    response = current_app.response_class(body, mimetype='application/json')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    
+    return response
+
+def report_validators(start_date, end_date, department=None, employee_id=None):
+    # Reports read attendance and the roster, and working days come from the policy
+    return [
+        (get_policy().version,),
+        freshness_service.attendance(start_date, end_date, employee_id, department),
+        freshness_service.employees(department, employee_id)
+    ]
 
 @reports_bp.route('/daily', methods=['GET'])
 @jwt_required()
@@ -13,17 +63,40 @@ def daily_report():
     try:
         date_str = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
         department = request.args.get('department')
+        page = request.args.get('page', type=int)
+        limit = request.args.get('limit', type=int)
         
-        report = report_service.generate_daily_report(date_str, department)
+        def build():
+            report = report_service.generate_daily_report(date_str, department, page, limit)
+            
+            response = {
+                'date': date_str,
+                'total_employees': report['total_employees'],
+                'present_count': report['present_count'],
+                'absent_count': report['absent_count'],
+                'late_count': report['late_count'],
+                'attendance_list': report['attendance_list']
+            }
+            if limit:
+                response['page'] = report['page']
+                response['limit'] = report['limit']
+            
+            return response
+        
+        report_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        validators = report_validators(report_date, report_date, department=department)
         
-        return jsonify({
-            'date': date_str,
-            'total_employees': report['total_employees'],
-            'present_count': report['present_count'],
-            'absent_count': report['absent_count'],
-            'late_count': report['late_count'],
-            'attendance_list': report['attendance_list']
-        })
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('daily', date_str, department, page, limit),
+                validators,
+                build,
+                report_date,
+                report_date,
+                department=department
+            )
+        )
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -35,11 +108,28 @@ def monthly_report():
         year = int(request.args.get('year', datetime.now().year))
         month = int(request.args.get('month', datetime.now().month))
         employee_id = request.args.get('employee_id')
+        columnar = report_format() == 'columnar'
+        compress = accepts_gzip()
         
-        report = report_service.generate_monthly_report(year, month, employee_id)
+        start_date, end_date = get_month_range(year, month)
+        validators = report_validators(start_date, end_date, employee_id=employee_id) + [(compress,)]
         
-        return jsonify(report)
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('monthly', year, month, employee_id, columnar),
+                validators,
+                lambda: report_service.generate_monthly_report(year, month, employee_id, columnar),
+                start_date,
+                end_date,
+                employee_id=employee_id,
+                compress=compress
+            ),
+            vary='Accept-Encoding'
+        )
         
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -50,9 +140,79 @@ def employee_summary(employee_id):
         year = int(request.args.get('year', datetime.now().year))
         month = int(request.args.get('month', datetime.now().month))
         
-        summary = report_service.generate_employee_summary(employee_id, year, month)
+        start_date, end_date = get_month_range(year, month)
+        validators = report_validators(start_date, end_date, employee_id=employee_id)
         
-        return jsonify(summary)
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('employee-summary', employee_id, year, month),
+                validators,
+                lambda: report_service.generate_employee_summary(employee_id, year, month),
+                start_date,
+                end_date,
+                employee_id=employee_id
+            )
+        )
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@reports_bp.route('/summary', methods=['GET'])
+@jwt_required()
+def department_summary():
+    try:
+        year = int(request.args.get('year', datetime.now().year))
+        month = int(request.args.get('month', datetime.now().month))
+        department = request.args.get('department')
+        
+        start_date, end_date = get_month_range(year, month)
+        validators = report_validators(start_date, end_date, department=department)
+        
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('summary', year, month, department),
+                validators,
+                lambda: report_service.generate_department_summary(year, month, department),
+                start_date,
+                end_date,
+                department=department
+            )
+        )
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@reports_bp.route('/analytics', methods=['GET'])
+@jwt_required()
+def range_analytics():
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        department = request.args.get('department')
+        include_employees = request.args.get('include_employees', 'true').lower() == 'true'
+        
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        if not end_date:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        
+        range_start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        range_end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        validators = report_validators(range_start, range_end, department=department)
+        
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('analytics', start_date, end_date, department, include_employees),
+                validators,
+                lambda: report_service.generate_range_analytics(start_date, end_date, department, include_employees),
+                range_start,
+                range_end,
+                department=department
+            )
+        )
         
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -86,6 +246,55 @@ def export_daily_report():
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@reports_bp.route('/export/monthly', methods=['GET'])
+@jwt_required()
+def export_monthly_report():
+    try:
+        year = int(request.args.get('year', datetime.now().year))
+        month = int(request.args.get('month', datetime.now().month))
+        department = request.args.get('department')
+        
+        excel_data = report_service.export_monthly_report_excel(year, month, department)
+        return send_file(
+            io.BytesIO(excel_data),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=f'attendance_report_{year}-{month:02d}.xlsx'
+        )
+        
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@reports_bp.route('/export/range', methods=['GET'])
+@jwt_required()
+def export_range_report():
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    department = request.args.get('department')
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    
+    if not start_date or not end_date:
+        return jsonify({'message': 'start_date and end_date are required'}), 400
+    
+    try:
+        if datetime.strptime(start_date, '%Y-%m-%d') > datetime.strptime(end_date, '%Y-%m-%d'):
+            return jsonify({'message': 'start_date must not be after end_date'}), 400
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    chunks = report_service.stream_range_report_csv(start_date, end_date, department)
+    filename = f'attendance_report_{start_date}_{end_date}.csv'
+    
+    if compress:
+        chunks = gzip_stream(chunks)
+        filename += '.gz'
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/gzip' if compress else 'text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 @reports_bp.route('/statistics', methods=['GET'])
 @jwt_required()
 def attendance_statistics():
@@ -99,9 +308,78 @@ def attendance_statistics():
         if not end_date:
             end_date = datetime.now().strftime('%Y-%m-%d')
         
-        statistics = report_service.get_attendance_statistics(start_date, end_date, department)
+        columnar = report_format() == 'columnar'
+        compress = accepts_gzip()
+        range_start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        range_end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        
+        # Statistics only read the rollup, so its buckets are the whole scope
+        validators = [freshness_service.rollup(range_start, range_end, department), (compress,)]
+        
+        return conditional_response(
+            validators,
+            lambda: cached_report(
+                ('statistics', start_date, end_date, department, columnar),
+                validators,
+                lambda: report_service.get_attendance_statistics(start_date, end_date, department, columnar),
+                range_start,
+                range_end,
+                department=department,
+                compress=compress
+            ),
+            vary='Accept-Encoding'
+        )
         
-        return jsonify(statistics)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@reports_bp.route('/cache', methods=['GET'])
+@jwt_required()
+def report_cache_stats():
+    return jsonify(get_report_cache().stats())
+
+@reports_bp.route('/jobs', methods=['POST'])
+@jwt_required()
+def create_report_job():
+    data = request.get_json()
+    
+    errors = validate_report_job(data)
+    if errors:
+        return jsonify({'errors': errors}), 400
+    
+    try:
+        job = get_report_jobs().submit(data['type'], data.get('params') or {})
+        return jsonify(job.to_dict()), 202
         
     except Exception as e:
-        return jsonify({'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'message': str(e)}), 500
+
+@reports_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job(job_id):
+    job = get_report_jobs().get(job_id)
+    
+    if not job:
+        return jsonify({'message': 'Job not found or expired'}), 404
+    
+    return jsonify(job.to_dict())
+
+@reports_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_report_job(job_id):
+    job = get_report_jobs().get(job_id)
+    
+    if not job:
+        return jsonify({'message': 'Job not found or expired'}), 404
+    
+    if job.status != 'completed':
+        return jsonify({'message': f'Job is {job.status}', 'job': job.to_dict()}), 409
+    
+    return send_file(
+        job.path,
+        mimetype=job.mimetype,
+        as_attachment=True,
+        download_name=job.filename
+    )
\ No newline at end of file
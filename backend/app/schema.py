@@ -0,0 +1,50 @@
+import os
+from sqlalchemy import inspect
+from .extensions import db
+
+# Revision matching the tables create_all built before migrations existed
+BASELINE_REVISION = '1e4090708a31'
+
+def prepare_schema(app):
+    # 'create' builds missing tables (development and tests); 'check' only
+    # verifies the database is at the migration head, so a production worker
+    # never issues DDL and refuses to start against an unmigrated database.
+    # `flask db` commands need SCHEMA_MODE=skip under a 'check' config
+    mode = app.config['SCHEMA_MODE']
+    with app.app_context():
+        if mode == 'create':
+            db.create_all()
+        elif mode == 'check':
+            check_schema(app)
+        elif mode != 'skip':
+            raise ValueError(f'Unknown SCHEMA_MODE {mode!r}; use create, check or skip')
+
+def schema_revisions(app):
+    # Alembic is only needed here, so it is imported on demand
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    
+    directory = app.extensions['migrate'].directory
+    if not os.path.isdir(directory):
+        raise RuntimeError(f'No migrations directory at {directory}; run flask db init and flask db migrate')
+    
+    config = app.extensions['migrate'].migrate.get_config(directory)
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    return current, heads
+
+def check_schema(app):
+    current, heads = schema_revisions(app)
+    if not heads:
+        raise RuntimeError('The migrations directory has no revisions; run flask db migrate')
+    if not current and inspect(db.engine).has_table('employee'):
+        raise RuntimeError(
+            'Database was created without migrations; run '
+            f'SCHEMA_MODE=skip flask db stamp {BASELINE_REVISION} and then SCHEMA_MODE=skip flask db upgrade'
+        )
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"expected {', '.join(sorted(heads))}; run SCHEMA_MODE=skip flask db upgrade"
+        )
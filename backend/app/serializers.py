@@ -0,0 +1,76 @@
+from .models import Employee, Attendance
+
+# Formatters matching the strftime patterns used by the models' to_dict()
+def format_date(value):
+    return value.isoformat() if value is not None else None
+
+def format_datetime(value):
+    return value.isoformat(' ', 'seconds') if value is not None else None
+
+def format_clock(value):
+    return value.isoformat(' ', 'seconds')[11:] if value is not None else None
+
+class RowSerializer:
+    # Selects only the listed columns and turns each result tuple into the
+    # same dict shape as to_dict(), without building ORM entities
+    def __init__(self, fields):
+        self.fields = fields
+        self.keys = [key for key, _, _ in fields]
+        self.columns = [column for _, column, _ in fields]
+        self._serialize_row = self._compile(fields)
+    
+    def select(self, query):
+        return query.with_entities(*self.columns)
+    
+    def dump(self, rows):
+        serialize_row = self._serialize_row
+        return [serialize_row(row) for row in rows]
+    
+    def all(self, query):
+        return self.dump(self.select(query))
+    
+    def rebind(self, source):
+        # Same shape read from another table or subquery with the same column names
+        return RowSerializer([(key, source.c[column.key], formatter) for key, column, formatter in self.fields])
+    
+    @staticmethod
+    def _compile(fields):
+        # (key, index, formatter) resolved once per shape; each row is then
+        # a single dict comprehension
+        layout = [(key, index, formatter) for index, (key, _, formatter) in enumerate(fields)]
+        
+        def serialize_row(row):
+            return {
+                key: row[index] if formatter is None else formatter(row[index])
+                for key, index, formatter in layout
+            }
+        
+        return serialize_row
+
+ATTENDANCE_SERIALIZER = RowSerializer([
+    ('id', Attendance.id, None),
+    ('employee_id', Attendance.employee_id, None),
+    ('date', Attendance.date, format_date),
+    ('check_in', Attendance.check_in, format_clock),
+    ('check_out', Attendance.check_out, format_clock),
+    ('status', Attendance.status, None),
+    ('late_minutes', Attendance.late_minutes, None),
+    ('overtime_minutes', Attendance.overtime_minutes, None),
+    ('notes', Attendance.notes, None),
+    ('created_at', Attendance.created_at, format_datetime),
+    ('updated_at', Attendance.updated_at, format_datetime)
+])
+
+EMPLOYEE_SERIALIZER = RowSerializer([
+    ('id', Employee.id, None),
+    ('employee_id', Employee.employee_id, None),
+    ('name', Employee.name, None),
+    ('department', Employee.department, None),
+    ('position', Employee.position, None),
+    ('email', Employee.email, None),
+    ('phone', Employee.phone, None),
+    ('hire_date', Employee.hire_date, format_date),
+    ('is_active', Employee.is_active, None),
+    ('created_at', Employee.created_at, format_datetime),
+    ('updated_at', Employee.updated_at, format_datetime)
+])
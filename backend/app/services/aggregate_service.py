@@ -0,0 +1,128 @@
+from datetime import datetime
+from sqlalchemy import func
+from ..models import Employee, Attendance, AttendanceDailyAggregate, db
+from ..archive import archive_cutoff
+from ..utils.upsert import upsert
+
+class AggregateService:
+    def record_change(self, date, department, old_status=None, new_status=None, is_new=False):
+        self.record_changes([(date, department, old_status, new_status, is_new)])
+    
+    def record_changes(self, changes):
+        # Net the deltas per bucket first, so a batch costs one statement per bucket
+        deltas = {}
+        for date, department, old_status, new_status, is_new in changes:
+            # Existing rows always occupy a bucket, even with a NULL status
+            if not is_new and old_status == new_status:
+                continue
+            
+            if not is_new:
+                key = (date, department or '', old_status or '')
+                deltas[key] = deltas.get(key, 0) - 1
+            
+            key = (date, department or '', new_status or '')
+            deltas[key] = deltas.get(key, 0) + 1
+        
+        for (date, department, status), delta in deltas.items():
+            if delta:
+                self._adjust(date, department, status, delta)
+    
+    def move_department(self, employee_id, old_department, new_department):
+        if (old_department or '') == (new_department or ''):
+            return
+        
+        for row in self._employee_buckets(employee_id):
+            self._adjust(row.date, old_department, row.status, -row.count)
+            self._adjust(row.date, new_department, row.status, row.count)
+    
+    def remove_employee(self, employee_id, department):
+        for row in self._employee_buckets(employee_id):
+            self._adjust(row.date, department, row.status, -row.count)
+    
+    def rebuild(self, start_date=None, end_date=None):
+        # Archived years have no hot rows left; keep their buckets as they are
+        cutoff = archive_cutoff()
+        if cutoff and (start_date is None or start_date < cutoff):
+            if end_date and end_date < cutoff:
+                return 0
+            start_date = cutoff
+        
+        delete_query = AttendanceDailyAggregate.query
+        source_query = db.session.query(
+            Attendance.date,
+            Employee.department,
+            Attendance.status,
+            func.count(Attendance.id).label('count')
+        ).join(Employee, Employee.employee_id == Attendance.employee_id)
+        
+        if start_date:
+            delete_query = delete_query.filter(AttendanceDailyAggregate.date >= start_date)
+            source_query = source_query.filter(Attendance.date >= start_date)
+        
+        if end_date:
+            delete_query = delete_query.filter(AttendanceDailyAggregate.date <= end_date)
+            source_query = source_query.filter(Attendance.date <= end_date)
+        
+        delete_query.delete(synchronize_session=False)
+        
+        # Departments and statuses are normalised the same way as _adjust,
+        # so NULL and '' collapse into one bucket
+        buckets = {}
+        for row in source_query.group_by(Attendance.date, Employee.department, Attendance.status):
+            key = (row.date, row.department or '', row.status or '')
+            buckets[key] = buckets.get(key, 0) + row.count
+        
+        rebuilt_at = datetime.utcnow()
+        db.session.bulk_insert_mappings(AttendanceDailyAggregate, [
+            {'date': date, 'department': department, 'status': status, 'count': count, 'updated_at': rebuilt_at}
+            for (date, department, status), count in buckets.items()
+        ])
+        db.session.commit()
+        
+        return len(buckets)
+    
+    def get_daily_statistics(self, start_date, end_date, department=None):
+        query = db.session.query(
+            AttendanceDailyAggregate.date,
+            func.sum(AttendanceDailyAggregate.count).label('total'),
+            func.sum(AttendanceDailyAggregate.count * (AttendanceDailyAggregate.status == 'Present').cast(db.Integer)).label('present'),
+            func.sum(AttendanceDailyAggregate.count * (AttendanceDailyAggregate.status == 'Late').cast(db.Integer)).label('late'),
+            func.sum(AttendanceDailyAggregate.count * (AttendanceDailyAggregate.status == 'Absent').cast(db.Integer)).label('absent')
+        ).filter(
+            AttendanceDailyAggregate.date >= start_date,
+            AttendanceDailyAggregate.date <= end_date
+        )
+        
+        if department:
+            query = query.filter(AttendanceDailyAggregate.department == department)
+        
+        return query.group_by(
+            AttendanceDailyAggregate.date
+        ).having(
+            func.sum(AttendanceDailyAggregate.count) > 0
+        ).order_by(AttendanceDailyAggregate.date).all()
+    
+    def _employee_buckets(self, employee_id):
+        return db.session.query(
+            Attendance.date,
+            Attendance.status,
+            func.count(Attendance.id).label('count')
+        ).filter(
+            Attendance.employee_id == employee_id
+        ).group_by(Attendance.date, Attendance.status).all()
+    
+    def _adjust(self, date, department, status, delta):
+        department = department or ''
+        status = status or ''
+        
+        # Creates the bucket or adds to it in one step, so concurrent writers
+        # neither lose increments nor collide on unique_daily_aggregate
+        upsert(
+            AttendanceDailyAggregate,
+            {'date': date, 'department': department, 'status': status, 'count': delta, 'updated_at': datetime.utcnow()},
+            ['date', 'department', 'status'],
+            lambda excluded: {
+                'count': AttendanceDailyAggregate.count + excluded.count,
+                'updated_at': excluded.updated_at
+            }
+        )
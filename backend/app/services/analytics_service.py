@@ -0,0 +1,238 @@
+from datetime import timedelta
+import numpy as np
+from ..models import Employee, db
+from ..policy import get_policy
+from ..archive import attendance_query
+
+# int8 status codes used by the column arrays; anything else maps to OTHER
+STATUS_INDEX = {
+    'Present': 0,
+    'Late': 1,
+    'Half-day': 2,
+    'Absent': 3,
+    'Leave': 4
+}
+OTHER_STATUS = 5
+
+class AttendanceFrame:
+    def __init__(self, start_date, end_date, employee_ids, employee_names, employee_active,
+                 employee_department, department_names, employee, day, status, checked_in,
+                 late_minutes, overtime_minutes):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.days = (end_date - start_date).days + 1
+        
+        # Per-employee columns
+        self.employee_ids = employee_ids
+        self.employee_names = employee_names
+        self.employee_active = employee_active
+        self.employee_department = employee_department
+        self.department_names = department_names
+        
+        # Per-record columns
+        self.employee = employee
+        self.day = day
+        self.status = status
+        self.checked_in = checked_in
+        self.late_minutes = late_minutes
+        self.overtime_minutes = overtime_minutes
+    
+    @classmethod
+    def load(cls, start_date, end_date, department=None):
+        employee_query = db.session.query(
+            Employee.employee_id, Employee.name, Employee.department, Employee.is_active
+        )
+        record_query, source = attendance_query(start_date, end_date, lambda table: [
+            table.c.date >= start_date,
+            table.c.date <= end_date
+        ])
+        record_query = record_query.with_entities(
+            source.c.employee_id,
+            source.c.date,
+            source.c.check_in.isnot(None),
+            source.c.status,
+            source.c.late_minutes,
+            source.c.overtime_minutes
+        ).join(
+            # Manual rows for unknown IDs and archived rows of deleted
+            # employees have nobody to be counted against
+            Employee, Employee.employee_id == source.c.employee_id
+        )
+        
+        if department:
+            employee_query = employee_query.filter(Employee.department == department)
+            record_query = record_query.filter(Employee.department == department)
+        
+        employees = employee_query.order_by(Employee.name, Employee.employee_id).all()
+        employee_ids = [row[0] for row in employees]
+        employee_index = {employee_id: index for index, employee_id in enumerate(employee_ids)}
+        
+        department_names = sorted({row[2] or '' for row in employees})
+        department_index = {name: index for index, name in enumerate(department_names)}
+        
+        records = record_query.all()
+        count = len(records)
+        columns = list(zip(*records)) if records else [()] * 6
+        start_ordinal = start_date.toordinal()
+        
+        return cls(
+            start_date,
+            end_date,
+            employee_ids,
+            [row[1] for row in employees],
+            np.fromiter((bool(row[3]) for row in employees), dtype=bool, count=len(employees)),
+            np.fromiter((department_index[row[2] or ''] for row in employees), dtype=np.int32, count=len(employees)),
+            department_names,
+            np.fromiter(map(employee_index.__getitem__, columns[0]), dtype=np.int32, count=count),
+            np.fromiter((value.toordinal() - start_ordinal for value in columns[1]), dtype=np.int32, count=count),
+            np.fromiter((STATUS_INDEX.get(value, OTHER_STATUS) for value in columns[3]), dtype=np.int8, count=count),
+            np.fromiter(columns[2], dtype=bool, count=count),
+            np.fromiter((value or 0 for value in columns[4]), dtype=np.int16, count=count),
+            np.fromiter((value or 0 for value in columns[5]), dtype=np.int16, count=count)
+        )
+    
+    def work_day_mask(self, policy=None):
+        policy = policy or get_policy()
+        return np.fromiter(
+            (policy.is_working_day(self.start_date + timedelta(days=offset)) for offset in range(self.days)),
+            dtype=bool,
+            count=self.days
+        )
+    
+    def daily_statistics(self):
+        # Same counting rules as AggregateService.get_daily_statistics
+        total = np.bincount(self.day, minlength=self.days)
+        present = np.bincount(self.day[self.status == STATUS_INDEX['Present']], minlength=self.days)
+        late = np.bincount(self.day[self.status == STATUS_INDEX['Late']], minlength=self.days)
+        absent = np.bincount(self.day[self.status == STATUS_INDEX['Absent']], minlength=self.days)
+        return total, present, late, absent
+    
+    def employee_totals(self, work_days):
+        # Same counting rules as generate_employee_summary: working-day records with a check-in
+        employees = len(self.employee_ids)
+        counted = work_days[self.day] & self.checked_in
+        late = counted & (self.status == STATUS_INDEX['Late'])
+        
+        present_days = np.bincount(self.employee[counted], minlength=employees)
+        late_days = np.bincount(self.employee[late], minlength=employees)
+        late_minutes = np.bincount(self.employee[late], weights=self.late_minutes[late], minlength=employees)
+        overtime_minutes = np.bincount(self.employee[counted], weights=self.overtime_minutes[counted], minlength=employees)
+        
+        return present_days, late_days, late_minutes.astype(np.int64), overtime_minutes.astype(np.int64)
+
+def _rates(numerator, denominator):
+    rates = np.zeros(len(numerator), dtype=np.float64)
+    np.divide(numerator * 100.0, denominator, out=rates, where=denominator > 0)
+    return np.round(rates, 2)
+
+def summarize_frame(frame, include_employees=True):
+    work_days = frame.work_day_mask()
+    work_day_count = int(work_days.sum())
+    
+    total, present, late, absent = frame.daily_statistics()
+    recorded_days = np.flatnonzero(total)
+    daily_rates = _rates(present[recorded_days], total[recorded_days])
+    
+    daily_statistics = [
+        {
+            'date': (frame.start_date + timedelta(days=int(offset))).strftime('%Y-%m-%d'),
+            'total': day_total,
+            'present': day_present,
+            'late': day_late,
+            'absent': day_absent,
+            'attendance_rate': rate
+        }
+        for offset, day_total, day_present, day_late, day_absent, rate in zip(
+            recorded_days.tolist(),
+            total[recorded_days].tolist(),
+            present[recorded_days].tolist(),
+            late[recorded_days].tolist(),
+            absent[recorded_days].tolist(),
+            daily_rates.tolist()
+        )
+    ]
+    
+    total_records = int(total.sum())
+    total_present = int(present.sum())
+    
+    # Per-employee and per-department breakdowns cover active employees only
+    present_days, late_days, late_minutes, overtime_minutes = frame.employee_totals(work_days)
+    active = np.flatnonzero(frame.employee_active)
+    absent_days = work_day_count - present_days
+    
+    departments = len(frame.department_names)
+    department = frame.employee_department[active]
+    department_employees = np.bincount(department, minlength=departments)
+    department_present = np.bincount(department, weights=present_days[active], minlength=departments).astype(np.int64)
+    department_late = np.bincount(department, weights=late_days[active], minlength=departments).astype(np.int64)
+    department_late_minutes = np.bincount(department, weights=late_minutes[active], minlength=departments).astype(np.int64)
+    department_overtime = np.bincount(department, weights=overtime_minutes[active], minlength=departments).astype(np.int64)
+    department_expected = department_employees * work_day_count
+    department_rates = _rates(department_present, department_expected)
+    
+    result = {
+        'period': {
+            'start_date': frame.start_date.strftime('%Y-%m-%d'),
+            'end_date': frame.end_date.strftime('%Y-%m-%d')
+        },
+        'work_days': work_day_count,
+        'daily_statistics': daily_statistics,
+        'overall_statistics': {
+            'total_records': total_records,
+            'total_present': total_present,
+            'total_late': int(late.sum()),
+            'total_absent': total_records - total_present,
+            'attendance_rate': round(total_present / total_records * 100, 2) if total_records > 0 else 0
+        },
+        'departments': [
+            {
+                'department': name or None,
+                'employees': employees,
+                'present_days': days_present,
+                'late_days': days_late,
+                'absent_days': expected - days_present,
+                'attendance_rate': rate,
+                'total_late_minutes': minutes_late,
+                'total_overtime_minutes': minutes_overtime
+            }
+            for name, employees, days_present, days_late, expected, rate, minutes_late, minutes_overtime in zip(
+                frame.department_names,
+                department_employees.tolist(),
+                department_present.tolist(),
+                department_late.tolist(),
+                department_expected.tolist(),
+                department_rates.tolist(),
+                department_late_minutes.tolist(),
+                department_overtime.tolist()
+            )
+            if employees
+        ]
+    }
+    
+    if include_employees:
+        employee_rates = _rates(present_days[active], np.full(len(active), work_day_count))
+        result['employees'] = [
+            {
+                'employee_id': frame.employee_ids[index],
+                'name': frame.employee_names[index],
+                'department': frame.department_names[department_id] or None,
+                'present_days': days_present,
+                'late_days': days_late,
+                'absent_days': days_absent,
+                'attendance_rate': rate,
+                'total_late_minutes': minutes_late,
+                'total_overtime_minutes': minutes_overtime
+            }
+            for index, department_id, days_present, days_late, days_absent, rate, minutes_late, minutes_overtime in zip(
+                active.tolist(),
+                department.tolist(),
+                present_days[active].tolist(),
+                late_days[active].tolist(),
+                absent_days[active].tolist(),
+                employee_rates.tolist(),
+                late_minutes[active].tolist(),
+                overtime_minutes[active].tolist()
+            )
+        ]
+    
+    return result
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+from sqlalchemy import func
+from ..models import Attendance, ArchivedYear, db
+from ..archive import archive_table, archive_cutoff, invalidate_archive
+from ..report_cache import invalidate_reports
+
+class ArchiveService:
+    def get_archived_years(self):
+        return [row.to_dict() for row in ArchivedYear.query.order_by(ArchivedYear.year)]
+    
+    def archive_before(self, before_year):
+        # Only closed years can move: the current year still takes punches
+        if before_year > date.today().year:
+            raise ValueError(f'Only closed years can be archived; {before_year - 1} is still open')
+        
+        cutoff = date(before_year, 1, 1)
+        first_date = db.session.query(func.min(Attendance.date)).filter(Attendance.date < cutoff).scalar()
+        if first_date is None:
+            return []
+        
+        # Oldest first, so the archive stays contiguous if a later year fails
+        archived = []
+        for year in range(first_date.year, before_year):
+            archived.append({'year': year, 'row_count': self.archive_year(year)})
+        return archived
+    
+    def archive_year(self, year):
+        start_date = date(year, 1, 1)
+        end_date = date(year, 12, 31)
+        hot = Attendance.__table__
+        table = archive_table(year)
+        table.create(db.session.connection(), checkfirst=True)
+        
+        # Copy, record and delete in one transaction; readers switch to the
+        # archive table once they see the ArchivedYear row
+        in_year = (hot.c.date >= start_date) & (hot.c.date <= end_date)
+        db.session.execute(table.insert().from_select(
+            [column.name for column in hot.columns],
+            hot.select().where(in_year)
+        ))
+        row_count = db.session.execute(hot.delete().where(in_year)).rowcount
+        
+        archived_year = db.session.get(ArchivedYear, year)
+        if archived_year is None:
+            archived_year = ArchivedYear(year=year, row_count=0)
+            db.session.add(archived_year)
+        archived_year.row_count += row_count
+        db.session.commit()
+        
+        # The daily rollup rows stay, so statistics over closed years still work
+        invalidate_archive()
+        invalidate_reports({start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)})
+        
+        return row_count
+    
+    def check_writable(self, attendance_date):
+        cutoff = archive_cutoff()
+        if cutoff and attendance_date < cutoff:
+            raise ValueError(f'Attendance for {attendance_date.year} is archived and can no longer be changed')
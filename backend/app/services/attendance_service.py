@@ -1,40 +1,78 @@
 from datetime import datetime, date, time
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import SQLAlchemyError
 from ..models import Employee, Attendance, db
 from ..utils.date_utils import is_weekend, get_working_hours
+from ..utils.helpers import chunked, encode_cursor, decode_cursor
+from ..utils.upsert import upsert
+from ..utils.validators import validate_punch_event
+from ..roster import get_roster
+from ..report_cache import invalidate_reports
+from ..archive import archive_cutoff, attendance_query, attendance_serializer
+from .aggregate_service import AggregateService
+from .archive_service import ArchiveService
+
+# Keeps IN (...) lists well below the bound-parameter limits of SQLite
+LOOKUP_CHUNK_SIZE = 500
+
+# Reported for every accepted punch when the batch transaction fails
+BATCH_RETRY_MESSAGE = 'Batch could not be saved, please retry'
 
 class AttendanceService:
+    def __init__(self):
+        self.aggregate_service = AggregateService()
+        self.archive_service = ArchiveService()
+    
     def check_in(self, employee_id, notes=None):
         today = date.today()
         
         # Check if employee exists and is active
-        employee = Employee.query.filter_by(employee_id=employee_id, is_active=True).first()
-        if not employee:
+        employee = get_roster().get(employee_id)
+        if not employee or not employee['is_active']:
             return {'success': False, 'message': 'Employee not found or inactive'}
         
-        # Check if already checked in today
-        existing = Attendance.query.filter_by(
-            employee_id=employee_id,
-            date=today
-        ).first()
-        
-        if existing and existing.check_in:
+        check_in = datetime.now()
+        
+        # Status depends only on the check-in time, so it can be computed up front
+        draft = Attendance(employee_id=employee_id, date=today, check_in=check_in, notes=notes)
+        draft.calculate_status()
+        
+        # One statement inserts the day or fills in a row that has no check-in
+        # yet; a duplicate punch matches the conflict but not the WHERE
+        created_at = datetime.utcnow()
+        attendance, inserted, replaced = upsert(
+            Attendance,
+            {
+                'employee_id': employee_id,
+                'date': today,
+                'check_in': check_in,
+                'status': draft.status,
+                'late_minutes': draft.late_minutes or 0,
+                'overtime_minutes': 0,
+                'notes': notes,
+                'created_at': created_at,
+                'updated_at': created_at
+            },
+            ['employee_id', 'date'],
+            lambda excluded: {
+                'check_in': excluded.check_in,
+                'status': excluded.status,
+                'late_minutes': excluded.late_minutes,
+                'notes': excluded.notes,
+                'updated_at': excluded.updated_at
+            },
+            where=Attendance.check_in.is_(None),
+            previous=['status']
+        )
+        
+        if attendance is None:
+            db.session.rollback()
             return {'success': False, 'message': 'Already checked in today'}
         
-        # Create or update attendance record
-        if existing:
-            attendance = existing
-        else:
-            attendance = Attendance(employee_id=employee_id, date=today)
-        
-        attendance.check_in = datetime.now()
-        attendance.notes = notes
-        attendance.calculate_status()
-        
-        if not existing:
-            db.session.add(attendance)
+        self._record_upsert(attendance, employee['department'], inserted, replaced)
         
         db.session.commit()
+        invalidate_reports({today}, {employee['department']}, {employee_id})
         
         return {
             'success': True,
@@ -56,6 +94,7 @@ class AttendanceService:
         if attendance.check_out:
             return {'success': False, 'message': 'Already checked out today'}
         
+        old_status = attendance.status
         attendance.check_out = datetime.now()
         if notes:
             attendance.notes = notes if not attendance.notes else f"{attendance.notes}; {notes}"
@@ -63,7 +102,11 @@ class AttendanceService:
         # Recalculate status with check-out time
         attendance.calculate_status()
         
+        department = self._get_department(employee_id)
+        self.aggregate_service.record_change(today, department, old_status, attendance.status)
+        
         db.session.commit()
+        invalidate_reports({today}, {department}, {employee_id})
         
         return {
             'success': True,
@@ -71,6 +114,140 @@ class AttendanceService:
             'attendance': attendance
         }
     
+    def batch_punch(self, events, raise_on_error=False):
+        results = [None] * len(events)
+        
+        # Validate every event up front so bad rows never reach the database
+        cutoff = archive_cutoff()
+        punches = []
+        for index, event in enumerate(events):
+            errors = validate_punch_event(event)
+            if not errors and cutoff and event.get('timestamp') and event['timestamp'][:10] < cutoff.isoformat():
+                errors = [f"Attendance for {event['timestamp'][:4]} is archived and can no longer be changed"]
+            if errors:
+                results[index] = {
+                    'index': index,
+                    'employee_id': event.get('employee_id') if isinstance(event, dict) else None,
+                    'type': event.get('type') if isinstance(event, dict) else None,
+                    'success': False,
+                    'message': '; '.join(errors)
+                }
+                continue
+            
+            if event.get('timestamp'):
+                timestamp = datetime.strptime(event['timestamp'], '%Y-%m-%d %H:%M:%S')
+            else:
+                timestamp = datetime.now()
+            punches.append((index, event, timestamp))
+        
+        # Readers may deliver events out of order, so replay them chronologically
+        punches.sort(key=lambda punch: punch[2])
+        
+        employee_ids = {event['employee_id'] for _, event, _ in punches}
+        dates = {timestamp.date() for _, _, timestamp in punches}
+        
+        # Resolve employees and existing rows with one set-based query per chunk
+        active_employees = set()
+        departments = {}
+        existing = {}
+        old_statuses = {}
+        for ids in chunked(employee_ids, LOOKUP_CHUNK_SIZE):
+            for employee_id, department, is_active in db.session.query(
+                Employee.employee_id, Employee.department, Employee.is_active
+            ).filter(Employee.employee_id.in_(ids)):
+                departments[employee_id] = department
+                if is_active:
+                    active_employees.add(employee_id)
+            for record in Attendance.query.filter(
+                Attendance.employee_id.in_(ids),
+                Attendance.date.in_(dates)
+            ):
+                existing[(record.employee_id, record.date)] = record
+                old_statuses[(record.employee_id, record.date)] = record.status
+        
+        touched = {}
+        touched_by_index = {}
+        new_records = []
+        for index, event, timestamp in punches:
+            employee_id = event['employee_id']
+            key = (employee_id, timestamp.date())
+            attendance = existing.get(key)
+            notes = event.get('notes')
+            
+            if event['type'] == 'check_in':
+                if employee_id not in active_employees:
+                    message = 'Employee not found or inactive'
+                elif attendance and attendance.check_in:
+                    message = 'Already checked in today'
+                else:
+                    if not attendance:
+                        attendance = Attendance(employee_id=employee_id, date=timestamp.date())
+                        existing[key] = attendance
+                        new_records.append(attendance)
+                    attendance.check_in = timestamp
+                    attendance.notes = notes
+                    message = None
+            else:
+                if not attendance or not attendance.check_in:
+                    message = 'No check-in record found for today'
+                elif attendance.check_out:
+                    message = 'Already checked out today'
+                elif timestamp < attendance.check_in:
+                    message = 'Check-out time is before check-in time'
+                else:
+                    attendance.check_out = timestamp
+                    if notes:
+                        attendance.notes = notes if not attendance.notes else f"{attendance.notes}; {notes}"
+                    message = None
+            
+            results[index] = {
+                'index': index,
+                'employee_id': employee_id,
+                'type': event['type'],
+                'date': key[1].strftime('%Y-%m-%d'),
+                'success': message is None,
+                'message': message or ('Check-in successful' if event['type'] == 'check_in' else 'Check-out successful')
+            }
+            if message is None:
+                touched[key] = attendance
+                touched_by_index[index] = attendance
+        
+        for attendance in touched.values():
+            attendance.calculate_status()
+        
+        self.aggregate_service.record_changes([
+            (key[1], departments.get(key[0]), old_statuses.get(key), attendance.status, key not in old_statuses)
+            for key, attendance in touched.items()
+        ])
+        
+        # Capture statuses now, committing expires every touched instance
+        for index, attendance in touched_by_index.items():
+            results[index]['status'] = attendance.status
+        
+        # Write the whole batch in a single transaction
+        try:
+            db.session.add_all(new_records)
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            if raise_on_error:
+                raise
+            for result in results:
+                if result['success']:
+                    result['success'] = False
+                    result['message'] = BATCH_RETRY_MESSAGE
+                    result.pop('status', None)
+            return results
+        
+        if touched:
+            invalidate_reports(
+                {key[1] for key in touched},
+                {departments.get(key[0]) for key in touched},
+                {key[0] for key in touched}
+            )
+        
+        return results
+    
     def get_today_status(self, employee_id):
         today = date.today()
         
@@ -79,7 +256,7 @@ class AttendanceService:
             date=today
         ).first()
         
-        employee = Employee.query.filter_by(employee_id=employee_id).first()
+        employee = get_roster().get(employee_id)
         
         if not employee:
             return {
@@ -103,65 +280,131 @@ class AttendanceService:
         return {
             'has_checked_in': False,
             'has_checked_out': False,
-            'employee': employee.to_dict()
+            'employee': employee
         }
     
     def get_attendance_history(self, employee_id, start_date=None, end_date=None, page=1, per_page=30):
-        query = Attendance.query.filter_by(employee_id=employee_id)
-        
-        if start_date:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            query = query.filter(Attendance.date >= start_date)
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
         
-        if end_date:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            query = query.filter(Attendance.date <= end_date)
+        # Ranges before the archive cutoff are read from the archive tables
+        query, source = attendance_query(start_date, end_date, self._history_criteria(employee_id, start_date, end_date))
+        query = query.order_by(source.c.date.desc())
         
-        query = query.order_by(Attendance.date.desc())
+        # Rows come back as plain tuples and are serialized without ORM entities
+        serializer = attendance_serializer(source)
+        pagination = serializer.select(query).paginate(page=page, per_page=per_page, error_out=False)
         
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        return pagination.items, pagination.total
+        return serializer.dump(pagination.items), pagination.total
+    
+    def get_attendance_history_page(self, employee_id, start_date=None, end_date=None, cursor=None, limit=30, with_total=False):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        
+        query, source = attendance_query(start_date, end_date, self._history_criteria(employee_id, start_date, end_date))
+        
+        total = query.order_by(None).count() if with_total else None
+        
+        # Seek past the last row of the previous page instead of using OFFSET;
+        # archived rows keep their ids, so (date, id) stays a total order
+        if cursor:
+            last_date, last_id = decode_cursor(cursor, (str, int))
+            try:
+                last_date = datetime.strptime(last_date, '%Y-%m-%d').date()
+            except ValueError as e:
+                raise ValueError('Invalid cursor') from e
+            query = query.filter(or_(
+                source.c.date < last_date,
+                and_(source.c.date == last_date, source.c.id < last_id)
+            ))
+        
+        # One extra row tells us whether another page exists
+        items = attendance_serializer(source).all(query.order_by(source.c.date.desc(), source.c.id.desc()).limit(limit + 1))
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([items[-1]['date'], items[-1]['id']])
+        
+        return items, next_cursor, total
+    
+    @staticmethod
+    def _history_criteria(employee_id, start_date, end_date):
+        def criteria(table):
+            conditions = [table.c.employee_id == employee_id]
+            if start_date:
+                conditions.append(table.c.date >= start_date)
+            if end_date:
+                conditions.append(table.c.date <= end_date)
+            return conditions
+        return criteria
     
     def create_manual_attendance(self, data):
         employee_id = data['employee_id']
         date_str = data['date']
+        attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        self.archive_service.check_writable(attendance_date)
         
-        # Check if record already exists
-        existing = Attendance.query.filter_by(
+        draft = Attendance(
             employee_id=employee_id,
-            date=datetime.strptime(date_str, '%Y-%m-%d').date()
-        ).first()
-        
-        if existing:
-            attendance = existing
-        else:
-            attendance = Attendance(
-                employee_id=employee_id,
-                date=datetime.strptime(date_str, '%Y-%m-%d').date()
-            )
+            date=attendance_date,
+            status=data.get('status', 'Present'),
+            notes=data.get('notes')
+        )
         
         # Set check-in time if provided
         if data.get('check_in_time'):
             check_in_str = f"{date_str} {data['check_in_time']}"
-            attendance.check_in = datetime.strptime(check_in_str, '%Y-%m-%d %H:%M:%S')
+            draft.check_in = datetime.strptime(check_in_str, '%Y-%m-%d %H:%M:%S')
         
         # Set check-out time if provided
         if data.get('check_out_time'):
             check_out_str = f"{date_str} {data['check_out_time']}"
-            attendance.check_out = datetime.strptime(check_out_str, '%Y-%m-%d %H:%M:%S')
-        
-        attendance.status = data.get('status', 'Present')
-        attendance.notes = data.get('notes')
+            draft.check_out = datetime.strptime(check_out_str, '%Y-%m-%d %H:%M:%S')
         
         # Calculate if times are provided
-        if attendance.check_in:
+        if draft.check_in:
+            draft.calculate_status()
+        
+        # Times that were not provided keep their stored values
+        created_at = datetime.utcnow()
+        attendance, inserted, replaced = upsert(
+            Attendance,
+            {
+                'employee_id': employee_id,
+                'date': attendance_date,
+                'check_in': draft.check_in,
+                'check_out': draft.check_out,
+                'status': draft.status,
+                'late_minutes': draft.late_minutes or 0,
+                'overtime_minutes': draft.overtime_minutes or 0,
+                'notes': draft.notes,
+                'created_at': created_at,
+                'updated_at': created_at
+            },
+            ['employee_id', 'date'],
+            lambda excluded: {
+                'check_in': func.coalesce(excluded.check_in, Attendance.check_in),
+                'check_out': func.coalesce(excluded.check_out, Attendance.check_out),
+                'status': excluded.status,
+                'late_minutes': excluded.late_minutes,
+                'overtime_minutes': excluded.overtime_minutes,
+                'notes': excluded.notes,
+                'updated_at': excluded.updated_at
+            },
+            previous=['status']
+        )
+        
+        # A stored time the request did not set changes the outcome, so
+        # derive the status from the merged row (an UPDATE at commit)
+        if attendance.check_in and (attendance.check_in, attendance.check_out) != (draft.check_in, draft.check_out):
             attendance.calculate_status()
         
-        if not existing:
-            db.session.add(attendance)
+        department = self._get_department(employee_id)
+        self._record_upsert(attendance, department, inserted, replaced)
         
         db.session.commit()
+        invalidate_reports({attendance_date}, {department}, {employee_id})
         
         return attendance
     
@@ -171,6 +414,8 @@ class AttendanceService:
         if not attendance:
             return None
         
+        old_status = attendance.status
+        
         # Update fields
         if 'check_in_time' in data:
             check_in_str = f"{attendance.date.strftime('%Y-%m-%d')} {data['check_in_time']}"
@@ -190,7 +435,27 @@ class AttendanceService:
         if 'check_in_time' in data or 'check_out_time' in data:
             attendance.calculate_status()
         
+        employee_id = attendance.employee_id
+        department = self._get_department(employee_id)
+        attendance_date = attendance.date
+        self.aggregate_service.record_change(attendance_date, department, old_status, attendance.status)
+        
         attendance.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_reports({attendance_date}, {department}, {employee_id})
         
-        return attendance
\ No newline at end of file
+        return attendance
+    
+    def _record_upsert(self, attendance, department, inserted, replaced):
+        # The row moves out of the bucket of the status the upsert replaced
+        self.aggregate_service.record_change(
+            attendance.date,
+            department,
+            old_status=None if inserted else replaced.status,
+            new_status=attendance.status,
+            is_new=inserted
+        )
+    
+    def _get_department(self, employee_id):
+        employee = get_roster().get(employee_id)
+        return employee['department'] if employee else None
\ No newline at end of file
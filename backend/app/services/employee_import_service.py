@@ -0,0 +1,153 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from ..models import Employee, db
+from ..employee_search import invalidate_employee_search
+from ..report_cache import invalidate_reports
+from ..utils.table_reader import read_table, cell_text
+from ..utils.validators import validate_employee_data
+
+IMPORT_FIELDS = ('employee_id', 'name', 'department', 'position', 'email', 'phone', 'hire_date')
+
+REQUIRED_IMPORT_FIELDS = ('employee_id', 'name')
+
+# Rows per bulk insert and commit
+IMPORT_CHUNK_SIZE = 1000
+
+def employee_mapping(data, imported_at):
+    return {
+        'employee_id': data['employee_id'],
+        'name': data['name'],
+        'department': data.get('department'),
+        'position': data.get('position'),
+        'email': data.get('email'),
+        'phone': data.get('phone'),
+        'hire_date': datetime.strptime(data['hire_date'], '%Y-%m-%d').date() if data.get('hire_date') else None,
+        'is_active': True,
+        'created_at': imported_at,
+        'updated_at': imported_at
+    }
+
+class EmployeeImportService:
+    def read_rows(self, stream, filename):
+        # Fails before any row is imported when the file or header is unusable
+        header, rows = read_table(stream, filename)
+        
+        missing = [field for field in REQUIRED_IMPORT_FIELDS if field not in header]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        
+        columns = [(index, name) for index, name in enumerate(header) if name in IMPORT_FIELDS]
+        return (
+            (number, {name: cell_text(row[index]) if index < len(row) else None for index, name in columns})
+            for number, row in enumerate(rows, start=2)
+        )
+    
+    def import_employees(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        # Yields one entry per rejected row as it is found, then a summary.
+        # Whatever stops the import, an error entry and the summary still
+        # close the stream, and chunks already committed stay imported
+        summary = {'rows': 0, 'imported': 0, 'failed': 0}
+        departments = set()
+        
+        try:
+            yield from self._import_rows(iter(rows), chunk_size, summary, departments)
+        except Exception as e:
+            db.session.rollback()
+            summary['error'] = f'Import stopped: {e}'
+        finally:
+            # New employees show up as absent in their departments' reports
+            if summary['imported']:
+                invalidate_employee_search()
+                invalidate_reports(None, departments)
+        
+        if 'error' in summary:
+            yield {'error': summary['error']}
+        yield {'summary': summary}
+    
+    def _import_rows(self, rows, chunk_size, summary, departments):
+        # One pass loads every existing key; each row is then a set lookup
+        existing_ids = set()
+        existing_emails = set()
+        for employee_id, email in db.session.query(Employee.employee_id, Employee.email):
+            existing_ids.add(employee_id)
+            if email:
+                existing_emails.add(email)
+        
+        file_ids = {}
+        file_emails = {}
+        pending = []
+        
+        while True:
+            try:
+                number, data = next(rows)
+            except StopIteration:
+                break
+            except Exception as e:
+                # A malformed file stops the import; rows read so far still count
+                summary['error'] = f'Could not read the uploaded file: {e}'
+                break
+            
+            if not any(data.values()):
+                continue
+            summary['rows'] += 1
+            
+            employee_id = data.get('employee_id')
+            email = data.get('email')
+            errors = validate_employee_data(data)
+            
+            if employee_id in file_ids:
+                errors.append(f'Duplicate employee ID, first used on row {file_ids[employee_id]}')
+            elif employee_id in existing_ids:
+                errors.append('Employee ID already exists')
+            
+            if email in file_emails:
+                errors.append(f'Duplicate email, first used on row {file_emails[email]}')
+            elif email in existing_emails:
+                errors.append('Email already exists')
+            
+            if errors:
+                summary['failed'] += 1
+                yield {'row': number, 'employee_id': employee_id, 'errors': errors}
+                continue
+            
+            file_ids[employee_id] = number
+            if email:
+                file_emails[email] = number
+            
+            pending.append((number, data))
+            if len(pending) >= chunk_size:
+                yield from self._insert_chunk(pending, summary, departments)
+                pending = []
+        
+        if pending:
+            yield from self._insert_chunk(pending, summary, departments)
+    
+    def _insert_chunk(self, pending, summary, departments):
+        imported_at = datetime.utcnow()
+        try:
+            db.session.bulk_insert_mappings(Employee, [employee_mapping(data, imported_at) for _, data in pending])
+            db.session.commit()
+        except SQLAlchemyError:
+            # Another writer took one of these keys since the lookup; save the
+            # chunk row by row so only the clashing rows are rejected
+            db.session.rollback()
+            for number, data in pending:
+                yield from self._insert_row(number, data, imported_at, summary, departments)
+            return
+        
+        summary['imported'] += len(pending)
+        departments.update(data.get('department') for _, data in pending)
+    
+    def _insert_row(self, number, data, imported_at, summary, departments):
+        try:
+            db.session.bulk_insert_mappings(Employee, [employee_mapping(data, imported_at)])
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            summary['failed'] += 1
+            message = 'Employee ID or email already exists' if isinstance(e, IntegrityError) else 'Row could not be saved, please retry'
+            yield {'row': number, 'employee_id': data['employee_id'], 'errors': [message]}
+            return
+        
+        summary['imported'] += 1
+        departments.add(data.get('department'))
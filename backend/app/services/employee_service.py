@@ -1,8 +1,17 @@
 from datetime import datetime
 from sqlalchemy import or_, and_
 from ..models import Employee, db
+from ..roster import invalidate_roster
+from ..employee_search import get_employee_search, index_employee, unindex_employee
+from ..report_cache import invalidate_reports
+from ..serializers import EMPLOYEE_SERIALIZER
+from ..utils.helpers import encode_cursor, decode_cursor
+from .aggregate_service import AggregateService
 
 class EmployeeService:
+    def __init__(self):
+        self.aggregate_service = AggregateService()
+    
     def get_employees(self, active_only=True, department=None, page=1, per_page=20):
         query = Employee.query
         
@@ -14,9 +23,38 @@ class EmployeeService:
         
         query = query.order_by(Employee.name.asc())
         
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        pagination = EMPLOYEE_SERIALIZER.select(query).paginate(page=page, per_page=per_page, error_out=False)
         
-        return pagination.items, pagination.total
+        return EMPLOYEE_SERIALIZER.dump(pagination.items), pagination.total
+    
+    def get_employees_page(self, active_only=True, department=None, cursor=None, limit=20, with_total=False):
+        query = Employee.query
+        
+        if active_only:
+            query = query.filter_by(is_active=True)
+        
+        if department:
+            query = query.filter_by(department=department)
+        
+        total = query.count() if with_total else None
+        
+        # Seek past the last (name, id) of the previous page instead of using OFFSET
+        if cursor:
+            last_name, last_id = decode_cursor(cursor, (str, int))
+            query = query.filter(or_(
+                Employee.name > last_name,
+                and_(Employee.name == last_name, Employee.id > last_id)
+            ))
+        
+        # One extra row tells us whether another page exists
+        items = EMPLOYEE_SERIALIZER.all(query.order_by(Employee.name.asc(), Employee.id.asc()).limit(limit + 1))
+        
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([items[-1]['name'], items[-1]['id']])
+        
+        return items, next_cursor, total
     
     def get_employee_by_id(self, employee_id):
         return Employee.query.filter_by(employee_id=employee_id).first()
@@ -34,6 +72,8 @@ class EmployeeService:
         
         db.session.add(employee)
         db.session.commit()
+        self._invalidate_caches(employee.employee_id, {employee.department})
+        index_employee(employee)
         
         return employee
     
@@ -43,10 +83,13 @@ class EmployeeService:
         if not employee:
             return None
         
+        departments = {employee.department}
+        
         # Update fields
         if 'name' in data:
             employee.name = data['name']
         if 'department' in data:
+            self.aggregate_service.move_department(employee.employee_id, employee.department, data['department'])
             employee.department = data['department']
         if 'position' in data:
             employee.position = data['position']
@@ -57,8 +100,11 @@ class EmployeeService:
         if 'is_active' in data:
             employee.is_active = data['is_active']
         
+        departments.add(employee.department)
         employee.updated_at = datetime.utcnow()
         db.session.commit()
+        self._invalidate_caches(employee_id, departments)
+        index_employee(employee)
         
         return employee
     
@@ -68,8 +114,15 @@ class EmployeeService:
         if not employee:
             return False
         
+        # Attendance rows are removed by the cascade, so drop their buckets too
+        department = employee.department
+        record_id = employee.id
+        self.aggregate_service.remove_employee(employee.employee_id, department)
+        
         db.session.delete(employee)
         db.session.commit()
+        self._invalidate_caches(employee_id, {department})
+        unindex_employee(record_id)
         
         return True
     
@@ -79,18 +132,20 @@ class EmployeeService:
         if not employee:
             return None
         
+        department = employee.department
         employee.is_active = is_active
         employee.updated_at = datetime.utcnow()
         db.session.commit()
+        self._invalidate_caches(employee_id, {department})
+        index_employee(employee)
         
         return employee
     
-    def search_employees(self, search_term):
-        return Employee.query.filter(
-            or_(
-                Employee.employee_id.ilike(f'%{search_term}%'),
-                Employee.name.ilike(f'%{search_term}%'),
-                Employee.email.ilike(f'%{search_term}%'),
-                Employee.department.ilike(f'%{search_term}%')
-            )
-        ).filter_by(is_active=True).all()
\ No newline at end of file
+    def search_employees(self, search_term, limit=20, offset=0, active_only=True):
+        # Served from the in-memory trigram index instead of ILIKE scans
+        return get_employee_search().search(search_term, limit=limit, offset=offset, active_only=active_only)
+    
+    def _invalidate_caches(self, employee_id, departments):
+        # Roster changes reach every date, but only these departments and this employee
+        invalidate_roster(employee_id)
+        invalidate_reports(None, departments, {employee_id})
\ No newline at end of file
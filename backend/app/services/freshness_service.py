@@ -0,0 +1,60 @@
+from sqlalchemy import func
+from ..models import Employee, AttendanceDailyAggregate, db
+from ..archive import attendance_query
+
+class FreshnessService:
+    # Each method returns (last_modified, row_count) for a query scope: cheap
+    # to compute, and any insert, update or delete in the scope changes it
+    
+    def attendance(self, start_date, end_date, employee_id=None, department=None):
+        # Covers archived years too, so archiving a range changes its validators
+        def criteria(table):
+            conditions = []
+            if start_date:
+                conditions.append(table.c.date >= start_date)
+            if end_date:
+                conditions.append(table.c.date <= end_date)
+            if employee_id:
+                conditions.append(table.c.employee_id == employee_id)
+            return conditions
+        
+        query, source = attendance_query(start_date, end_date, criteria)
+        query = query.with_entities(
+            func.max(source.c.updated_at),
+            func.count(source.c.id)
+        )
+        
+        if department:
+            query = query.join(
+                Employee, Employee.employee_id == source.c.employee_id
+            ).filter(Employee.department == department)
+        
+        return tuple(query.one())
+    
+    def employees(self, department=None, employee_id=None):
+        query = db.session.query(
+            func.max(Employee.updated_at),
+            func.count(Employee.id)
+        )
+        
+        if department:
+            query = query.filter(Employee.department == department)
+        
+        if employee_id:
+            query = query.filter(Employee.employee_id == employee_id)
+        
+        return tuple(query.one())
+    
+    def rollup(self, start_date, end_date, department=None):
+        query = db.session.query(
+            func.max(AttendanceDailyAggregate.updated_at),
+            func.coalesce(func.sum(AttendanceDailyAggregate.count), 0)
+        ).filter(
+            AttendanceDailyAggregate.date >= start_date,
+            AttendanceDailyAggregate.date <= end_date
+        )
+        
+        if department:
+            query = query.filter(AttendanceDailyAggregate.department == department)
+        
+        return tuple(query.one())
@@ -0,0 +1,364 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from .report_service import ReportService
+
+EXCEL_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+def _write_text(path, text):
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        output.write(text)
+
+def _write_bytes(path, data):
+    with open(path, 'wb') as output:
+        output.write(data)
+
+def _write_chunks(path, chunks):
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        for chunk in chunks:
+            output.write(chunk)
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as output:
+        json.dump(data, output)
+
+# type -> (runner, mimetype, file extension)
+JOB_TYPES = {
+    'daily_csv': (
+        lambda service, params, path: _write_text(path, service.export_daily_report_csv(params['date'])),
+        'text/csv', 'csv'
+    ),
+    'daily_excel': (
+        lambda service, params, path: _write_bytes(path, service.export_daily_report_excel(params['date'])),
+        EXCEL_MIMETYPE, 'xlsx'
+    ),
+    'monthly_excel': (
+        lambda service, params, path: service.export_monthly_report_excel(
+            int(params['year']), int(params['month']), params.get('department'), output=path
+        ),
+        EXCEL_MIMETYPE, 'xlsx'
+    ),
+    'range_csv': (
+        lambda service, params, path: _write_chunks(path, service.stream_range_report_csv(
+            params['start_date'], params['end_date'], params.get('department')
+        )),
+        'text/csv', 'csv'
+    ),
+    'monthly': (
+        lambda service, params, path: _write_json(path, service.generate_monthly_report(
+            int(params['year']), int(params['month']), params.get('employee_id')
+        )),
+        'application/json', 'json'
+    ),
+    'statistics': (
+        lambda service, params, path: _write_json(path, service.get_attendance_statistics(
+            params['start_date'], params['end_date'], params.get('department')
+        )),
+        'application/json', 'json'
+    )
+}
+
+class ReportJob:
+    def __init__(self, job_type, params, key):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.params = params
+        self.key = key
+        self.status = 'queued'
+        self.error = None
+        self.path = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.expires_at = None
+        self.pid = os.getpid()
+        self.owner = None
+        self.future = None
+    
+    @property
+    def mimetype(self):
+        return JOB_TYPES[self.type][1]
+    
+    @property
+    def extension(self):
+        return JOB_TYPES[self.type][2]
+    
+    @property
+    def filename(self):
+        suffix = '_'.join(str(value) for _, value in sorted(self.params.items()) if value)
+        return f'{self.type}_{suffix}.{self.extension}' if suffix else f'{self.type}.{self.extension}'
+    
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed')
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'type': self.type,
+            'params': self.params,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+    
+    def to_record(self):
+        return {
+            'id': self.id,
+            'type': self.type,
+            'params': self.params,
+            'key': self.key,
+            'status': self.status,
+            'error': self.error,
+            'path': self.path,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at,
+            'pid': self.pid,
+            'owner': self.owner
+        }
+    
+    @classmethod
+    def from_record(cls, record):
+        job = cls(record['type'], record['params'], record['key'])
+        job.id = record['id']
+        job.status = record['status']
+        job.error = record['error']
+        job.path = record['path']
+        job.created_at = datetime.fromisoformat(record['created_at'])
+        job.finished_at = datetime.fromisoformat(record['finished_at']) if record['finished_at'] else None
+        job.expires_at = record['expires_at']
+        job.pid = record['pid']
+        job.owner = record['owner']
+        return job
+
+# Queues created by this process; a job whose pid is ours but whose owner is
+# not among them was left behind by an earlier process that had the same pid
+_live_queues = set()
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class ReportJobQueue:
+    # Job state lives in the result directory, next to the results, so every
+    # worker process sharing the directory sees the same jobs: <id>.job holds
+    # the state, <key>.inflight points at the job producing that result, and
+    # <id>.<extension> is the result itself. Expiry uses wall-clock time
+    def __init__(self, app, result_dir, max_workers=2, ttl=3600):
+        self.app = app
+        self.result_dir = result_dir
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.token = uuid.uuid4().hex
+        _live_queues.add(self.token)
+    
+    def submit(self, job_type, params):
+        key = hashlib.sha256(json.dumps([job_type, params], sort_keys=True).encode()).hexdigest()
+        
+        with self._lock:
+            self._purge_expired()
+            
+            job = ReportJob(job_type, params, key)
+            job.owner = self.token
+            self._save(job)
+            
+            # Identical requests share the job that is already queued or
+            # running, in this process or another one
+            while not self._claim(job):
+                running = self._load(self._read_marker(key))
+                if running and self._is_live(running):
+                    self._remove(self._record_path(job.id))
+                    return self._jobs.get(running.id, running)
+                self._remove(self._marker_path(key))
+            
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job)
+            return job
+    
+    def get(self, job_id):
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id) or self._load(job_id)
+            if job and self._expired(job):
+                self._delete(job)
+                return None
+            return job
+    
+    def wait(self, job_id, timeout=None):
+        job = self.get(job_id)
+        if job and job.future:
+            job.future.result(timeout)
+            return job
+        
+        # Running in another process: poll its state file
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while job and not job.finished and self._is_live(job):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+            job = self.get(job_id)
+        return job
+    
+    def sweep(self):
+        # Clean up after processes that stopped: expired jobs and their
+        # results, jobs that never finished, and orphaned partial files
+        with self._lock:
+            known = {}
+            for name in os.listdir(self.result_dir):
+                if not name.endswith('.job'):
+                    continue
+                job = self._load(name[:-len('.job')])
+                if job is None:
+                    continue
+                if self._expired(job):
+                    self._delete(job)
+                    continue
+                known[job.id] = job
+                if not job.finished and not self._is_live(job):
+                    job.status = 'failed'
+                    job.error = 'Interrupted before it finished'
+                    self._finish(job)
+            
+            for name in os.listdir(self.result_dir):
+                path = os.path.join(self.result_dir, name)
+                if name.endswith('.inflight'):
+                    running = self._load(self._read_marker(name[:-len('.inflight')]))
+                    if not running or not self._is_live(running):
+                        self._remove(path)
+                elif not name.endswith('.job'):
+                    job = known.get(name.split('.')[0])
+                    if job is None:
+                        # A file without a job, unless another worker is creating it right now
+                        try:
+                            orphaned = time.time() - os.path.getmtime(path) > self.ttl
+                        except FileNotFoundError:
+                            continue
+                        if orphaned:
+                            self._remove(path)
+                    elif name.endswith('.part') and not self._is_live(job):
+                        self._remove(path)
+    
+    def _run(self, job):
+        job.status = 'running'
+        self._save(job)
+        path = os.path.join(self.result_dir, f'{job.id}.{job.extension}')
+        temp_path = path + '.part'
+        
+        try:
+            with self.app.app_context():
+                runner = JOB_TYPES[job.type][0]
+                runner(ReportService(), job.params, temp_path)
+            
+            # Readers only ever see a complete file
+            os.replace(temp_path, path)
+            job.path = path
+            job.status = 'completed'
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            self._remove(temp_path)
+        finally:
+            with self._lock:
+                self._finish(job)
+    
+    def _finish(self, job):
+        job.finished_at = datetime.utcnow()
+        job.expires_at = time.time() + self.ttl
+        self._save(job)
+        if self._read_marker(job.key) == job.id:
+            self._remove(self._marker_path(job.key))
+    
+    def _is_live(self, job):
+        if job.finished:
+            return False
+        if job.pid == os.getpid():
+            return job.owner in _live_queues
+        return _process_alive(job.pid)
+    
+    def _expired(self, job):
+        return job.expires_at is not None and job.expires_at < time.time()
+    
+    def _purge_expired(self):
+        for job_id, job in list(self._jobs.items()):
+            if self._expired(job):
+                self._delete(job)
+    
+    def _delete(self, job):
+        self._jobs.pop(job.id, None)
+        if job.path:
+            self._remove(job.path)
+        self._remove(self._record_path(job.id))
+    
+    def _claim(self, job):
+        try:
+            descriptor = os.open(self._marker_path(job.key), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(descriptor, 'w') as marker:
+            marker.write(job.id)
+        return True
+    
+    def _read_marker(self, key):
+        try:
+            with open(self._marker_path(key)) as marker:
+                return marker.read()
+        except FileNotFoundError:
+            return None
+    
+    def _save(self, job):
+        # Written aside and renamed, so other processes never read half a record
+        path = self._record_path(job.id)
+        _write_json(path + '.tmp', job.to_record())
+        os.replace(path + '.tmp', path)
+    
+    def _load(self, job_id):
+        if not job_id:
+            return None
+        try:
+            with open(self._record_path(job_id), encoding='utf-8') as record:
+                return ReportJob.from_record(json.load(record))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+    
+    def _record_path(self, job_id):
+        return os.path.join(self.result_dir, f'{job_id}.job')
+    
+    def _marker_path(self, key):
+        return os.path.join(self.result_dir, f'{key}.inflight')
+    
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def init_report_jobs(app):
+    result_dir = app.config.get('REPORT_JOB_DIR') or os.path.join(app.instance_path, 'report_jobs')
+    os.makedirs(result_dir, exist_ok=True)
+    
+    queue = ReportJobQueue(
+        app,
+        result_dir,
+        max_workers=app.config['REPORT_JOB_WORKERS'],
+        ttl=app.config['REPORT_JOB_TTL']
+    )
+    queue.sweep()
+    app.extensions['report_jobs'] = queue
+
+def get_report_jobs():
+    return current_app.extensions['report_jobs']
@@ -0,0 +1,82 @@
+from ..models import AttendanceSettings, Holiday, db
+from ..policy import POLICY_VERSION_KEY, get_policy, invalidate_policy
+from ..report_cache import invalidate_reports
+
+class PolicyService:
+    def get_policy(self):
+        return get_policy()
+    
+    def update_settings(self, data):
+        settings = {
+            setting.key: setting
+            for setting in AttendanceSettings.query.filter(
+                AttendanceSettings.key.in_(list(data))
+            )
+        }
+        
+        for key, value in data.items():
+            if isinstance(value, (list, tuple)):
+                value = ','.join(str(item) for item in value)
+            
+            if key in settings:
+                settings[key].value = str(value)
+            else:
+                db.session.add(AttendanceSettings(key=key, value=str(value)))
+        
+        self._bump_version()
+        db.session.commit()
+        invalidate_policy()
+        
+        # Thresholds and working days feed every report
+        invalidate_reports()
+        
+        return get_policy()
+    
+    def get_holidays(self, year=None):
+        query = Holiday.query
+        
+        if year:
+            query = query.filter(db.extract('year', Holiday.date) == year)
+        
+        return query.order_by(Holiday.date).all()
+    
+    def add_holiday(self, date, name):
+        holiday = Holiday.query.filter_by(date=date).first()
+        
+        if holiday:
+            holiday.name = name
+        else:
+            holiday = Holiday(date=date, name=name)
+            db.session.add(holiday)
+        
+        self._save_holiday_change(date)
+        return holiday
+    
+    def delete_holiday(self, date):
+        holiday = Holiday.query.filter_by(date=date).first()
+        
+        if not holiday:
+            return False
+        
+        db.session.delete(holiday)
+        self._save_holiday_change(date)
+        return True
+    
+    def _save_holiday_change(self, date):
+        # Holidays are part of the policy, so they share its version
+        self._bump_version()
+        db.session.commit()
+        invalidate_policy()
+        invalidate_reports({date})
+    
+    def _bump_version(self):
+        # Bumping the version tells every process to reload on its next check
+        version = AttendanceSettings.query.filter_by(key=POLICY_VERSION_KEY).first()
+        if version:
+            version.value = str(int(version.value) + 1)
+        else:
+            db.session.add(AttendanceSettings(
+                key=POLICY_VERSION_KEY,
+                value='1',
+                description='Incremented whenever an attendance policy setting or holiday changes'
+            ))
@@ -0,0 +1,390 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.exc import OperationalError
+from ..extensions import db
+from .attendance_service import AttendanceService
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development machines; the lock is advisory everywhere anyway
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = 'punches.log'
+CHECKPOINT_FILE = 'checkpoint.json'
+DEAD_LETTER_FILE = 'dead_letter.log'
+LOCK_FILE = 'journal.lock'
+
+# Truncate the journal once everything in it is applied and it is this large
+COMPACT_BYTES = 16 * 1024 * 1024
+
+# Each serving process owns one worker-<n> subdirectory of PUNCH_JOURNAL_DIR
+WORKER_DIR_PREFIX = 'worker-'
+
+class PunchJournal:
+    # Write-behind ingestion: punches are appended to a local journal and
+    # acknowledged once fsynced (in groups), then applied to the database
+    # in batches by a background thread. One process per journal directory,
+    # enforced with an exclusive lock on the directory's lock file; see
+    # init_punch_journal for how processes share PUNCH_JOURNAL_DIR.
+    def __init__(self, app, directory, fsync_interval=0.002, apply_interval=0.02, batch_size=1000):
+        self.app = app
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.apply_interval = apply_interval
+        self.batch_size = batch_size
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.checkpoint_path = os.path.join(directory, CHECKPOINT_FILE)
+        self.dead_letter_path = os.path.join(directory, DEAD_LETTER_FILE)
+        
+        # Taken before recovery, which may truncate the journal
+        self._lock_file = self._acquire_directory_lock()
+        
+        self._lock = threading.Lock()
+        self._durable = threading.Condition()
+        self._applied = threading.Condition()
+        self._wake_applier = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        
+        self.applied_seq, self._read_offset = self._load_checkpoint()
+        last_seq, end_offset = self._recover()
+        self._next_seq = max(last_seq, self.applied_seq) + 1
+        self.durable_seq = self._next_seq - 1
+        if self._read_offset > end_offset:
+            # The journal was compacted after the checkpoint was written
+            self._read_offset = 0
+        
+        self._file = open(self.journal_path, 'ab')
+        self.stats = {'applied': 0, 'rejected': 0, 'dead_lettered': 0, 'retries': 0, 'last_error': None}
+    
+    def start(self, apply=True):
+        self._threads.append(threading.Thread(target=self._flush_loop, name='punch-journal-fsync', daemon=True))
+        if apply:
+            self._threads.append(threading.Thread(target=self._apply_loop, name='punch-journal-apply', daemon=True))
+        for thread in self._threads:
+            thread.start()
+    
+    def close(self):
+        self._stopping.set()
+        self._wake_applier.set()
+        for thread in self._threads:
+            thread.join()
+        self._file.close()
+        self._lock_file.close()
+    
+    def append(self, events):
+        # Stamp receipt time now: the punch happened now, not when it is applied
+        received_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        with self._lock:
+            first_seq = self._next_seq
+            for event in events:
+                entry = dict(event, timestamp=event.get('timestamp') or received_at)
+                self._file.write(json.dumps({'seq': self._next_seq, 'event': entry}, separators=(',', ':')).encode() + b'\n')
+                self._next_seq += 1
+            last_seq = self._next_seq - 1
+        
+        # Acknowledge only once the group fsync has covered these entries
+        with self._durable:
+            while self.durable_seq < last_seq:
+                self._durable.wait()
+        
+        return first_seq, last_seq
+    
+    def wait_applied(self, seq, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._applied:
+            while self.applied_seq < seq:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._applied.wait(remaining)
+        return True
+    
+    def status(self):
+        return {
+            'appended_seq': self._next_seq - 1,
+            'durable_seq': self.durable_seq,
+            'applied_seq': self.applied_seq,
+            'backlog': self.durable_seq - self.applied_seq,
+            **self.stats
+        }
+    
+    def _flush_loop(self):
+        while not self._stopping.is_set():
+            time.sleep(self.fsync_interval)
+            self._sync()
+        self._sync()
+    
+    def _sync(self):
+        with self._lock:
+            target = self._next_seq - 1
+            if target == self.durable_seq:
+                return
+            self._file.flush()
+        
+        # Appends may continue while the fsync runs; they wait for the next one
+        os.fsync(self._file.fileno())
+        
+        with self._durable:
+            self.durable_seq = target
+            self._durable.notify_all()
+        self._wake_applier.set()
+    
+    def _apply_loop(self):
+        while True:
+            self._wake_applier.wait(self.apply_interval)
+            self._wake_applier.clear()
+            
+            try:
+                while self._apply_batch():
+                    pass
+                self._compact()
+            except Exception as e:
+                # Only transient database errors get here; the checkpoint stays
+                # where it is and the batch is retried next round
+                self.stats['retries'] += 1
+                self.stats['last_error'] = str(e)
+                logger.exception('Applying punch journal failed')
+                time.sleep(self.apply_interval)
+            
+            if self._stopping.is_set() and self.applied_seq >= self.durable_seq:
+                return
+    
+    def _apply_batch(self):
+        entries, end_offset = self._read_entries(self._read_offset, self.durable_seq, self.batch_size)
+        if not entries:
+            self._read_offset = end_offset
+            return False
+        
+        try:
+            self._record_results(self._apply([entry['event'] for entry in entries]))
+        except OperationalError:
+            raise
+        except Exception:
+            # Something in the batch cannot be applied at all. Apply the
+            # entries one at a time so only the bad ones are set aside
+            logger.exception('Punch journal batch failed; applying its entries one at a time')
+            for entry in entries:
+                try:
+                    self._record_results(self._apply([entry['event']]))
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    self._dead_letter(entry, e)
+                self._save_checkpoint(entry['seq'], entry['end_offset'])
+        
+        self._save_checkpoint(entries[-1]['seq'], end_offset)
+        return True
+    
+    def _apply(self, events):
+        with self.app.app_context():
+            try:
+                return AttendanceService().batch_punch(events, raise_on_error=True)
+            finally:
+                db.session.remove()
+    
+    def _record_results(self, results):
+        for result in results:
+            if result['success']:
+                self.stats['applied'] += 1
+            else:
+                # Duplicates and unknown employees are final; log and move on
+                self.stats['rejected'] += 1
+                logger.info('Punch rejected: %s %s: %s', result.get('employee_id'), result.get('type'), result['message'])
+    
+    def _dead_letter(self, entry, error):
+        # Kept for an operator to inspect and resubmit; never retried here
+        record = {
+            'seq': entry['seq'],
+            'event': entry['event'],
+            'error': f'{type(error).__name__}: {error}',
+            'failed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with open(self.dead_letter_path, 'ab') as dead_letter:
+            dead_letter.write(json.dumps(record, separators=(',', ':'), default=str).encode() + b'\n')
+            dead_letter.flush()
+            os.fsync(dead_letter.fileno())
+        
+        self.stats['dead_lettered'] += 1
+        self.stats['last_error'] = record['error']
+        logger.error('Punch %s moved to the dead-letter file: %s', entry['seq'], record['error'])
+    
+    def _acquire_directory_lock(self):
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(f'Punch journal {self.directory} is already in use by another process')
+        return lock_file
+    
+    def _read_entries(self, offset, max_seq, limit):
+        entries = []
+        with open(self.journal_path, 'rb') as journal:
+            journal.seek(offset)
+            while len(entries) < limit:
+                line = journal.readline()
+                if not line.endswith(b'\n'):
+                    break
+                entry = json.loads(line)
+                if entry['seq'] > max_seq:
+                    break
+                offset = journal.tell()
+                if entry['seq'] > self.applied_seq:
+                    entry['end_offset'] = offset
+                    entries.append(entry)
+        return entries, offset
+    
+    def _compact(self):
+        if os.path.getsize(self.journal_path) < COMPACT_BYTES:
+            return
+        
+        with self._lock:
+            if self.applied_seq != self._next_seq - 1:
+                return
+            self._file.flush()
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+            self._save_checkpoint(self.applied_seq, 0)
+    
+    def _save_checkpoint(self, seq, offset):
+        temp_path = self.checkpoint_path + '.part'
+        with open(temp_path, 'w') as checkpoint:
+            json.dump({'seq': seq, 'offset': offset}, checkpoint)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+        os.replace(temp_path, self.checkpoint_path)
+        
+        self._read_offset = offset
+        with self._applied:
+            self.applied_seq = seq
+            self._applied.notify_all()
+    
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                data = json.load(checkpoint)
+            return data['seq'], data['offset']
+        except FileNotFoundError:
+            return 0, 0
+    
+    def _recover(self):
+        # Drop a torn final line left by a crash; it was never acknowledged
+        last_seq = 0
+        valid_offset = 0
+        if not os.path.exists(self.journal_path):
+            return last_seq, valid_offset
+        
+        with open(self.journal_path, 'rb') as journal:
+            for line in journal:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    last_seq = json.loads(line)['seq']
+                except (ValueError, KeyError):
+                    break
+                valid_offset += len(line)
+        
+        if valid_offset < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as journal:
+                journal.truncate(valid_offset)
+        
+        return last_seq, valid_offset
+
+def _open_journal(app, directory):
+    return PunchJournal(
+        app,
+        directory,
+        fsync_interval=app.config['PUNCH_JOURNAL_FSYNC_MS'] / 1000,
+        apply_interval=app.config['PUNCH_JOURNAL_APPLY_MS'] / 1000,
+        batch_size=app.config['PUNCH_JOURNAL_BATCH_SIZE']
+    )
+
+def _claim_journal(app, root):
+    # The lowest worker directory nobody holds; opening it replays whatever
+    # the process that owned it before acknowledged but never applied
+    for index in range(app.config['PUNCH_JOURNAL_MAX_WORKERS']):
+        directory = os.path.join(root, f'{WORKER_DIR_PREFIX}{index}')
+        os.makedirs(directory, exist_ok=True)
+        try:
+            return _open_journal(app, directory)
+        except RuntimeError:
+            continue
+    return None
+
+def _drain_abandoned(app, root, own_directory):
+    # Worker directories left behind when there are now fewer processes
+    # than before: apply their backlog, then release them again
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if not name.startswith(WORKER_DIR_PREFIX) or directory == own_directory:
+            continue
+        try:
+            journal = _open_journal(app, directory)
+        except RuntimeError:
+            continue
+        try:
+            if journal.durable_seq > journal.applied_seq:
+                logger.info('Replaying %s abandoned punches from %s', journal.durable_seq - journal.applied_seq, directory)
+                journal.start()
+                journal.wait_applied(journal.durable_seq)
+        finally:
+            journal.close()
+
+def init_punch_journal(app):
+    # Nothing is opened here: CLI commands and other processes that never
+    # serve a request must not claim a journal or start its threads
+    if app.config['PUNCH_INGEST_MODE'] != 'journal':
+        return
+    
+    app.extensions['punch_journal_lock'] = threading.Lock()
+    
+    @app.before_request
+    def open_punch_journal():
+        # Claim the directory on the first request so a restarted worker
+        # replays its backlog without waiting for the next punch
+        get_punch_journal()
+
+def start_punch_journal(app):
+    with app.extensions['punch_journal_lock']:
+        if 'punch_journal' in app.extensions:
+            return app.extensions['punch_journal']
+        
+        root = app.config.get('PUNCH_JOURNAL_DIR') or os.path.join(app.instance_path, 'punch_journal')
+        os.makedirs(root, exist_ok=True)
+        
+        journal = _claim_journal(app, root)
+        app.extensions['punch_journal'] = journal
+        if journal is None:
+            logger.warning(
+                'Every punch journal under %s is in use (PUNCH_JOURNAL_MAX_WORKERS=%s); '
+                'this process writes punches directly', root, app.config['PUNCH_JOURNAL_MAX_WORKERS']
+            )
+            return None
+        
+        journal.start()
+        drain = threading.Thread(
+            target=_drain_abandoned, args=(app, root, journal.directory), name='punch-journal-drain', daemon=True
+        )
+        app.extensions['punch_journal_drain'] = drain
+        drain.start()
+        return journal
+
+def get_punch_journal():
+    # Journal mode opens the journal on first use, in the process serving requests
+    app = current_app._get_current_object()
+    if 'punch_journal_lock' not in app.extensions:
+        return None
+    if 'punch_journal' in app.extensions:
+        return app.extensions['punch_journal']
+    return start_punch_journal(app)
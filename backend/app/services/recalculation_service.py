@@ -0,0 +1,151 @@
+from datetime import datetime
+import numpy as np
+from ..models import Employee, Attendance, db
+from ..policy import get_policy
+from ..archive import archive_cutoff
+from ..report_cache import invalidate_reports
+from .aggregate_service import AggregateService
+
+RECALCULATE_CHUNK_SIZE = 50000
+
+COMPUTED_STATUSES = np.array(['Present', 'Late', 'Half-day'], dtype=object)
+
+MICROSECONDS_PER_MINUTE = 60 * 1000000
+
+def _time_to_us(value):
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 + value.microsecond
+
+def compute_status_arrays(check_in, check_out, policy):
+    # Vectorized Attendance.calculate_status over datetime64[us] columns;
+    # check_out holds NaT for open rows. Returns (status codes, late, overtime)
+    day = check_in.astype('datetime64[D]')
+    check_in_us = (check_in - day).astype(np.int64)
+    
+    expected_us = _time_to_us(policy.work_start)
+    is_late = check_in_us > expected_us
+    late_minutes = np.where(
+        is_late,
+        check_in_us // MICROSECONDS_PER_MINUTE - expected_us // MICROSECONDS_PER_MINUTE,
+        0
+    )
+    status = np.where(is_late, np.where(late_minutes <= policy.late_threshold_minutes, 1, 2), 0)
+    
+    # Same interval arithmetic as get_working_hours, relative to the check-in day
+    has_check_out = ~np.isnat(check_out)
+    check_out_us = np.where(has_check_out, (check_out - day).astype(np.int64), 0)
+    lunch_start = _time_to_us(policy.lunch_start)
+    lunch_end = _time_to_us(policy.lunch_end)
+    
+    start = np.where((check_in_us >= lunch_start) & (check_in_us < lunch_end), lunch_end, check_in_us)
+    end = np.where((check_out_us > lunch_start) & (check_out_us <= lunch_end), lunch_start, check_out_us)
+    total = end - start
+    spans_lunch = (start < lunch_end) & (end > lunch_start)
+    overlap = np.maximum(np.minimum(lunch_end, end) - np.maximum(lunch_start, start), 0)
+    total = total - np.where(spans_lunch, overlap, 0)
+    
+    # Divide in the same order as timedelta.total_seconds() / 3600 so the
+    # truncated minutes match the per-row path exactly
+    hours = total / 1e6 / 3600
+    has_overtime = has_check_out & (hours > policy.overtime_after_hours)
+    overtime_minutes = np.where(
+        has_overtime,
+        ((hours - policy.overtime_after_hours) * 60).astype(np.int64),
+        0
+    )
+    
+    return status, late_minutes, overtime_minutes
+
+class RecalculationService:
+    def __init__(self):
+        self.aggregate_service = AggregateService()
+    
+    def recalculate(self, start_date=None, end_date=None, department=None, policy=None,
+                    chunk_size=RECALCULATE_CHUNK_SIZE):
+        # Only rows with a check-in have computed fields; late and overtime
+        # are reset to zero when the current policy no longer applies them
+        policy = policy or get_policy()
+        
+        # Archived years are read-only, so only the hot table is recalculated
+        cutoff = archive_cutoff()
+        if cutoff:
+            if end_date and end_date < cutoff:
+                raise ValueError(f'Attendance before {cutoff.isoformat()} is archived and can no longer be recalculated')
+            start_date = max(start_date, cutoff) if start_date else cutoff
+        
+        query = db.session.query(
+            Attendance.id,
+            Attendance.date,
+            Attendance.check_in,
+            Attendance.check_out,
+            Attendance.status,
+            Attendance.late_minutes,
+            Attendance.overtime_minutes
+        ).filter(Attendance.check_in.isnot(None))
+        
+        if start_date:
+            query = query.filter(Attendance.date >= start_date)
+        
+        if end_date:
+            query = query.filter(Attendance.date <= end_date)
+        
+        if department:
+            query = query.join(
+                Employee, Employee.employee_id == Attendance.employee_id
+            ).filter(Employee.department == department)
+        
+        scanned = 0
+        updated = 0
+        changed_dates = set()
+        last_id = 0
+        
+        while True:
+            rows = query.filter(Attendance.id > last_id).order_by(Attendance.id).limit(chunk_size).all()
+            if not rows:
+                break
+            
+            ids, dates, check_ins, check_outs, statuses, lates, overtimes = zip(*rows)
+            last_id = ids[-1]
+            scanned += len(ids)
+            
+            status, late_minutes, overtime_minutes = compute_status_arrays(
+                np.array(check_ins, dtype='datetime64[us]'),
+                np.array(check_outs, dtype='datetime64[us]'),
+                policy
+            )
+            new_statuses = COMPUTED_STATUSES[status]
+            
+            # NULL and zero minutes are equivalent, so untouched rows are not rewritten
+            changed = (
+                (np.array(statuses, dtype=object) != new_statuses) |
+                (np.nan_to_num(np.array(lates, dtype=np.float64)) != late_minutes) |
+                (np.nan_to_num(np.array(overtimes, dtype=np.float64)) != overtime_minutes)
+            )
+            
+            indexes = np.flatnonzero(changed)
+            if len(indexes):
+                updated_at = datetime.utcnow()
+                db.session.bulk_update_mappings(Attendance, [
+                    {
+                        'id': ids[index],
+                        'status': new_statuses[index],
+                        'late_minutes': int(late_minutes[index]),
+                        'overtime_minutes': int(overtime_minutes[index]),
+                        'updated_at': updated_at
+                    }
+                    for index in indexes.tolist()
+                ])
+                db.session.commit()
+                
+                updated += len(indexes)
+                changed_dates.update(dates[index] for index in indexes.tolist())
+        
+        if changed_dates:
+            # Statuses moved between buckets, so recount the affected dates
+            self.aggregate_service.rebuild(min(changed_dates), max(changed_dates))
+            invalidate_reports(changed_dates, {department} if department else None)
+        
+        return {
+            'scanned': scanned,
+            'updated': updated,
+            'dates': len(changed_dates)
+        }
@@ -1,112 +1,205 @@
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 import csv
 import io
-import pandas as pd
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, and_, case
 from ..models import Employee, Attendance, db
+from ..utils.excel_writer import write_workbook
+from ..utils.date_utils import get_month_range
+from ..utils.helpers import columnize, minutes_since_midnight
+from ..policy import get_policy
+from ..serializers import RowSerializer
+from ..archive import attendance_query, attendance_serializer, attendance_source
+from .aggregate_service import AggregateService
+
+# Rows fetched per round-trip and written per yielded chunk when streaming exports
+EXPORT_CHUNK_SIZE = 1000
+
+# Single-letter cell codes used by the monthly matrix sheet
+STATUS_CODES = {
+    'Present': 'P',
+    'Late': 'L',
+    'Half-day': 'H',
+    'Absent': 'A',
+    'Leave': 'LV'
+}
+
+def format_report_clock(value):
+    return value.isoformat(' ', 'seconds')[11:] if value is not None else '-'
+
+def daily_row_serializer(missing_status, source=Attendance.__table__):
+    return RowSerializer([
+        ('employee_id', Employee.employee_id, None),
+        ('name', Employee.name, None),
+        ('department', Employee.department, None),
+        ('check_in', source.c.check_in, format_report_clock),
+        ('check_out', source.c.check_out, format_report_clock),
+        ('status', case((source.c.check_in.isnot(None), source.c.status), else_=missing_status), None),
+        ('late_minutes', func.coalesce(source.c.late_minutes, 0), None),
+        ('overtime_minutes', func.coalesce(source.c.overtime_minutes, 0), None)
+    ])
+
+# Employees without a check-in show as absent, or as off on a holiday;
+# a day in an archived year builds its serializer against that year's table
+DAILY_ROW_SERIALIZERS = {
+    'Absent': daily_row_serializer('Absent'),
+    'Holiday': daily_row_serializer('Holiday')
+}
 
 class ReportService:
-    def generate_daily_report(self, date_str, department=None):
+    def __init__(self):
+        self.aggregate_service = AggregateService()
+    
+    def generate_daily_report(self, date_str, department=None, page=None, limit=None):
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
         
-        # Get all active employees
-        query = Employee.query.filter_by(is_active=True)
+        # Nobody is absent on a holiday
+        is_holiday = date in get_policy().holidays
+        missing_status = 'Holiday' if is_holiday else 'Absent'
+        
+        # One day is always in a single table: the hot one or its year's archive
+        source = attendance_source(date, date, lambda table: [table.c.date == date])
+        checked_in = source.c.check_in.isnot(None)
+        
+        # Active employees LEFT OUTER JOIN that day's attendance, filtered in SQL
+        query = db.session.query(Employee).outerjoin(
+            source,
+            and_(
+                source.c.employee_id == Employee.employee_id,
+                source.c.date == date
+            )
+        ).filter(Employee.is_active == True)
+        
         if department:
-            query = query.filter_by(department=department)
+            query = query.filter(Employee.department == department)
         
-        employees = query.all()
+        counts = query.with_entities(
+            func.count(Employee.id).label('total'),
+            func.coalesce(func.sum(case((and_(checked_in, source.c.status.in_(('Present', 'Late'))), 1), else_=0)), 0).label('present'),
+            func.coalesce(func.sum(case((and_(checked_in, source.c.status == 'Late'), 1), else_=0)), 0).label('late')
+        ).one()
         
-        # Get attendance for the date
-        attendance_records = Attendance.query.filter_by(date=date).all()
-        attendance_dict = {record.employee_id: record for record in attendance_records}
+        if source is Attendance.__table__:
+            serializer = DAILY_ROW_SERIALIZERS[missing_status]
+        else:
+            serializer = daily_row_serializer(missing_status, source)
+        rows = serializer.select(query).order_by(Employee.name, Employee.employee_id)
         
-        attendance_list = []
-        present_count = 0
-        absent_count = 0
-        late_count = 0
+        if limit:
+            rows = rows.offset((max(page or 1, 1) - 1) * limit).limit(limit)
         
-        for employee in employees:
-            attendance = attendance_dict.get(employee.employee_id)
-            
-            if attendance and attendance.check_in:
-                status = attendance.status
-                if status == 'Present' or status == 'Late':
-                    present_count += 1
-                    if status == 'Late':
-                        late_count += 1
-                else:
-                    absent_count += 1
-            else:
-                status = 'Absent'
-                absent_count += 1
-            
-            attendance_list.append({
-                'employee_id': employee.employee_id,
-                'name': employee.name,
-                'department': employee.department,
-                'check_in': attendance.check_in.strftime('%H:%M:%S') if attendance and attendance.check_in else '-',
-                'check_out': attendance.check_out.strftime('%H:%M:%S') if attendance and attendance.check_out else '-',
-                'status': status,
-                'late_minutes': attendance.late_minutes if attendance else 0,
-                'overtime_minutes': attendance.overtime_minutes if attendance else 0
-            })
+        attendance_list = serializer.dump(rows)
         
-        return {
-            'total_employees': len(employees),
-            'present_count': present_count,
-            'absent_count': absent_count,
-            'late_count': late_count,
+        report = {
+            'total_employees': counts.total,
+            'present_count': counts.present,
+            'absent_count': 0 if is_holiday else counts.total - counts.present,
+            'late_count': counts.late,
             'attendance_list': attendance_list
         }
+        
+        if limit:
+            report['page'] = max(page or 1, 1)
+            report['limit'] = limit
+        
+        return report
     
-    def generate_monthly_report(self, year, month, employee_id=None):
-        # Get date range for the month
-        start_date = datetime(year, month, 1).date()
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
+    def generate_monthly_report(self, year, month, employee_id=None, columnar=False):
+        start_date, end_date = get_month_range(year, month)
         
-        # Query attendance
-        query = Attendance.query.filter(
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        )
+        # Query attendance; a closed year is read from its archive table
+        def criteria(table):
+            conditions = [table.c.date >= start_date, table.c.date <= end_date]
+            if employee_id:
+                conditions.append(table.c.employee_id == employee_id)
+            return conditions
+        
+        query, source = attendance_query(start_date, end_date, criteria)
         
         if employee_id:
-            query = query.filter_by(employee_id=employee_id)
             employee = Employee.query.filter_by(employee_id=employee_id).first()
             employee_info = employee.to_dict() if employee else None
         else:
             employee_info = None
         
-        attendance_records = query.all()
-        
-        # Group by employee
-        employee_attendance = {}
-        for record in attendance_records:
-            if record.employee_id not in employee_attendance:
-                employee_attendance[record.employee_id] = []
-            employee_attendance[record.employee_id].append(record.to_dict())
+        if columnar:
+            attendance = self._monthly_columns(query, source, start_date)
+        else:
+            attendance_records = attendance_serializer(source).all(query)
+            
+            # Group by employee
+            employee_attendance = {}
+            for record in attendance_records:
+                if record['employee_id'] not in employee_attendance:
+                    employee_attendance[record['employee_id']] = []
+                employee_attendance[record['employee_id']].append(record)
         
         # Calculate statistics
+        policy = get_policy()
         total_days = (end_date - start_date).days + 1
-        work_days = 0
-        current_date = start_date
-        while current_date <= end_date:
-            if current_date.weekday() < 5:  # Monday to Friday
-                work_days += 1
-            current_date += timedelta(days=1)
+        work_days = policy.working_days(start_date, end_date)
         
-        return {
+        report = {
             'year': year,
             'month': month,
             'start_date': start_date.strftime('%Y-%m-%d'),
             'end_date': end_date.strftime('%Y-%m-%d'),
             'total_days': total_days,
             'work_days': work_days,
-            'employee_info': employee_info,
-            'attendance_data': employee_attendance
+            'holidays': [day.strftime('%Y-%m-%d') for day in policy.holidays_between(start_date, end_date)],
+            'employee_info': employee_info
+        }
+        
+        if columnar:
+            report['format'] = 'columnar'
+            report['attendance'] = attendance
+        else:
+            report['attendance_data'] = employee_attendance
+        
+        return report
+    
+    def _monthly_columns(self, query, source, start_date):
+        # Parallel arrays, one entry per record: employee_id and status are
+        # indexes into their dictionaries, day counts from the start date and
+        # check_in/check_out are minutes since midnight
+        rows = query.with_entities(
+            source.c.id,
+            source.c.employee_id,
+            source.c.date,
+            source.c.check_in,
+            source.c.check_out,
+            source.c.status,
+            source.c.late_minutes,
+            source.c.overtime_minutes
+        ).order_by(source.c.employee_id, source.c.date)
+        
+        employee_codes = {}
+        status_codes = {}
+        columns = {
+            'id': [],
+            'employee': [],
+            'day': [],
+            'check_in': [],
+            'check_out': [],
+            'status': [],
+            'late_minutes': [],
+            'overtime_minutes': []
+        }
+        
+        for row in rows:
+            columns['id'].append(row.id)
+            columns['employee'].append(employee_codes.setdefault(row.employee_id, len(employee_codes)))
+            columns['day'].append((row.date - start_date).days)
+            columns['check_in'].append(minutes_since_midnight(row.check_in))
+            columns['check_out'].append(minutes_since_midnight(row.check_out))
+            columns['status'].append(status_codes.setdefault(row.status, len(status_codes)))
+            columns['late_minutes'].append(row.late_minutes)
+            columns['overtime_minutes'].append(row.overtime_minutes)
+        
+        return {
+            'count': len(columns['id']),
+            'employee_ids': list(employee_codes),
+            'statuses': list(status_codes),
+            'columns': columns
         }
     
     def generate_employee_summary(self, employee_id, year, month):
@@ -114,50 +207,36 @@ class ReportService:
         if not employee:
             return {'error': 'Employee not found'}
         
-        start_date = datetime(year, month, 1).date()
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1).date() - timedelta(days=1)
-        else:
-            end_date = datetime(year, month + 1, 1).date() - timedelta(days=1)
+        start_date, end_date = get_month_range(year, month)
         
-        # Get attendance records
-        attendance_records = Attendance.query.filter(
-            Attendance.employee_id == employee_id,
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        ).all()
+        # Get attendance records, from the archive for a closed year
+        query, source = attendance_query(start_date, end_date, lambda table: [
+            table.c.employee_id == employee_id,
+            table.c.date >= start_date,
+            table.c.date <= end_date
+        ])
+        attendance_records = attendance_serializer(source).all(query.order_by(source.c.date))
         
-        # Calculate statistics
+        # Calculate statistics; working days are a prefix-sum lookup, so
+        # only the records themselves are walked
+        policy = get_policy()
         total_days = (end_date - start_date).days + 1
-        work_days = 0
+        work_days = policy.working_days(start_date, end_date)
         present_days = 0
         late_days = 0
-        absent_days = 0
         total_late_minutes = 0
         total_overtime_minutes = 0
         
-        current_date = start_date
-        while current_date <= end_date:
-            if current_date.weekday() < 5:  # Monday to Friday
-                work_days += 1
-                
-                # Find attendance for this date
-                attendance = None
-                for record in attendance_records:
-                    if record.date == current_date:
-                        attendance = record
-                        break
-                
-                if attendance and attendance.check_in:
-                    present_days += 1
-                    if attendance.status == 'Late':
-                        late_days += 1
-                        total_late_minutes += attendance.late_minutes
-                    total_overtime_minutes += attendance.overtime_minutes
-                else:
-                    absent_days += 1
-            
-            current_date += timedelta(days=1)
+        for attendance in attendance_records:
+            if attendance['check_in'] and policy.is_working_day(date.fromisoformat(attendance['date'])):
+                present_days += 1
+                if attendance['status'] == 'Late':
+                    late_days += 1
+                    total_late_minutes += attendance['late_minutes']
+                total_overtime_minutes += attendance['overtime_minutes']
+        
+        # Holidays are not working days, so they never count as absences
+        absent_days = work_days - present_days
         
         attendance_rate = (present_days / work_days * 100) if work_days > 0 else 0
         
@@ -181,9 +260,103 @@ class ReportService:
                 'average_late_minutes': round(total_late_minutes / late_days, 2) if late_days > 0 else 0,
                 'average_overtime_minutes': round(total_overtime_minutes / present_days, 2) if present_days > 0 else 0
             },
-            'attendance_details': [record.to_dict() for record in attendance_records]
+            'attendance_details': attendance_records
+        }
+    
+    def generate_department_summary(self, year, month, department=None):
+        start_date, end_date = get_month_range(year, month)
+        
+        # Only working-day records count, matching generate_employee_summary
+        work_dates = get_policy().working_dates(start_date, end_date)
+        work_days = len(work_dates)
+        
+        source = attendance_source(start_date, end_date, lambda table: [table.c.date.in_(work_dates)])
+        checked_in = source.c.check_in.isnot(None)
+        is_late = and_(checked_in, source.c.status == 'Late')
+        
+        # One grouped query computes the totals for every employee
+        query = db.session.query(
+            Employee.employee_id,
+            Employee.name,
+            Employee.department,
+            func.coalesce(func.sum(case((checked_in, 1), else_=0)), 0).label('present_days'),
+            func.coalesce(func.sum(case((is_late, 1), else_=0)), 0).label('late_days'),
+            func.coalesce(func.sum(case((is_late, source.c.late_minutes), else_=0)), 0).label('total_late_minutes'),
+            func.coalesce(func.sum(case((checked_in, source.c.overtime_minutes), else_=0)), 0).label('total_overtime_minutes')
+        ).outerjoin(
+            source,
+            and_(
+                source.c.employee_id == Employee.employee_id,
+                source.c.date.in_(work_dates)
+            )
+        ).filter(Employee.is_active == True)
+        
+        if department:
+            query = query.filter(Employee.department == department)
+        
+        rows = query.group_by(
+            Employee.employee_id, Employee.name, Employee.department
+        ).order_by(Employee.name, Employee.employee_id).all()
+        
+        employees = []
+        totals = {
+            'present_days': 0,
+            'late_days': 0,
+            'absent_days': 0,
+            'total_late_minutes': 0,
+            'total_overtime_minutes': 0
+        }
+        
+        for row in rows:
+            absent_days = work_days - row.present_days
+            employees.append({
+                'employee_id': row.employee_id,
+                'name': row.name,
+                'department': row.department,
+                'present_days': row.present_days,
+                'late_days': row.late_days,
+                'absent_days': absent_days,
+                'attendance_rate': round(row.present_days / work_days * 100, 2) if work_days > 0 else 0,
+                'total_late_minutes': row.total_late_minutes,
+                'total_overtime_minutes': row.total_overtime_minutes
+            })
+            totals['present_days'] += row.present_days
+            totals['late_days'] += row.late_days
+            totals['absent_days'] += absent_days
+            totals['total_late_minutes'] += row.total_late_minutes
+            totals['total_overtime_minutes'] += row.total_overtime_minutes
+        
+        expected_days = work_days * len(rows)
+        totals['attendance_rate'] = round(totals['present_days'] / expected_days * 100, 2) if expected_days > 0 else 0
+        
+        return {
+            'period': {
+                'year': year,
+                'month': month,
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d')
+            },
+            'department': department,
+            'work_days': work_days,
+            'total_employees': len(rows),
+            'totals': totals,
+            'employees': employees
         }
     
+    def generate_range_analytics(self, start_date_str, end_date_str, department=None, include_employees=True):
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        
+        # Load the range once as column arrays and aggregate with NumPy,
+        # imported on first use to keep it out of worker startup
+        from .analytics_service import AttendanceFrame, summarize_frame
+        
+        frame = AttendanceFrame.load(start_date, end_date, department)
+        result = summarize_frame(frame, include_employees)
+        result['department'] = department
+        
+        return result
+    
     def export_daily_report_csv(self, date_str):
         report = self.generate_daily_report(date_str)
         
@@ -217,52 +390,186 @@ class ReportService:
         
         return output.getvalue()
     
-    def export_daily_report_excel(self, date_str):
-        report = self.generate_daily_report(date_str)
+    def stream_range_report_csv(self, start_date_str, end_date_str, department=None):
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
         
-        # Create DataFrame for summary
-        summary_data = {
-            'Metric': ['Total Employees', 'Present', 'Absent', 'Late'],
-            'Value': [
-                report['total_employees'],
-                report['present_count'],
-                report['absent_count'],
-                report['late_count']
-            ]
-        }
-        summary_df = pd.DataFrame(summary_data)
+        # A single small buffer is reused for every chunk
+        output = io.StringIO()
+        writer = csv.writer(output)
         
-        # Create DataFrame for attendance list
-        attendance_df = pd.DataFrame(report['attendance_list'])
+        writer.writerow(['Attendance Report', start_date_str, end_date_str])
         
-        # Create Excel writer
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            attendance_df.to_excel(writer, sheet_name='Attendance Details', index=False)
+        pending = 0
+        for row in self._iter_attendance_detail_rows(start_date, end_date, department):
+            writer.writerow(row)
+            pending += 1
+            
+            if pending >= EXPORT_CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+                pending = 0
         
-        return output.getvalue()
+        yield output.getvalue()
     
-    def get_attendance_statistics(self, start_date_str, end_date_str, department=None):
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    def export_daily_report_excel(self, date_str):
+        report = self.generate_daily_report(date_str)
+        
+        summary_rows = [
+            ['Metric', 'Value'],
+            ['Total Employees', report['total_employees']],
+            ['Present', report['present_count']],
+            ['Absent', report['absent_count']],
+            ['Late', report['late_count']]
+        ]
+        
+        columns = ['employee_id', 'name', 'department', 'check_in', 'check_out', 'status', 'late_minutes', 'overtime_minutes']
+        attendance_rows = [columns]
+        attendance_rows.extend([record[column] for column in columns] for record in report['attendance_list'])
+        
+        return write_workbook([
+            ('Summary', summary_rows),
+            ('Attendance Details', attendance_rows)
+        ])
+    
+    def export_monthly_report_excel(self, year, month, department=None, output=None):
+        start_date, end_date = get_month_range(year, month)
+        
+        days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+        policy = get_policy()
+        work_day_set = {day for day in days if policy.is_working_day(day)}
+        work_days = len(work_day_set)
+        
+        summary_rows = [
+            ['Monthly Attendance Report', f'{year}-{month:02d}'],
+            ['Department', department or 'All'],
+            ['Total Days', len(days)],
+            ['Work Days', work_days],
+            ['Holidays', len(policy.holidays_between(start_date, end_date))],
+            [],
+            ['Legend'] + [f'{code} = {status}' for status, code in STATUS_CODES.items()]
+        ]
+        
+        return write_workbook([
+            ('Summary', summary_rows),
+            ('Monthly Matrix', self._iter_monthly_matrix_rows(start_date, end_date, days, work_day_set, department)),
+            ('Attendance Details', self._iter_attendance_detail_rows(start_date, end_date, department))
+        ], output)
+    
+    def _iter_monthly_matrix_rows(self, start_date, end_date, days, work_day_set, department=None):
+        yield ['Employee ID', 'Name', 'Department'] + [str(day.day) for day in days] + ['Present', 'Late', 'Absent']
         
-        # Query for statistics
+        source = attendance_source(start_date, end_date, lambda table: [
+            table.c.date >= start_date,
+            table.c.date <= end_date
+        ])
         query = db.session.query(
-            Attendance.date,
-            func.count(Attendance.id).label('total'),
-            func.sum((Attendance.status == 'Present').cast(db.Integer)).label('present'),
-            func.sum((Attendance.status == 'Late').cast(db.Integer)).label('late'),
-            func.sum((Attendance.status == 'Absent').cast(db.Integer)).label('absent')
-        ).filter(
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
+            Employee.employee_id,
+            Employee.name,
+            Employee.department,
+            source.c.date,
+            source.c.check_in,
+            source.c.status
+        ).outerjoin(
+            source,
+            and_(
+                source.c.employee_id == Employee.employee_id,
+                source.c.date >= start_date,
+                source.c.date <= end_date
+            )
+        ).filter(Employee.is_active == True)
+        
+        if department:
+            query = query.filter(Employee.department == department)
+        
+        rows = query.order_by(Employee.name, Employee.employee_id, source.c.date).yield_per(EXPORT_CHUNK_SIZE)
+        
+        # Rows arrive grouped by employee, so only one matrix row is held at a time
+        current = None
+        records = {}
+        for row in rows:
+            if current is None or row.employee_id != current[0]:
+                if current is not None:
+                    yield self._build_matrix_row(current, records, days, work_day_set)
+                current = (row.employee_id, row.name, row.department)
+                records = {}
+            if row.date is not None:
+                records[row.date] = row
+        
+        if current is not None:
+            yield self._build_matrix_row(current, records, days, work_day_set)
+    
+    def _build_matrix_row(self, employee, records, days, work_day_set):
+        cells = []
+        present = late = absent = 0
+        
+        for day in days:
+            record = records.get(day)
+            is_work_day = day in work_day_set
+            
+            if record and record.check_in:
+                cells.append(STATUS_CODES.get(record.status, record.status))
+                if is_work_day:
+                    present += 1
+                    if record.status == 'Late':
+                        late += 1
+            elif record:
+                cells.append(STATUS_CODES.get(record.status, 'A'))
+                if is_work_day:
+                    absent += 1
+            elif is_work_day:
+                cells.append(STATUS_CODES['Absent'])
+                absent += 1
+            else:
+                cells.append('')
+        
+        return list(employee) + cells + [present, late, absent]
+    
+    def _iter_attendance_detail_rows(self, start_date, end_date, department=None):
+        yield ['Date', 'Employee ID', 'Name', 'Department', 'Check In', 'Check Out', 'Status', 'Late Minutes', 'Overtime Minutes']
+        
+        query, source = attendance_query(start_date, end_date, lambda table: [
+            table.c.date >= start_date,
+            table.c.date <= end_date
+        ])
+        query = query.with_entities(
+            source.c.date,
+            source.c.employee_id,
+            Employee.name,
+            Employee.department,
+            source.c.check_in,
+            source.c.check_out,
+            source.c.status,
+            source.c.late_minutes,
+            source.c.overtime_minutes
+        ).join(
+            Employee, Employee.employee_id == source.c.employee_id
         )
         
         if department:
-            query = query.join(Employee).filter(Employee.department == department)
+            query = query.filter(Employee.department == department)
+        
+        # Fetch in chunks instead of materialising the whole range
+        for row in query.order_by(source.c.date, source.c.employee_id).yield_per(EXPORT_CHUNK_SIZE):
+            yield [
+                row.date.strftime('%Y-%m-%d'),
+                row.employee_id,
+                row.name,
+                row.department,
+                row.check_in.strftime('%H:%M:%S') if row.check_in else '-',
+                row.check_out.strftime('%H:%M:%S') if row.check_out else '-',
+                row.status,
+                row.late_minutes or 0,
+                row.overtime_minutes or 0
+            ]
+    
+    def get_attendance_statistics(self, start_date_str, end_date_str, department=None, columnar=False):
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
         
-        statistics = query.group_by(Attendance.date).order_by(Attendance.date).all()
+        # Read the per-day rollup instead of grouping raw attendance rows
+        statistics = self.aggregate_service.get_daily_statistics(start_date, end_date, department)
         
         # Calculate daily statistics
         daily_stats = []
@@ -283,7 +590,7 @@ class ReportService:
         
         overall_attendance_rate = round(total_present / total_records * 100, 2) if total_records > 0 else 0
         
-        return {
+        report = {
             'period': {
                 'start_date': start_date_str,
                 'end_date': end_date_str
@@ -296,4 +603,12 @@ class ReportService:
                 'total_absent': total_records - total_present,
                 'attendance_rate': overall_attendance_rate
             }
-        }
\ No newline at end of file
+        }
+        
+        if columnar:
+            report['format'] = 'columnar'
+            report['daily_statistics'] = columnize(
+                daily_stats, ('date', 'total', 'present', 'late', 'absent', 'attendance_rate')
+            )
+        
+        return report
\ No newline at end of file
@@ -0,0 +1,47 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from .extensions import db
+
+def _is_sqlite(app):
+    return make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() == 'sqlite'
+
+def configure_storage(app):
+    # Pool settings for server databases; SQLite picks its own pool class
+    if app.config['DB_STORAGE_PROFILE'] != 'tuned' or _is_sqlite(app):
+        return
+    
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+    options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+    options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+    options.setdefault('pool_pre_ping', app.config['DB_POOL_PRE_PING'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def init_storage(app):
+    # Apply the SQLite pragmas to every new connection of this app's engine
+    if app.config['DB_STORAGE_PROFILE'] != 'tuned' or not _is_sqlite(app):
+        return
+    
+    pragmas = [
+        f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={app.config['SQLITE_BUSY_TIMEOUT_MS']}",
+        # Negative values are KiB rather than pages
+        f"PRAGMA cache_size=-{app.config['SQLITE_CACHE_SIZE_KB']}"
+    ]
+    
+    # WAL and mmap only apply to database files
+    database = make_url(app.config['SQLALCHEMY_DATABASE_URI']).database
+    if database and database != ':memory:':
+        pragmas = [
+            f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}",
+            f"PRAGMA mmap_size={app.config['SQLITE_MMAP_SIZE']}"
+        ] + pragmas
+    
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+    
+    with app.app_context():
+        event.listen(db.engine, 'connect', apply_pragmas)
@@ -1,8 +1,11 @@
 import unittest
-from datetime import datetime, date
+from datetime import datetime, date, time
 from app import create_app
 from app.extensions import db
 from app.models import Employee, Attendance
+from app.policy import get_policy
+from app.serializers import ATTENDANCE_SERIALIZER, EMPLOYEE_SERIALIZER
+from app.services.policy_service import PolicyService
 
 class TestModels(unittest.TestCase):
     def setUp(self):
@@ -52,5 +55,45 @@ class TestModels(unittest.TestCase):
         self.assertIn('department', employee_dict)
         self.assertEqual(employee_dict['employee_id'], 'TEST001')
 
+    def test_calculate_status_uses_cached_policy(self):
+        attendance = Attendance(
+            employee_id='TEST001',
+            date=date(2024, 1, 15),
+            check_in=datetime(2024, 1, 15, 9, 20),
+            check_out=datetime(2024, 1, 15, 18, 20)
+        )
+        attendance.calculate_status()
+        self.assertEqual(attendance.status, 'Late')
+        self.assertEqual(attendance.late_minutes, 20)
+        self.assertFalse(attendance.overtime_minutes)
+        
+        policy = PolicyService().update_settings({
+            'work_start_time': '08:30',
+            'late_threshold_minutes': 60,
+            'overtime_after_hours': 7.5
+        })
+        self.assertEqual(policy.version, 1)
+        self.assertIs(get_policy(), policy)
+        
+        attendance.calculate_status()
+        self.assertEqual(attendance.status, 'Late')
+        self.assertEqual(attendance.late_minutes, 50)
+        self.assertEqual(attendance.overtime_minutes, 30)
+        self.assertEqual(get_policy().work_start, time(8, 30))
+
+    def test_row_serializers_match_to_dict(self):
+        attendance = Attendance(
+            employee_id='TEST001',
+            date=date(2024, 1, 15),
+            check_in=datetime(2024, 1, 15, 9, 5, 30, 250000),
+            notes='Serialized'
+        )
+        attendance.calculate_status()
+        db.session.add(attendance)
+        db.session.commit()
+        
+        self.assertEqual(ATTENDANCE_SERIALIZER.all(Attendance.query), [attendance.to_dict()])
+        self.assertEqual(EMPLOYEE_SERIALIZER.all(Employee.query), [self.employee.to_dict()])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
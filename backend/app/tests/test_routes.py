@@ -1,9 +1,15 @@
 import unittest
+import gzip
+import io
 import json
-from datetime import datetime
+from datetime import datetime, date
+from openpyxl import Workbook, load_workbook
+from config import config, TestingConfig
 from app import create_app
 from app.extensions import db
-from app.models import Employee
+from app.metrics import get_metrics
+from app.models import Employee, Attendance
+from app.utils.helpers import encode_cursor
 
 class TestRoutes(unittest.TestCase):
     def setUp(self):
@@ -28,6 +34,15 @@ class TestRoutes(unittest.TestCase):
         db.drop_all()
         self.app_context.pop()
     
+    def get_auth_headers(self):
+        response = self.client.post(
+            '/api/auth/login',
+            data=json.dumps({'employee_id': 'TEST001'}),
+            content_type='application/json'
+        )
+        token = json.loads(response.data)['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    
     def test_get_employees(self):
         response = self.client.get('/api/employees/')
         self.assertEqual(response.status_code, 401)  # Unauthorized without JWT
@@ -64,6 +79,368 @@ class TestRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.data)
         self.assertIn('access_token', data)
+    
+    def test_batch_punch(self):
+        events = [
+            {'employee_id': 'TEST001', 'type': 'check_out', 'timestamp': '2024-01-15 18:30:00'},
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-15 09:10:00'},
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-15 09:12:00'},
+            {'employee_id': 'UNKNOWN', 'type': 'check_in', 'timestamp': '2024-01-15 09:00:00'},
+            {'employee_id': 'TEST001', 'type': 'lunch'}
+        ]
+        
+        response = self.client.post(
+            '/api/attendance/batch',
+            data=json.dumps({'events': events}),
+            content_type='application/json',
+            headers=self.get_auth_headers()
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['succeeded'], 2)
+        self.assertEqual(data['failed'], 3)
+        self.assertEqual([result['success'] for result in data['results']], [True, True, False, False, False])
+        self.assertEqual(data['results'][1]['status'], 'Late')
+        
+        attendance = Attendance.query.filter_by(employee_id='TEST001').one()
+        self.assertEqual(attendance.check_in, datetime(2024, 1, 15, 9, 10))
+        self.assertEqual(attendance.check_out, datetime(2024, 1, 15, 18, 30))
+        self.assertEqual(attendance.late_minutes, 10)
+    
+    def test_check_in_rejects_malformed_fields(self):
+        for payload in ({'employee_id': ['TEST001']}, {'employee_id': 'TEST001', 'notes': {'text': 'late bus'}}):
+            response = self.client.post(
+                '/api/attendance/check-in',
+                data=json.dumps(payload),
+                content_type='application/json',
+                headers=self.get_auth_headers()
+            )
+            self.assertEqual(response.status_code, 400)
+        
+        self.assertEqual(Attendance.query.count(), 0)
+    
+    def test_export_range_report_streams_csv(self):
+        for day in (15, 16):
+            db.session.add(Attendance(
+                employee_id='TEST001',
+                date=date(2024, 1, day),
+                check_in=datetime(2024, 1, day, 9, 0),
+                status='Present'
+            ))
+        db.session.commit()
+        
+        url = '/api/reports/export/range?start_date=2024-01-01&end_date=2024-01-31'
+        response = self.client.get(url, headers=self.get_auth_headers())
+        self.assertEqual(response.status_code, 200)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[2].startswith('2024-01-15,TEST001,Test User,Testing,09:00:00'))
+        
+        response = self.client.get(url + '&gzip=true', headers=self.get_auth_headers())
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertEqual(gzip.decompress(response.data).decode().splitlines(), lines)
+    
+    def test_export_monthly_report_matrix(self):
+        db.session.add(Attendance(
+            employee_id='TEST001',
+            date=date(2024, 1, 2),
+            check_in=datetime(2024, 1, 2, 9, 20),
+            status='Late'
+        ))
+        db.session.commit()
+        
+        response = self.client.get(
+            '/api/reports/export/monthly?year=2024&month=1',
+            headers=self.get_auth_headers()
+        )
+        self.assertEqual(response.status_code, 200)
+        
+        workbook = load_workbook(io.BytesIO(response.data), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Summary', 'Monthly Matrix', 'Attendance Details'])
+        
+        header, row = list(workbook['Monthly Matrix'].values)
+        self.assertEqual(len(header), 3 + 31 + 3)
+        self.assertEqual(row[:5], ('TEST001', 'Test User', 'Testing', 'A', 'L'))
+        self.assertEqual(row[-3:], (1, 1, 22))
+    
+    def test_history_cursor_pagination(self):
+        for day in range(1, 6):
+            db.session.add(Attendance(employee_id='TEST001', date=date(2024, 1, day), status='Present'))
+        db.session.commit()
+        
+        headers = self.get_auth_headers()
+        dates = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(
+                f'/api/attendance/history/TEST001?per_page=2&include_total=true&cursor={cursor}',
+                headers=headers
+            )
+            data = json.loads(response.data)
+            self.assertEqual(data['total'], 5)
+            dates.extend(record['date'] for record in data['history'])
+            cursor = data['next_cursor']
+        
+        self.assertEqual(dates, [f'2024-01-0{day}' for day in range(5, 0, -1)])
+        
+        response = self.client.get('/api/attendance/history/TEST001?cursor=bogus', headers=headers)
+        self.assertEqual(response.status_code, 400)
+        
+        # Well-formed JSON with the wrong value types is as invalid as garbage
+        for values in ([None, None], [1, {'a': 1}], ['2024-01-05', True], ['January', 1]):
+            cursor = encode_cursor(values)
+            response = self.client.get(f'/api/attendance/history/TEST001?cursor={cursor}', headers=headers)
+            self.assertEqual(response.status_code, 400, values)
+            self.assertEqual(json.loads(response.data)['message'], 'Invalid cursor')
+        
+        for values in ([None, None], [1, {'a': 1}], ['Alice', True]):
+            response = self.client.get(f'/api/employees/?cursor={encode_cursor(values)}', headers=headers)
+            self.assertEqual(response.status_code, 400, values)
+    
+    def test_employee_cursor_pagination(self):
+        for name in ('Carol', 'Alice', 'Bob'):
+            db.session.add(Employee(employee_id=f'TEST-{name}', name=name))
+        db.session.commit()
+        
+        headers = self.get_auth_headers()
+        response = self.client.get('/api/employees/?per_page=3&cursor=', headers=headers)
+        data = json.loads(response.data)
+        self.assertEqual([emp['name'] for emp in data['employees']], ['Alice', 'Bob', 'Carol'])
+        self.assertNotIn('total', data)
+        
+        response = self.client.get(f"/api/employees/?per_page=3&cursor={data['next_cursor']}", headers=headers)
+        data = json.loads(response.data)
+        self.assertEqual([emp['name'] for emp in data['employees']], ['Test User'])
+        self.assertIsNone(data['next_cursor'])
+    
+    def test_employee_search_ranks_prefixes_and_follows_writes(self):
+        for employee_id, name, department in (
+            ('TEST-1', 'Dana Martins', 'Sales'),
+            ('TEST-2', 'Martin Diaz', 'Support'),
+            ('TEST-3', 'Ann Smartin', 'Sales')
+        ):
+            db.session.add(Employee(employee_id=employee_id, name=name, department=department))
+        db.session.commit()
+        
+        headers = self.get_auth_headers()
+        response = self.client.get('/api/employees/search?q=martin', headers=headers)
+        data = json.loads(response.data)
+        self.assertEqual([emp['name'] for emp in data['employees']], ['Martin Diaz', 'Dana Martins', 'Ann Smartin'])
+        self.assertEqual(data['total'], 3)
+        
+        response = self.client.get('/api/employees/search?q=ma&limit=1&offset=1', headers=headers)
+        data = json.loads(response.data)
+        self.assertEqual([emp['name'] for emp in data['employees']], ['Dana Martins'])
+        self.assertEqual(data['total'], 2)
+        
+        # Writes through the API update the built index
+        self.client.post('/api/employees/TEST-2/deactivate', headers=headers)
+        self.client.put('/api/employees/TEST-3', data=json.dumps({'name': 'Ann Lee'}), content_type='application/json', headers=headers)
+        response = self.client.get('/api/employees/search?q=martin', headers=headers)
+        self.assertEqual([emp['name'] for emp in json.loads(response.data)['employees']], ['Dana Martins'])
+        
+        response = self.client.get('/api/employees/search?q=', headers=headers)
+        self.assertEqual(response.status_code, 400)
+    
+    def test_import_employees_reports_rejected_rows(self):
+        csv_data = (
+            'Employee ID,Name,Department,Email,Hire Date\n'
+            'IMP001,Ann,Sales,ann@example.com,2024-01-15\n'
+            'IMP002,Ben,Sales,ann@example.com,\n'
+            'TEST001,Again,Testing,,\n'
+            'IMP003,,Sales,bad-email,\n'
+            'IMP001,Ann Again,Sales,,\n'
+            'IMP004,Dee,Support,dee@example.com,\n'
+        )
+        response = self.client.post(
+            '/api/employees/import',
+            data={'file': (io.BytesIO(csv_data.encode('utf-8-sig')), 'site.csv')},
+            content_type='multipart/form-data',
+            headers=self.get_auth_headers()
+        )
+        self.assertEqual(response.status_code, 200)
+        entries = [json.loads(line) for line in response.data.decode().splitlines()]
+        
+        self.assertEqual(entries[-1]['summary'], {'rows': 6, 'imported': 2, 'failed': 4})
+        self.assertEqual({entry['row']: entry['errors'] for entry in entries[:-1]}, {
+            3: ['Duplicate email, first used on row 2'],
+            4: ['Employee ID already exists'],
+            5: ['Name is required', 'Invalid email format'],
+            6: ['Duplicate employee ID, first used on row 2']
+        })
+        self.assertEqual(Employee.query.filter_by(employee_id='IMP001').one().hire_date, date(2024, 1, 15))
+        self.assertIsNotNone(Employee.query.filter_by(employee_id='IMP004').first())
+    
+    def test_import_employees_from_xlsx(self):
+        workbook = Workbook()
+        workbook.active.append(['employee_id', 'name', 'phone', 'hire_date'])
+        workbook.active.append([5001, 'Eve', 5551234567, datetime(2023, 5, 1)])
+        output = io.BytesIO()
+        workbook.save(output)
+        output.seek(0)
+        
+        response = self.client.post(
+            '/api/employees/import',
+            data={'file': (output, 'site.xlsx')},
+            content_type='multipart/form-data',
+            headers=self.get_auth_headers()
+        )
+        entries = [json.loads(line) for line in response.data.decode().splitlines()]
+        self.assertEqual(entries, [{'summary': {'rows': 1, 'imported': 1, 'failed': 0}}])
+        
+        employee = Employee.query.filter_by(employee_id='5001').one()
+        self.assertEqual((employee.phone, employee.hire_date), ('5551234567', date(2023, 5, 1)))
+        
+        response = self.client.post(
+            '/api/employees/import',
+            data={'file': (io.BytesIO(b'name\nNo Id\n'), 'site.csv')},
+            content_type='multipart/form-data',
+            headers=self.get_auth_headers()
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    def test_report_cache_keeps_past_days_on_today_write(self):
+        headers = self.get_auth_headers()
+        today = date.today().strftime('%Y-%m-%d')
+        
+        self.client.get('/api/reports/daily?date=2024-01-15', headers=headers)
+        response = self.client.get(f'/api/reports/daily?date={today}', headers=headers)
+        self.assertEqual(json.loads(response.data)['present_count'], 0)
+        
+        self.client.post(
+            '/api/attendance/check-in',
+            data=json.dumps({'employee_id': 'TEST001'}),
+            content_type='application/json',
+            headers=headers
+        )
+        
+        response = self.client.get(f'/api/reports/daily?date={today}', headers=headers)
+        report = json.loads(response.data)
+        self.assertEqual(report['total_employees'] - report['absent_count'], 1)
+        self.client.get('/api/reports/daily?date=2024-01-15', headers=headers)
+        
+        stats = json.loads(self.client.get('/api/reports/cache', headers=headers).data)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['invalidations'], 1)
+    
+    def test_report_cache_follows_writes_it_was_not_told_about(self):
+        headers = self.get_auth_headers()
+        url = '/api/reports/daily?date=2024-01-15'
+        
+        first = self.client.get(url, headers=headers)
+        self.assertEqual(json.loads(first.data)['present_count'], 0)
+        
+        # As another worker would: committed, but this process's cache is never invalidated
+        db.session.add(Attendance(employee_id='TEST001', date=date(2024, 1, 15), check_in=datetime(2024, 1, 15, 9, 0), status='Present'))
+        db.session.commit()
+        
+        second = self.client.get(url, headers=headers)
+        self.assertEqual(json.loads(second.data)['present_count'], 1)
+        self.assertNotEqual(second.headers['ETag'], first.headers['ETag'])
+        
+        third = self.client.get(url, headers=headers)
+        self.assertEqual(third.data, second.data)
+        self.assertEqual(json.loads(self.client.get('/api/reports/cache', headers=headers).data)['hits'], 1)
+    
+    def test_conditional_get_history_and_statistics(self):
+        headers = self.get_auth_headers()
+        today = date.today().strftime('%Y-%m-%d')
+        
+        # Check-in adds a rollup bucket; check-out only touches the attendance row
+        for url in (f'/api/reports/statistics?end_date={today}', '/api/attendance/history/TEST001'):
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            etag = response.headers['ETag']
+            
+            response = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.data, b'')
+            
+            self.client.post(
+                '/api/attendance/check-out' if 'history' in url else '/api/attendance/check-in',
+                data=json.dumps({'employee_id': 'TEST001'}),
+                content_type='application/json',
+                headers=headers
+            )
+            
+            response = self.client.get(url, headers={**headers, 'If-None-Match': etag})
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers['ETag'], etag)
+    
+    def test_columnar_monthly_report_with_gzip(self):
+        db.session.add_all([
+            Attendance(employee_id='TEST001', date=date(2024, 1, 2), check_in=datetime(2024, 1, 2, 9, 15),
+                       check_out=datetime(2024, 1, 2, 18, 30), status='Late', late_minutes=15),
+            Attendance(employee_id='TEST001', date=date(2024, 1, 3), status='Leave')
+        ])
+        db.session.commit()
+        
+        response = self.client.get(
+            '/api/reports/monthly?year=2024&month=1&format=columnar',
+            headers={**self.get_auth_headers(), 'Accept-Encoding': 'gzip'}
+        )
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        
+        attendance = json.loads(gzip.decompress(response.data))['attendance']
+        self.assertEqual(attendance['employee_ids'], ['TEST001'])
+        self.assertEqual(attendance['statuses'], ['Late', 'Leave'])
+        self.assertEqual(attendance['columns']['day'], [1, 2])
+        self.assertEqual(attendance['columns']['check_in'], [555, None])
+        self.assertEqual(attendance['columns']['check_out'], [1110, None])
+        self.assertEqual(attendance['columns']['status'], [0, 1])
+        
+        response = self.client.get('/api/reports/monthly?format=xml', headers=self.get_auth_headers())
+        self.assertEqual(response.status_code, 400)
+    
+    def test_metrics_are_off_by_default(self):
+        response = self.client.post('/api/auth/login', data=json.dumps({'employee_id': 'TEST001'}), content_type='application/json')
+        self.assertNotIn('Server-Timing', response.headers)
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        config['metrics'] = type('MetricsConfig', (TestingConfig,), {'METRICS_ENABLED': True})
+        self.app = create_app('metrics')
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Test User', department='Testing', email='test@example.com'))
+        db.session.commit()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        config.pop('metrics', None)
+    
+    def test_requests_and_sql_are_exported(self):
+        metrics = get_metrics()
+        metrics.slow_query_seconds = 1e-9
+        before = metrics.statements.value()
+        
+        with self.assertLogs('app.metrics', level='WARNING') as logs:
+            response = self.client.post('/api/auth/login', data=json.dumps({'employee_id': 'TEST001'}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Slow query', logs.output[0])
+        
+        # Only the statements issued by the request count towards it
+        statements = metrics.statements.value() - before
+        self.assertGreater(statements, 0)
+        self.assertIn(f'desc="{statements} statements"', response.headers['Server-Timing'])
+        
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.data.decode()
+        self.assertIn('http_requests_total{endpoint="auth.login",method="POST",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{endpoint="auth.login",method="POST"} 1', body)
+        self.assertIn(f'http_request_sql_statements_sum{{endpoint="auth.login",method="POST"}} {statements}', body)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="auth.login",method="POST",le="+Inf"} 1', body)
+        self.assertIn('# TYPE sql_slow_statements_total counter', body)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,1098 @@
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, date, timedelta
+from flask import Flask
+from sqlalchemy import event, func, text
+from config import config, TestingConfig
+from app import create_app
+from app.extensions import db
+from app.schema import BASELINE_REVISION
+from app.models import Employee, Attendance, AttendanceDailyAggregate
+from app.services.attendance_service import AttendanceService
+from app.services.employee_service import EmployeeService
+from app.services.employee_import_service import EmployeeImportService
+from app.services.report_service import ReportService
+from app.services.recalculation_service import RecalculationService
+from app.services.archive_service import ArchiveService
+from app.services.freshness_service import FreshnessService
+from app.policy import AttendancePolicy, get_policy
+from app.services.policy_service import PolicyService
+from app.roster import RosterCache, get_roster
+from app import employee_search as employee_search_module
+from app.employee_search import get_employee_search, invalidate_employee_search, roster_validator
+from app.services import job_service
+from app.services.punch_journal import PunchJournal, get_punch_journal, start_punch_journal
+from app.report_cache import ReportCache
+from app.storage import configure_storage
+from app.utils import upsert as upsert_module
+from app.utils.upsert import upsert
+
+class TestReportService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add_all([
+            Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'),
+            Employee(employee_id='TEST002', name='Bob', department='Testing', email='bob@example.com'),
+            Employee(employee_id='TEST003', name='Carol', department='Sales', email='carol@example.com')
+        ])
+        db.session.add_all([
+            Attendance(employee_id='TEST001', date=date(2024, 1, 2), check_in=datetime(2024, 1, 2, 9, 0),
+                       status='Present', overtime_minutes=30),
+            Attendance(employee_id='TEST001', date=date(2024, 1, 3), check_in=datetime(2024, 1, 3, 9, 15),
+                       status='Late', late_minutes=15),
+            # Weekend records are ignored by the summaries
+            Attendance(employee_id='TEST001', date=date(2024, 1, 6), check_in=datetime(2024, 1, 6, 9, 0),
+                       status='Present'),
+            Attendance(employee_id='TEST002', date=date(2024, 1, 2), status='Leave')
+        ])
+        db.session.commit()
+        
+        self.report_service = ReportService()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_department_summary_matches_employee_summary(self):
+        summary = self.report_service.generate_department_summary(2024, 1, 'Testing')
+        
+        self.assertEqual(summary['work_days'], 23)
+        self.assertEqual([row['employee_id'] for row in summary['employees']], ['TEST001', 'TEST002'])
+        
+        for row in summary['employees']:
+            expected = self.report_service.generate_employee_summary(row['employee_id'], 2024, 1)['statistics']
+            for key in ('present_days', 'late_days', 'absent_days', 'attendance_rate',
+                        'total_late_minutes', 'total_overtime_minutes'):
+                self.assertEqual(row[key], expected[key], key)
+        
+        self.assertEqual(summary['totals']['present_days'], 2)
+        self.assertEqual(summary['totals']['absent_days'], 44)
+    
+    def test_range_analytics_matches_row_based_reports(self):
+        self.report_service.aggregate_service.rebuild()
+        analytics = self.report_service.generate_range_analytics('2024-01-01', '2024-01-31')
+        statistics = self.report_service.get_attendance_statistics('2024-01-01', '2024-01-31')
+        
+        self.assertEqual(analytics['daily_statistics'], statistics['daily_statistics'])
+        self.assertEqual(analytics['overall_statistics'], statistics['overall_statistics'])
+        
+        summary = self.report_service.generate_department_summary(2024, 1)
+        self.assertEqual(analytics['employees'], summary['employees'])
+        
+        testing = next(row for row in analytics['departments'] if row['department'] == 'Testing')
+        self.assertEqual(testing['employees'], 2)
+        self.assertEqual(testing['present_days'], 2)
+        self.assertEqual(testing['absent_days'], 44)
+        self.assertEqual(testing['total_overtime_minutes'], 30)
+    
+    def test_range_analytics_skips_records_of_unknown_employees(self):
+        # e.g. a manual record for an unknown ID, or one outliving a deleted employee
+        db.session.add(Attendance(employee_id='GHOST', date=date(2024, 1, 4), check_in=datetime(2024, 1, 4, 9, 0),
+                                  status='Present'))
+        db.session.commit()
+        
+        analytics = self.report_service.generate_range_analytics('2024-01-01', '2024-01-31')
+        
+        self.assertNotIn('GHOST', [row['employee_id'] for row in analytics['employees']])
+        self.assertEqual(sum(row['present_days'] for row in analytics['departments']), 2)
+    
+    def test_daily_report_counts_and_pages_in_sql(self):
+        report = self.report_service.generate_daily_report('2024-01-02', 'Testing')
+        
+        self.assertEqual(report['total_employees'], 2)
+        self.assertEqual(report['present_count'], 1)
+        self.assertEqual(report['absent_count'], 1)
+        self.assertEqual(report['late_count'], 0)
+        self.assertEqual(
+            [(row['employee_id'], row['status'], row['check_in']) for row in report['attendance_list']],
+            [('TEST001', 'Present', '09:00:00'), ('TEST002', 'Absent', '-')]
+        )
+        
+        page = self.report_service.generate_daily_report('2024-01-02', page=2, limit=2)
+        self.assertEqual(page['total_employees'], 3)
+        self.assertEqual([row['employee_id'] for row in page['attendance_list']], ['TEST003'])
+    
+    def test_holidays_are_not_working_days_or_absences(self):
+        PolicyService().add_holiday(date(2024, 1, 1), "New Year's Day")
+        policy = get_policy()
+        
+        rng = random.Random(3)
+        for _ in range(50):
+            start = date(2023, 1, 1) + timedelta(days=rng.randrange(700))
+            end = start + timedelta(days=rng.randrange(400))
+            self.assertEqual(policy.working_days(start, end), len(policy.working_dates(start, end)))
+        
+        summary = self.report_service.generate_employee_summary('TEST002', 2024, 1)['statistics']
+        self.assertEqual((summary['work_days'], summary['absent_days']), (22, 22))
+        self.assertEqual(self.report_service.generate_department_summary(2024, 1)['work_days'], 22)
+        
+        report = self.report_service.generate_daily_report('2024-01-01')
+        self.assertEqual(report['absent_count'], 0)
+        self.assertEqual({row['status'] for row in report['attendance_list']}, {'Holiday'})
+
+class TestEmployeeImportService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        self.import_service = EmployeeImportService()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_a_key_taken_mid_import_only_rejects_its_row(self):
+        def rows():
+            yield 2, {'employee_id': 'IMP001', 'name': 'Ann'}
+            # Another writer creates IMP002 after the existing keys were loaded
+            db.session.add(Employee(employee_id='IMP002', name='Ben'))
+            db.session.commit()
+            yield 3, {'employee_id': 'IMP002', 'name': 'Ben'}
+            yield 4, {'employee_id': 'IMP003', 'name': 'Cat'}
+        
+        entries = list(self.import_service.import_employees(rows()))
+        
+        self.assertEqual(entries, [
+            {'row': 3, 'employee_id': 'IMP002', 'errors': ['Employee ID or email already exists']},
+            {'summary': {'rows': 3, 'imported': 2, 'failed': 1}}
+        ])
+        self.assertEqual(Employee.query.count(), 3)
+    
+    def test_reader_failure_still_ends_with_error_and_summary(self):
+        def rows():
+            yield 2, {'employee_id': 'IMP001', 'name': 'Ann'}
+            raise KeyError('worksheet vanished')
+        
+        entries = list(self.import_service.import_employees(rows()))
+        
+        self.assertEqual(len(entries), 2)
+        self.assertIn('worksheet vanished', entries[0]['error'])
+        self.assertEqual(entries[1]['summary']['imported'], 1)
+        self.assertEqual(entries[1]['summary']['error'], entries[0]['error'])
+        self.assertEqual(Employee.query.one().employee_id, 'IMP001')
+
+class TestRosterCache(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Alice', department='Testing'))
+        db.session.commit()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_check_in_uses_roster_and_writes_invalidate(self):
+        attendance_service = AttendanceService()
+        
+        attendance_service.get_today_status('TEST001')
+        self.assertEqual(get_roster().stats()['misses'], 1)
+        self.assertTrue(attendance_service.check_in('TEST001')['success'])
+        self.assertEqual(get_roster().stats()['hits'], 1)
+        
+        EmployeeService().toggle_employee_status('TEST001', False)
+        self.assertFalse(get_roster().get('TEST001')['is_active'])
+        self.assertEqual(get_roster().stats()['misses'], 2)
+    
+    def test_roster_is_bounded(self):
+        self.app.extensions['roster_cache'] = RosterCache(max_size=2)
+        db.session.add_all([Employee(employee_id=f'TEST00{index}', name='Bob') for index in range(2, 5)])
+        db.session.commit()
+        
+        for index in range(1, 5):
+            get_roster().get(f'TEST00{index}')
+        
+        stats = get_roster().stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['evictions'], 2)
+
+class TestEmployeeSearch(unittest.TestCase):
+    def setUp(self):
+        # Builds run on their own thread, so they need a real database file
+        self.directory = tempfile.TemporaryDirectory()
+        config['search'] = type('SearchConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.directory.name, 'attendance.db'),
+            'REPORT_JOB_DIR': os.path.join(self.directory.name, 'jobs'),
+            'EMPLOYEE_SEARCH_BACKGROUND_BUILD': True
+        })
+        self.app = create_app('search')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        
+        db.session.add_all([
+            Employee(employee_id='TEST001', name='Dana Martins', department='Sales', email='dana@example.com'),
+            Employee(employee_id='TEST002', name='Martin Diaz', department='Support', email='martin@example.com')
+        ])
+        db.session.commit()
+        
+        # Builds wait for this, so a test can observe searches during one
+        self.release = threading.Event()
+        self.load_search_state = employee_search_module.load_search_state
+        def held_load():
+            self.release.wait(5)
+            return self.load_search_state()
+        employee_search_module.load_search_state = held_load
+    
+    def tearDown(self):
+        self.release.set()
+        self.wait_for_build()
+        employee_search_module.load_search_state = self.load_search_state
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        config.pop('search', None)
+        self.directory.cleanup()
+    
+    def wait_for_build(self):
+        deadline = time.monotonic() + 5
+        while get_employee_search().stats()['rebuilding'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(get_employee_search().stats()['rebuilding'])
+    
+    def names(self, term):
+        employees, _ = get_employee_search().search(term)
+        return [employee['name'] for employee in employees]
+    
+    def test_database_answers_until_the_first_build_finishes(self):
+        # Matched anywhere and ordered by name, without prefix ranking
+        self.assertEqual(self.names('martin'), ['Dana Martins', 'Martin Diaz'])
+        self.assertEqual(get_employee_search().stats(), {
+            'built': False, 'rebuilding': True, 'employees': 0, 'trigrams': 0
+        })
+        
+        self.release.set()
+        self.wait_for_build()
+        self.assertEqual(self.names('martin'), ['Martin Diaz', 'Dana Martins'])
+    
+    def test_previous_generation_answers_during_a_rebuild(self):
+        self.release.set()
+        get_employee_search().search('warm-up')
+        self.wait_for_build()
+        
+        self.release.clear()
+        db.session.add(Employee(employee_id='TEST003', name='Ann Smartin', department='Sales'))
+        db.session.commit()
+        invalidate_employee_search()
+        self.assertEqual(self.names('martin'), ['Martin Diaz', 'Dana Martins'])
+        
+        self.release.set()
+        self.wait_for_build()
+        self.assertEqual(self.names('martin'), ['Martin Diaz', 'Dana Martins', 'Ann Smartin'])
+    
+    def test_local_writes_do_not_trigger_a_rebuild(self):
+        self.release.set()
+        index = get_employee_search()
+        index.search('warm-up')
+        self.wait_for_build()
+        
+        service = EmployeeService()
+        service.create_employee({'employee_id': 'TEST003', 'name': 'Ann Smartin', 'email': 'ann@example.com'})
+        service.update_employee('TEST001', {'name': 'Dana Lee'})
+        service.delete_employee('TEST002')
+        self.assertEqual(index._state.validator, roster_validator())
+        
+        index._checked_at = 0
+        self.assertEqual(self.names('mart'), ['Ann Smartin'])
+        self.assertFalse(index.stats()['rebuilding'])
+    
+    def test_shared_segments_and_terms_spanning_them(self):
+        self.release.set()
+        get_employee_search().search('warm-up')
+        self.wait_for_build()
+        
+        self.assertEqual(self.names('example.com'), ['Dana Martins', 'Martin Diaz'])
+        self.assertEqual(self.names('n@example'), ['Martin Diaz'])
+        self.assertEqual(self.names('xample'), ['Dana Martins', 'Martin Diaz'])
+
+class TestAggregateService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add_all([
+            Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'),
+            Employee(employee_id='TEST002', name='Bob', department='Sales', email='bob@example.com')
+        ])
+        db.session.commit()
+        
+        self.attendance_service = AttendanceService()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def snapshot(self):
+        return sorted(
+            (row.date, row.department, row.status, row.count)
+            for row in AttendanceDailyAggregate.query.all()
+            if row.count
+        )
+    
+    def test_writes_keep_rollup_in_sync(self):
+        self.attendance_service.check_in('TEST001')
+        self.attendance_service.check_out('TEST001')
+        self.attendance_service.create_manual_attendance({
+            'employee_id': 'TEST002', 'date': '2024-01-15', 'check_in_time': '09:40:00'
+        })
+        attendance = self.attendance_service.create_manual_attendance({
+            'employee_id': 'TEST002', 'date': '2024-01-16', 'status': 'Leave'
+        })
+        self.attendance_service.update_attendance(attendance.id, {'check_in_time': '08:55:00'})
+        self.attendance_service.batch_punch([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-15 09:05:00'},
+            {'employee_id': 'TEST001', 'type': 'check_out', 'timestamp': '2024-01-15 19:00:00'}
+        ])
+        EmployeeService().update_employee('TEST002', {'department': 'Support'})
+        
+        maintained = self.snapshot()
+        result = self.app.test_cli_runner().invoke(args=['rebuild-aggregates'])
+        self.assertIn('Rebuilt', result.output)
+        self.assertEqual(maintained, self.snapshot())
+        
+        statistics = ReportService().get_attendance_statistics('2024-01-15', '2024-01-16', 'Support')
+        self.assertEqual(statistics['overall_statistics']['total_records'], 2)
+        self.assertEqual(statistics['overall_statistics']['total_present'], 1)
+
+class TestRecalculationService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'))
+        
+        # Random punches, including exact lunch and start-time boundaries
+        rng = random.Random(7)
+        boundaries = ['08:30:00', '08:30:30', '11:30:00', '12:00:00', '12:30:00']
+        for day in range(300):
+            check_in = datetime(2023, 1, 1) + timedelta(days=day)
+            if day < len(boundaries):
+                check_in = datetime.strptime(f'{check_in:%Y-%m-%d} {boundaries[day]}', '%Y-%m-%d %H:%M:%S')
+            else:
+                check_in += timedelta(seconds=rng.randrange(7 * 3600, 13 * 3600))
+            check_out = check_in + timedelta(seconds=rng.randrange(0, 11 * 3600)) if day % 7 else None
+            
+            attendance = Attendance(employee_id='TEST001', date=check_in.date(), check_in=check_in, check_out=check_out)
+            attendance.calculate_status()
+            db.session.add(attendance)
+        db.session.commit()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_matches_calculate_status_and_skips_unchanged_rows(self):
+        policy = AttendancePolicy({
+            'work_start_time': '08:30',
+            'late_threshold_minutes': '20',
+            'overtime_after_hours': '7.5',
+            'lunch_start_time': '11:30',
+            'lunch_end_time': '12:30'
+        })
+        service = RecalculationService()
+        
+        result = service.recalculate(policy=policy, chunk_size=64)
+        self.assertEqual(result['scanned'], 300)
+        self.assertGreater(result['updated'], 0)
+        
+        for row in Attendance.query.all():
+            expected = Attendance(check_in=row.check_in, check_out=row.check_out)
+            expected.calculate_status(policy=policy)
+            self.assertEqual(
+                (row.status, row.late_minutes or 0, row.overtime_minutes or 0),
+                (expected.status, expected.late_minutes or 0, expected.overtime_minutes or 0)
+            )
+        
+        self.assertEqual(service.recalculate(policy=policy)['updated'], 0)
+        
+        statistics = ReportService().get_attendance_statistics('2023-01-01', '2023-12-31')
+        self.assertEqual(
+            statistics['overall_statistics']['total_late'],
+            Attendance.query.filter_by(status='Late').count()
+        )
+
+class TestConcurrentPunches(unittest.TestCase):
+    def setUp(self):
+        # Concurrency needs a real database file shared by several connections
+        self.directory = tempfile.TemporaryDirectory()
+        config['concurrent'] = type('ConcurrentConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.directory.name, 'attendance.db'),
+            'REPORT_JOB_DIR': os.path.join(self.directory.name, 'jobs')
+        })
+        self.app = create_app('concurrent')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'))
+        db.session.commit()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        config.pop('concurrent', None)
+        self.directory.cleanup()
+    
+    def run_concurrently(self, func, count=8):
+        results = []
+        barrier = threading.Barrier(count)
+        
+        def worker():
+            with self.app.app_context():
+                barrier.wait()
+                try:
+                    results.append(func(AttendanceService()))
+                except Exception as e:
+                    results.append(e)
+                finally:
+                    db.session.remove()
+        
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_duplicate_check_ins_are_harmless(self):
+        results = self.run_concurrently(lambda service: service.check_in('TEST001'))
+        
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        self.assertEqual(sum(1 for result in results if result['success']), 1)
+        self.assertEqual(Attendance.query.count(), 1)
+        self.assertEqual(sum(row.count for row in AttendanceDailyAggregate.query), 1)
+    
+    def test_concurrent_manual_attendance_upserts_one_row(self):
+        results = self.run_concurrently(lambda service: service.create_manual_attendance({
+            'employee_id': 'TEST001', 'date': '2024-01-15', 'check_in_time': '09:10:00'
+        }))
+        
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        self.assertEqual(Attendance.query.count(), 1)
+        self.assertEqual(
+            [(row.status, row.count) for row in AttendanceDailyAggregate.query if row.count],
+            [('Late', 1)]
+        )
+    
+    def test_manual_attendance_moves_the_replaced_status_bucket(self):
+        service = AttendanceService()
+        service.create_manual_attendance({'employee_id': 'TEST001', 'date': '2024-01-15', 'status': 'Absent'})
+        # Another row's punch lands in the same buckets in between
+        service.aggregate_service.record_change(date(2024, 1, 15), 'Testing', new_status='Absent', is_new=True)
+        db.session.commit()
+        service.create_manual_attendance({'employee_id': 'TEST001', 'date': '2024-01-15', 'check_in_time': '09:00:00'})
+        
+        self.assertEqual(
+            sorted((row.status, row.count) for row in AttendanceDailyAggregate.query if row.count),
+            [('Absent', 1), ('Present', 1)]
+        )
+    
+    def test_concurrent_rollup_adjustments_all_count(self):
+        def adjust(service):
+            service.aggregate_service.record_change(date(2024, 1, 15), 'Testing', new_status='Present', is_new=True)
+            db.session.commit()
+        
+        results = self.run_concurrently(adjust)
+        
+        self.assertFalse([result for result in results if isinstance(result, Exception)])
+        self.assertEqual([row.count for row in AttendanceDailyAggregate.query], [8])
+
+class TestUpsert(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_native_and_select_first_upserts_agree(self):
+        def build_update(excluded):
+            return {'check_in': func.coalesce(excluded.check_in, Attendance.check_in), 'status': excluded.status}
+        
+        for strategy in (upsert, upsert_module._upsert_select_first):
+            employee_id = strategy.__name__
+            key = {'employee_id': employee_id, 'date': date(2024, 1, 15)}
+            check_in = datetime(2024, 1, 15, 9, 0)
+            outcomes = [
+                strategy(Attendance, dict(key, check_in=check_in, status='Present'), ['employee_id', 'date'], build_update, None),
+                strategy(Attendance, dict(key, status='Late'), ['employee_id', 'date'], build_update, None),
+                strategy(Attendance, dict(key, status='Absent'), ['employee_id', 'date'], build_update,
+                         where=Attendance.check_in.is_(None))
+            ]
+            db.session.commit()
+            
+            self.assertEqual([inserted for _, inserted in outcomes], [True, False, False], employee_id)
+            self.assertIsNone(outcomes[2][0])
+            attendance = Attendance.query.filter_by(employee_id=employee_id).one()
+            self.assertEqual((attendance.check_in, attendance.status), (check_in, 'Late'))
+    
+    def test_upsert_reports_the_values_it_replaced(self):
+        def build_update(excluded):
+            return {'status': excluded.status}
+        
+        for strategy in (upsert, upsert_module._upsert_select_first):
+            key = {'employee_id': strategy.__name__, 'date': date(2024, 1, 15)}
+            outcomes = [
+                strategy(Attendance, dict(key, status='Present'), ['employee_id', 'date'], build_update, None, ['status']),
+                strategy(Attendance, dict(key, status='Late'), ['employee_id', 'date'], build_update, None, ['status'])
+            ]
+            db.session.commit()
+            
+            self.assertEqual([(inserted, replaced) for _, inserted, replaced in outcomes],
+                             [(True, None), (False, ('Present',))], strategy.__name__)
+            self.assertEqual(outcomes[1][0].status, 'Late')
+
+class TestArchiveService(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'))
+        for day in (date(2022, 3, 1), date(2022, 12, 30), date(2023, 1, 2), date(2024, 1, 2)):
+            db.session.add(Attendance(employee_id='TEST001', date=day, check_in=datetime.combine(day, datetime.min.time()).replace(hour=9, minute=20)))
+        for attendance in Attendance.query:
+            attendance.calculate_status()
+        db.session.commit()
+        
+        self.attendance_service = AttendanceService()
+        self.report_service = ReportService()
+    
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+    
+    def test_reads_span_hot_and_archived_years(self):
+        history = self.attendance_service.get_attendance_history('TEST001', '2022-01-01', '2024-12-31')
+        monthly = self.report_service.generate_monthly_report(2022, 3)
+        summary = self.report_service.generate_employee_summary('TEST001', 2022, 12)
+        
+        archived = ArchiveService().archive_before(2024)
+        
+        self.assertEqual(archived, [{'year': 2022, 'row_count': 2}, {'year': 2023, 'row_count': 1}])
+        self.assertEqual([row.date for row in Attendance.query], [date(2024, 1, 2)])
+        self.assertEqual(self.attendance_service.get_attendance_history('TEST001', '2022-01-01', '2024-12-31'), history)
+        self.assertEqual(self.report_service.generate_monthly_report(2022, 3), monthly)
+        self.assertEqual(self.report_service.generate_employee_summary('TEST001', 2022, 12), summary)
+        
+        # Cursor pages walk from the hot table into the archive
+        items, cursor, total = self.attendance_service.get_attendance_history_page('TEST001', limit=2, with_total=True)
+        more, cursor, _ = self.attendance_service.get_attendance_history_page('TEST001', cursor=cursor, limit=2)
+        self.assertEqual(total, 4)
+        self.assertEqual([item['date'] for item in items + more], ['2024-01-02', '2023-01-02', '2022-12-30', '2022-03-01'])
+        self.assertIsNone(cursor)
+    
+    def test_reports_and_exports_read_archived_years(self):
+        days = [date(2022, 12, 1) + timedelta(days=offset) for offset in range(31)]
+        
+        def snapshot():
+            return (
+                self.report_service.generate_daily_report('2022-03-01'),
+                self.report_service.generate_department_summary(2022, 12),
+                self.report_service.generate_range_analytics('2022-12-01', '2023-01-31'),
+                list(self.report_service.stream_range_report_csv('2022-01-01', '2024-12-31')),
+                list(self.report_service._iter_monthly_matrix_rows(days[0], days[-1], days, set(days))),
+                FreshnessService().attendance(date(2022, 1, 1), date(2023, 12, 31))[1]
+            )
+        
+        before = snapshot()
+        ArchiveService().archive_before(2024)
+        self.assertEqual(snapshot(), before)
+        self.assertEqual(before[0]['present_count'], 1)
+        self.assertEqual(before[-1], 3)
+    
+    def test_recalculation_leaves_archived_years_alone(self):
+        ArchiveService().archive_before(2024)
+        
+        with self.assertRaises(ValueError):
+            RecalculationService().recalculate(date(2022, 1, 1), date(2023, 12, 31))
+        self.assertEqual(RecalculationService().recalculate(date(2022, 1, 1))['scanned'], 1)
+    
+    def test_archived_years_are_closed(self):
+        ArchiveService().archive_before(2023)
+        
+        with self.assertRaises(ValueError):
+            self.attendance_service.create_manual_attendance({'employee_id': 'TEST001', 'date': '2022-06-01'})
+        with self.assertRaises(ValueError):
+            ArchiveService().archive_before(date.today().year + 1)
+        
+        results = self.attendance_service.batch_punch([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2022-06-01 09:00:00'}
+        ])
+        self.assertFalse(results[0]['success'])
+
+class TestPunchJournal(unittest.TestCase):
+    def setUp(self):
+        # The applier runs on its own thread, so it needs a real database file
+        self.directory = tempfile.TemporaryDirectory()
+        self.journal_dir = os.path.join(self.directory.name, 'journal')
+        self.worker_dir = os.path.join(self.journal_dir, 'worker-0')
+        config['journal'] = type('JournalConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(self.directory.name, 'attendance.db'),
+            'REPORT_JOB_DIR': os.path.join(self.directory.name, 'jobs'),
+            'PUNCH_INGEST_MODE': 'journal',
+            'PUNCH_JOURNAL_DIR': self.journal_dir
+        })
+        self.app = create_app('journal')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        
+        db.session.add(Employee(employee_id='TEST001', name='Alice', department='Testing', email='alice@example.com'))
+        db.session.commit()
+    
+    def tearDown(self):
+        journal = get_punch_journal()
+        if journal:
+            journal.close()
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        config.pop('journal', None)
+        self.directory.cleanup()
+    
+    def test_acknowledged_punches_are_applied(self):
+        journal = get_punch_journal()
+        _, last_seq = journal.append([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-15 09:10:00'},
+            {'employee_id': 'TEST001', 'type': 'check_out', 'timestamp': '2024-01-15 18:00:00'},
+            {'employee_id': 'NOBODY', 'type': 'check_in', 'timestamp': '2024-01-15 09:00:00'}
+        ])
+        
+        self.assertLessEqual(last_seq, journal.durable_seq)
+        self.assertTrue(journal.wait_applied(last_seq, timeout=5))
+        
+        db.session.remove()
+        attendance = Attendance.query.one()
+        self.assertEqual(attendance.status, 'Late')
+        self.assertEqual(attendance.check_out, datetime(2024, 1, 15, 18, 0))
+        self.assertEqual(journal.status()['applied'], 2)
+        self.assertEqual(journal.status()['rejected'], 1)
+    
+    def test_unapplied_entries_are_replayed_on_startup(self):
+        get_punch_journal().close()
+        
+        # A process that acknowledged punches but died before applying them
+        crashed = PunchJournal(self.app, self.worker_dir)
+        crashed.start(apply=False)
+        _, last_seq = crashed.append([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-16 08:50:00'}
+        ])
+        crashed.close()
+        with open(crashed.journal_path, 'ab') as journal_file:
+            journal_file.write(b'{"seq":99,"ev')
+        
+        replayed = PunchJournal(self.app, self.worker_dir)
+        replayed.start()
+        try:
+            self.assertTrue(replayed.wait_applied(last_seq, timeout=5))
+            self.assertEqual(replayed.status()['appended_seq'], last_seq)
+        finally:
+            replayed.close()
+        
+        db.session.remove()
+        self.assertEqual(Attendance.query.one().status, 'Present')
+    
+    def test_unappliable_entries_are_dead_lettered(self):
+        db.session.add(Employee(employee_id='TEST002', name='Bob', department='Testing', email='bob@example.com'))
+        db.session.execute(text(
+            "CREATE TRIGGER reject_test002 BEFORE INSERT ON attendance WHEN NEW.employee_id = 'TEST002' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected by trigger'); END"
+        ))
+        db.session.commit()
+        
+        journal = get_punch_journal()
+        journal.append([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-17 09:00:00'},
+            {'employee_id': 'TEST002', 'type': 'check_in', 'timestamp': '2024-01-17 09:00:00'}
+        ])
+        _, last_seq = journal.append([
+            {'employee_id': 'TEST001', 'type': 'check_out', 'timestamp': '2024-01-17 18:00:00'}
+        ])
+        self.assertTrue(journal.wait_applied(last_seq, timeout=5))
+        
+        db.session.remove()
+        attendance = Attendance.query.one()
+        self.assertEqual(attendance.employee_id, 'TEST001')
+        self.assertEqual(attendance.check_out, datetime(2024, 1, 17, 18, 0))
+        self.assertEqual(journal.status()['dead_lettered'], 1)
+        
+        with open(journal.dead_letter_path) as dead_letter:
+            records = [json.loads(line) for line in dead_letter]
+        self.assertEqual([record['event']['employee_id'] for record in records], ['TEST002'])
+        self.assertIn('rejected by trigger', records[0]['error'])
+    
+    def test_second_journal_on_the_same_directory_is_refused(self):
+        journal = get_punch_journal()
+        with self.assertRaises(RuntimeError):
+            PunchJournal(self.app, self.worker_dir)
+        
+        # The running journal is unaffected
+        _, last_seq = journal.append([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-18 09:00:00'}
+        ])
+        self.assertTrue(journal.wait_applied(last_seq, timeout=5))
+    
+    def test_journal_is_not_opened_until_first_use(self):
+        # create_app alone (e.g. for a flask CLI command) must not claim a directory
+        self.assertNotIn('punch_journal', self.app.extensions)
+        self.assertFalse(os.path.exists(self.journal_dir))
+        
+        self.app.test_client().get('/api/attendance/journal')
+        self.assertEqual(get_punch_journal().directory, self.worker_dir)
+    
+    def test_each_process_claims_its_own_directory(self):
+        journal = get_punch_journal()
+        
+        # Another worker sharing PUNCH_JOURNAL_DIR takes the next directory
+        other_app = create_app('journal')
+        other = start_punch_journal(other_app)
+        try:
+            self.assertEqual(other.directory, os.path.join(self.journal_dir, 'worker-1'))
+            self.assertNotEqual(other.directory, journal.directory)
+        finally:
+            other.close()
+            other_app.extensions['punch_journal_drain'].join(timeout=5)
+    
+    def test_falls_back_to_direct_mode_when_every_directory_is_taken(self):
+        get_punch_journal()
+        
+        config['journal'].PUNCH_JOURNAL_MAX_WORKERS = 1
+        other_app = create_app('journal')
+        with self.assertLogs('app.services.punch_journal', 'WARNING'):
+            self.assertIsNone(start_punch_journal(other_app))
+        
+        with other_app.app_context():
+            self.assertIsNone(get_punch_journal())
+            token = other_app.test_client().post('/api/auth/login', json={'employee_id': 'TEST001'}).json['access_token']
+            response = other_app.test_client().get('/api/attendance/journal', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.json, {'mode': 'direct'})
+    
+    def test_abandoned_directories_are_drained(self):
+        # A worker from a larger pool acknowledged punches and never came back
+        abandoned_dir = os.path.join(self.journal_dir, 'worker-3')
+        os.makedirs(abandoned_dir)
+        abandoned = PunchJournal(self.app, abandoned_dir)
+        abandoned.start(apply=False)
+        abandoned.append([
+            {'employee_id': 'TEST001', 'type': 'check_in', 'timestamp': '2024-01-19 09:20:00'}
+        ])
+        abandoned.close()
+        
+        self.assertEqual(get_punch_journal().directory, self.worker_dir)
+        drain = self.app.extensions['punch_journal_drain']
+        drain.join(timeout=5)
+        self.assertFalse(drain.is_alive())
+        
+        db.session.remove()
+        self.assertEqual(Attendance.query.one().status, 'Late')
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.apps = []
+    
+    def tearDown(self):
+        for app in self.apps:
+            with app.app_context():
+                db.engine.dispose()
+        config.pop('storage', None)
+        self.directory.cleanup()
+    
+    def create_app(self, **settings):
+        config['storage'] = type('StorageConfig', (TestingConfig,), {
+            'REPORT_JOB_DIR': os.path.join(self.directory.name, 'jobs'),
+            **settings
+        })
+        app = create_app('storage')
+        self.apps.append(app)
+        return app
+    
+    def pragmas(self, app, *names):
+        with app.app_context(), db.engine.connect() as connection:
+            return [connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in names]
+    
+    def test_file_database_gets_wal_and_pragmas(self):
+        app = self.create_app(SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(self.directory.name, 'attendance.db'))
+        
+        self.assertEqual(
+            self.pragmas(app, 'journal_mode', 'busy_timeout', 'synchronous', 'mmap_size'),
+            ['wal', 15000, 1, 256 * 1024 * 1024]
+        )
+    
+    def test_in_memory_database_skips_wal_and_mmap(self):
+        app = self.create_app()
+        
+        # mmap_size reads back empty on a memory database, so trace what a new connection runs
+        statements = []
+        with app.app_context():
+            db.engine.dispose()
+            event.listen(
+                db.engine, 'connect',
+                lambda dbapi_connection, _: dbapi_connection.set_trace_callback(statements.append),
+                insert=True
+            )
+        
+        self.assertEqual(self.pragmas(app, 'journal_mode', 'busy_timeout'), ['memory', 15000])
+        self.assertIn('PRAGMA busy_timeout=15000', statements)
+        self.assertFalse([statement for statement in statements if statement.startswith(('PRAGMA journal_mode=', 'PRAGMA mmap_size='))])
+    
+    def test_explicit_engine_options_are_kept(self):
+        options = {'connect_args': {'timeout': 1}}
+        app = self.create_app(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + os.path.join(self.directory.name, 'attendance.db'),
+            SQLALCHEMY_ENGINE_OPTIONS=options
+        )
+        self.assertEqual(app.config['SQLALCHEMY_ENGINE_OPTIONS'], {'connect_args': {'timeout': 1}})
+        
+        # Server databases get pool defaults only where none were given
+        server = Flask(__name__)
+        server.config.from_object(TestingConfig)
+        server.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://attendance@localhost/attendance'
+        server.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 3, 'pool_pre_ping': False}
+        configure_storage(server)
+        self.assertEqual(server.config['SQLALCHEMY_ENGINE_OPTIONS'], {
+            'pool_size': 3, 'pool_pre_ping': False, 'max_overflow': 20, 'pool_recycle': 1800
+        })
+
+class TestSchemaCheck(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, 'attendance.db')
+        versions = os.path.join(self.directory.name, 'migrations', 'versions')
+        os.makedirs(versions)
+        with open(os.path.join(versions, 'a1b2c3d4e5f6_initial.py'), 'w') as revision:
+            revision.write("revision = 'a1b2c3d4e5f6'\ndown_revision = None\n")
+        
+        config['schema_check'] = type('SchemaCheckConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + self.database,
+            'REPORT_JOB_DIR': os.path.join(self.directory.name, 'jobs'),
+            'MIGRATIONS_DIR': os.path.join(self.directory.name, 'migrations'),
+            'SCHEMA_MODE': 'check'
+        })
+    
+    def tearDown(self):
+        config.pop('schema_check', None)
+        self.directory.cleanup()
+    
+    def test_unmigrated_database_refuses_to_start(self):
+        with self.assertRaisesRegex(RuntimeError, 'flask db upgrade'):
+            create_app('schema_check')
+        
+        with sqlite3.connect(self.database) as connection:
+            tables = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        self.assertEqual(tables, [])
+    
+    def test_database_at_head_starts(self):
+        with sqlite3.connect(self.database) as connection:
+            connection.execute('CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)')
+            connection.execute("INSERT INTO alembic_version VALUES ('a1b2c3d4e5f6')")
+        
+        app = create_app('schema_check')
+        with app.app_context():
+            db.engine.dispose()
+    
+    def test_migrations_build_the_model_schema(self):
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+        from flask_migrate import upgrade
+        
+        config['schema_check'].MIGRATIONS_DIR = TestingConfig.MIGRATIONS_DIR
+        config['schema_check'].SCHEMA_MODE = 'skip'
+        app = create_app('schema_check')
+        with app.app_context():
+            # A database built by create_all before migrations existed
+            upgrade(revision=BASELINE_REVISION)
+            db.session.execute(text("INSERT INTO employee (employee_id, name, department) VALUES ('TEST001', 'Alice', 'Testing')"))
+            db.session.execute(text("INSERT INTO attendance (employee_id, date, status) VALUES ('TEST001', '2024-01-02', 'Late')"))
+            db.session.commit()
+            
+            upgrade()
+            bucket = AttendanceDailyAggregate.query.one()
+            self.assertEqual((bucket.date, bucket.department, bucket.status, bucket.count), (date(2024, 1, 2), 'Testing', 'Late', 1))
+            
+            ArchiveService().archive_year(2024)
+            with db.engine.connect() as connection:
+                differences = compare_metadata(MigrationContext.configure(connection, opts={
+                    'include_object': app.extensions['migrate'].configure_args.get('include_object')
+                }), db.metadata)
+            db.session.remove()
+            db.engine.dispose()
+        
+        # Archive tables live outside the models and are not a difference
+        self.assertEqual([difference for difference in differences if 'attendance_archive_' not in repr(difference)], [])
+        
+        config['schema_check'].SCHEMA_MODE = 'check'
+        app = create_app('schema_check')
+        with app.app_context():
+            db.engine.dispose()
+
+class TestStartupImports(unittest.TestCase):
+    def test_heavy_modules_load_on_first_use(self):
+        # A fresh interpreter, since this one has already imported everything
+        loaded = subprocess.run(
+            [sys.executable, '-c', 'import sys; from app import create_app; print(" ".join(sorted(sys.modules)))'],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        
+        for module in ('numpy', 'openpyxl', 'pandas'):
+            self.assertNotIn(module, loaded)
+
+class TestReportCache(unittest.TestCase):
+    def test_invalidation_is_scoped(self):
+        cache = ReportCache()
+        cache.set('january', b'{}', date(2024, 1, 1), date(2024, 1, 31))
+        cache.set('today-sales', b'{}', date(2024, 2, 5), date(2024, 2, 5), department='Sales')
+        cache.set('today-testing', b'{}', date(2024, 2, 5), date(2024, 2, 5), department='Testing')
+        cache.set('bob', b'{}', date(2024, 2, 1), date(2024, 2, 29), employee_id='TEST002')
+        
+        cache.invalidate({date(2024, 2, 5)}, {'Testing'}, {'TEST001'})
+        
+        self.assertIsNotNone(cache.get('january'))
+        self.assertIsNotNone(cache.get('today-sales'))
+        self.assertIsNone(cache.get('today-testing'))
+        self.assertIsNotNone(cache.get('bob'))
+        
+        # Roster changes touch every date of company-wide reports
+        cache.invalidate(None, {'Sales'}, {'TEST002'})
+        self.assertIsNone(cache.get('today-sales'))
+        self.assertIsNone(cache.get('bob'))
+        self.assertIsNone(cache.get('january'))
+    
+    def test_memory_cap_evicts_least_recently_used(self):
+        cache = ReportCache(max_bytes=10)
+        cache.set('a', b'aaaa', date(2024, 1, 1), date(2024, 1, 1))
+        cache.set('b', b'bbbb', date(2024, 1, 1), date(2024, 1, 1))
+        cache.get('a')
+        cache.set('c', b'cccc', date(2024, 1, 1), date(2024, 1, 1))
+        
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.stats()['bytes'], 8)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+class TestReportJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.result_dir = tempfile.TemporaryDirectory()
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        
+        self.queue = job_service.ReportJobQueue(self.app, self.result_dir.name)
+        self.release = threading.Event()
+        job_service.JOB_TYPES['blocking'] = (
+            lambda service, params, path: self.release.wait(5) and job_service._write_json(path, params),
+            'application/json', 'json'
+        )
+    
+    def tearDown(self):
+        job_service.JOB_TYPES.pop('blocking', None)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.result_dir.cleanup()
+    
+    def test_identical_in_flight_jobs_are_shared(self):
+        first = self.queue.submit('blocking', {'month': 1})
+        second = self.queue.submit('blocking', {'month': 1})
+        other = self.queue.submit('blocking', {'month': 2})
+        
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        
+        self.release.set()
+        job = self.queue.wait(first.id, timeout=5)
+        self.assertEqual(job.status, 'completed')
+        with open(job.path) as result:
+            self.assertEqual(json.load(result), {'month': 1})
+        
+        # Finished jobs no longer absorb new requests
+        again = self.queue.submit('blocking', {'month': 1})
+        self.assertIsNot(again, first)
+        
+        # Nothing may still be writing when tearDown removes the directory
+        for job in (other, again):
+            self.assertEqual(self.queue.wait(job.id, timeout=5).status, 'completed')
+    
+    def test_statistics_job_runs_in_app_context(self):
+        job = self.queue.submit('statistics', {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+        job = self.queue.wait(job.id, timeout=5)
+        
+        self.assertEqual(job.status, 'completed', job.error)
+        with open(job.path) as result:
+            self.assertEqual(json.load(result)['overall_statistics']['total_records'], 0)
+    
+    def test_jobs_are_shared_through_the_result_directory(self):
+        # A second queue on the same directory stands in for another worker process
+        other = job_service.ReportJobQueue(self.app, self.result_dir.name)
+        first = self.queue.submit('blocking', {'month': 1})
+        
+        self.assertEqual(other.submit('blocking', {'month': 1}).id, first.id)
+        self.assertFalse(other.get(first.id).finished)
+        
+        self.release.set()
+        job = other.wait(first.id, timeout=5)
+        self.assertEqual(job.status, 'completed')
+        with open(job.path) as result:
+            self.assertEqual(json.load(result), {'month': 1})
+    
+    def test_sweep_cleans_up_after_stopped_processes(self):
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        stopped = job_service.ReportJob('blocking', {'month': 1}, 'stopped')
+        stopped.pid = process.pid
+        expired = job_service.ReportJob('blocking', {'month': 2}, 'expired')
+        expired.status = 'completed'
+        expired.path = os.path.join(self.result_dir.name, f'{expired.id}.json')
+        expired.expires_at = time.time() - 1
+        for job in (stopped, expired):
+            self.queue._save(job)
+        job_service._write_json(expired.path, {})
+        job_service._write_json(os.path.join(self.result_dir.name, f'{stopped.id}.json.part'), {})
+        with open(os.path.join(self.result_dir.name, 'stopped.inflight'), 'w') as marker:
+            marker.write(stopped.id)
+        
+        self.queue.sweep()
+        
+        self.assertEqual(sorted(os.listdir(self.result_dir.name)), [f'{stopped.id}.job'])
+        job = self.queue.get(stopped.id)
+        self.assertEqual((job.status, job.error), ('failed', 'Interrupted before it finished'))
+        self.assertIsNone(self.queue.get(expired.id))
+
+if __name__ == '__main__':
+    unittest.main()
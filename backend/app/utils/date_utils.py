@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta, time
+import calendar
+from datetime import datetime, date, timedelta, time
 
 def is_weekend(date_obj):
     return date_obj.weekday() >= 5  # 5 = Saturday, 6 = Sunday
@@ -22,13 +23,18 @@ def get_working_days(start_date, end_date, holidays=None):
     
     return days
 
-def get_working_hours(check_in, check_out):
+def get_month_range(year, month):
+    start_date = date(year, month, 1)
+    end_date = date(year, month, calendar.monthrange(year, month)[1])
+    return start_date, end_date
+
+def get_working_hours(check_in, check_out, lunch_start_time=time(12, 0), lunch_end_time=time(13, 0)):
     if not check_in or not check_out:
         return timedelta()
     
-    # Calculate lunch break (12:00-13:00)
-    lunch_start = datetime.combine(check_in.date(), time(12, 0))
-    lunch_end = datetime.combine(check_in.date(), time(13, 0))
+    # Calculate lunch break (12:00-13:00 unless the policy says otherwise)
+    lunch_start = datetime.combine(check_in.date(), lunch_start_time)
+    lunch_end = datetime.combine(check_in.date(), lunch_end_time)
     
     # Adjust if check-in/check-out during lunch
     if check_in >= lunch_start and check_in < lunch_end:
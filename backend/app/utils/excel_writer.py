@@ -0,0 +1,22 @@
+import io
+
+def write_workbook(sheets, output=None):
+    # openpyxl costs ~100 ms to import; only exports need it
+    from openpyxl import Workbook
+    
+    # Write-only mode streams each row to a temporary file instead of
+    # keeping a cell object for every value in memory
+    workbook = Workbook(write_only=True)
+    
+    for title, rows in sheets:
+        sheet = workbook.create_sheet(title=title)
+        for row in rows:
+            sheet.append(row)
+    
+    if output is None:
+        output = io.BytesIO()
+        workbook.save(output)
+        return output.getvalue()
+    
+    workbook.save(output)
+    return output
@@ -1,4 +1,6 @@
+import base64
 import json
+import zlib
 from datetime import datetime, date
 from decimal import Decimal
 
@@ -50,6 +52,28 @@ def get_pagination_info(pagination):
         'next_num': pagination.next_num
     }
 
+def encode_cursor(values):
+    # Opaque keyset cursor; dates are stored as ISO strings
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, types):
+    # types lists the expected type of each value; bools are not ints here
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError('Invalid cursor')
+    
+    for value, expected in zip(values, types):
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError('Invalid cursor')
+    
+    return values
+
 def safe_int(value, default=0):
     try:
         return int(value)
@@ -60,4 +84,25 @@ def safe_float(value, default=0.0):
     try:
         return float(value)
     except (ValueError, TypeError):
-        return default
\ No newline at end of file
+        return default
+
+def chunked(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def gzip_stream(chunks, encoding='utf-8'):
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding) if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def columnize(records, keys):
+    # List of dicts -> parallel arrays, one per key
+    return {key: [record[key] for record in records] for key in keys}
+
+def minutes_since_midnight(value):
+    return value.hour * 60 + value.minute if value is not None else None
@@ -0,0 +1,37 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+def conditional_response(validators, build, vary=None):
+    # The ETag covers the URL and the scope validators, so it changes whenever
+    # the payload could, and a match is answered before anything is built
+    etag = hashlib.sha1(repr((request.full_path, validators)).encode()).hexdigest()
+    
+    timestamps = [part for validator in validators for part in validator if hasattr(part, 'tzinfo')]
+    last_modified = max(timestamps).replace(tzinfo=timezone.utc, microsecond=0) if timestamps else None
+    
+    if request.if_none_match:
+        not_modified = etag in request.if_none_match
+    else:
+        not_modified = (
+            last_modified is not None and
+            request.if_modified_since is not None and
+            last_modified <= request.if_modified_since
+        )
+    
+    if not_modified:
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+        if response.status_code != 200:
+            return response
+    
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    if vary:
+        response.vary.add(vary)
+    # Clients must revalidate so polls always reach the cheap validator check
+    response.headers['Cache-Control'] = 'private, no-cache'
+    
+    return response
@@ -0,0 +1,63 @@
+import csv
+import io
+import os
+import zipfile
+from datetime import datetime, date
+
+def read_table(stream, filename):
+    # Returns (header, rows) for a .csv or .xlsx upload. Rows are produced
+    # lazily, so a large file is never held in memory as a whole
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        rows = _iter_csv(stream)
+    elif extension == '.xlsx':
+        rows = _iter_xlsx(stream)
+    else:
+        raise ValueError('Unsupported file type. Upload a .csv or .xlsx file')
+    
+    try:
+        header = next(rows, None)
+    except (ValueError, csv.Error, zipfile.BadZipFile) as e:
+        raise ValueError(f'Could not read the uploaded file: {e}')
+    if not header:
+        raise ValueError('The file is empty')
+    
+    return [normalize_header(name) for name in header], rows
+
+def normalize_header(name):
+    return '_'.join(str(name or '').strip().lower().split())
+
+def cell_text(value):
+    # Spreadsheet cells arrive typed; everything is compared as text
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip() or None
+
+def _iter_csv(stream):
+    # utf-8-sig drops the byte order mark Excel puts in front of CSV exports
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+def _iter_xlsx(stream):
+    # Read-only mode parses the sheet XML as rows are requested. openpyxl is
+    # imported here so only uploads pay for it
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+    
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except InvalidFileException as e:
+        raise ValueError(str(e))
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
@@ -0,0 +1,98 @@
+from sqlalchemy import Boolean, and_, literal, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from ..extensions import db
+
+POPULATE_EXISTING = {'populate_existing': True}
+
+class _Excluded:
+    # Stands in for ON CONFLICT's `excluded` row when the update is a plain
+    # UPDATE: each column reads as the value that would have been inserted
+    def __init__(self, model, values):
+        self._columns = model.__table__.c
+        self._values = values
+    
+    def __getattr__(self, name):
+        return literal(self._values.get(name), self._columns[name].type)
+
+INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def upsert(model, values, index_elements, build_update, where=None, previous=None):
+    # INSERT, or UPDATE the row matching index_elements. build_update receives
+    # the `excluded` row and returns the SET clause. Returns (entity, inserted);
+    # entity is None when `where` skipped the update. With `previous` (column
+    # names) it returns (entity, inserted, replaced): those columns as they
+    # were before the update, or None when the row was inserted
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql' and previous is None:
+        return _upsert_postgresql(model, values, index_elements, build_update, where)
+    if dialect in INSERTS:
+        return _upsert_insert_first(model, values, index_elements, build_update, where, previous, INSERTS[dialect])
+    return _upsert_select_first(model, values, index_elements, build_update, where, previous)
+
+def _upsert_postgresql(model, values, index_elements, build_update, where):
+    # One statement; xmax is zero only on a row version this statement inserted
+    statement = postgresql.insert(model).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_=build_update(statement.excluded),
+        where=where
+    ).returning(model, literal_column('(xmax = 0)', Boolean).label('inserted'))
+    
+    row = db.session.execute(statement, execution_options=POPULATE_EXISTING).first()
+    return (row[0], row[1]) if row else (None, False)
+
+def _upsert_insert_first(model, values, index_elements, build_update, where, previous, insert):
+    # SQLite has no xmax, and ON CONFLICT cannot return the values it replaced,
+    # so the insert and the update are separate statements. On SQLite the
+    # INSERT takes the database write lock whether or not it adds a row; on
+    # PostgreSQL it waits for a concurrent insert of the key to commit, and
+    # _replaced locks the row. Either way nothing can change the conflicting
+    # row before the UPDATE runs
+    statement = insert(model).values(**values).on_conflict_do_nothing(index_elements=index_elements)
+    entity = db.session.scalars(statement.returning(model), execution_options=POPULATE_EXISTING).first()
+    if entity is not None:
+        return _result(entity, True, None, previous)
+    
+    replaced = _replaced(model, values, index_elements, previous)
+    return _result(_update(model, values, index_elements, build_update, where), False, replaced, previous)
+
+def _upsert_select_first(model, values, index_elements, build_update, where, previous=None):
+    # Dialects without ON CONFLICT: insert when no row exists, in a savepoint
+    # so a concurrent insert of the same key only undoes this attempt
+    key = [getattr(model, name) == values[name] for name in index_elements]
+    if db.session.scalars(select(model).where(*key).limit(1)).first() is None:
+        entity = model(**values)
+        try:
+            with db.session.begin_nested():
+                db.session.add(entity)
+            return _result(entity, True, None, previous)
+        except IntegrityError:
+            # Inserted concurrently; rolling back the savepoint expunged ours
+            pass
+    
+    replaced = _replaced(model, values, index_elements, previous)
+    return _result(_update(model, values, index_elements, build_update, where), False, replaced, previous)
+
+def _replaced(model, values, index_elements, previous):
+    if previous is None:
+        return None
+    
+    key = [getattr(model, name) == values[name] for name in index_elements]
+    columns = [getattr(model, name) for name in previous]
+    return db.session.execute(select(*columns).where(*key).with_for_update()).first()
+
+def _result(entity, inserted, replaced, previous):
+    return (entity, inserted) if previous is None else (entity, inserted, replaced)
+
+def _update(model, values, index_elements, build_update, where):
+    key = and_(*[getattr(model, name) == values[name] for name in index_elements])
+    statement = update(model).where(key if where is None else and_(key, where))
+    statement = statement.values(build_update(_Excluded(model, values)))
+    
+    if db.session.get_bind().dialect.update_returning:
+        return db.session.scalars(statement.returning(model), execution_options=POPULATE_EXISTING).first()
+    
+    if not db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount:
+        return None
+    return db.session.scalars(select(model).where(key), execution_options=POPULATE_EXISTING).first()
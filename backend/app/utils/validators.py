@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from ..policy import DEFAULT_POLICY_SETTINGS
 
 def validate_email(email):
     if not email:
@@ -67,6 +68,118 @@ def validate_attendance_data(data):
     
     return errors
 
+def validate_punch_event(event):
+    errors = []
+    
+    if not isinstance(event, dict):
+        return ['Punch event must be an object']
+    
+    if not event.get('employee_id'):
+        errors.append('Employee ID is required')
+    elif not isinstance(event['employee_id'], str):
+        errors.append('Employee ID must be a string')
+    
+    if event.get('type') not in ('check_in', 'check_out'):
+        errors.append('Type must be check_in or check_out')
+    
+    if event.get('notes') is not None and not isinstance(event['notes'], str):
+        errors.append('Notes must be a string')
+    
+    if event.get('timestamp'):
+        try:
+            datetime.strptime(event['timestamp'], '%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError):
+            errors.append('Invalid timestamp format. Use YYYY-MM-DD HH:MM:SS')
+    
+    return errors
+
+def validate_policy_settings(data):
+    errors = []
+    
+    if not isinstance(data, dict) or not data:
+        return ['At least one setting is required']
+    
+    for key, value in data.items():
+        if key not in DEFAULT_POLICY_SETTINGS:
+            errors.append(f'Unknown setting: {key}')
+        elif key.endswith('_time'):
+            try:
+                datetime.strptime(str(value), '%H:%M')
+            except ValueError:
+                errors.append(f'Invalid {key} format. Use HH:MM')
+        elif key == 'late_threshold_minutes':
+            if not str(value).isdigit():
+                errors.append('late_threshold_minutes must be a non-negative integer')
+        elif key == 'overtime_after_hours':
+            try:
+                if float(value) < 0:
+                    raise ValueError
+            except (ValueError, TypeError):
+                errors.append('overtime_after_hours must be a non-negative number')
+        elif key == 'working_weekdays':
+            days = value if isinstance(value, (list, tuple)) else str(value).split(',')
+            if not days or any(str(day).strip() not in ('0', '1', '2', '3', '4', '5', '6') for day in days):
+                errors.append('working_weekdays must list weekday numbers from 0 (Monday) to 6 (Sunday)')
+    
+    return errors
+
+def validate_holiday(data):
+    errors = []
+    
+    if not isinstance(data, dict):
+        return ['A JSON object is required']
+    
+    if not data.get('date'):
+        errors.append('date is required')
+    else:
+        try:
+            datetime.strptime(data['date'], '%Y-%m-%d')
+        except (ValueError, TypeError):
+            errors.append('Invalid date format. Use YYYY-MM-DD')
+    
+    if not str(data.get('name') or '').strip():
+        errors.append('name is required')
+    
+    return errors
+
+def validate_report_job(data):
+    required_params = {
+        'daily_csv': ('date',),
+        'daily_excel': ('date',),
+        'monthly_excel': ('year', 'month'),
+        'range_csv': ('start_date', 'end_date'),
+        'monthly': ('year', 'month'),
+        'statistics': ('start_date', 'end_date')
+    }
+    
+    if not isinstance(data, dict) or data.get('type') not in required_params:
+        return [f"Type must be one of: {', '.join(required_params)}"]
+    
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return ['Params must be an object']
+    
+    errors = []
+    for name in required_params[data['type']]:
+        if not params.get(name):
+            errors.append(f'{name} is required')
+    
+    for name in ('date', 'start_date', 'end_date'):
+        if params.get(name):
+            try:
+                datetime.strptime(params[name], '%Y-%m-%d')
+            except (ValueError, TypeError):
+                errors.append(f'Invalid {name} format. Use YYYY-MM-DD')
+    
+    for name in ('year', 'month'):
+        if params.get(name) and not str(params[name]).isdigit():
+            errors.append(f'{name} must be a number')
+    
+    if params.get('month') and str(params['month']).isdigit() and not 1 <= int(params['month']) <= 12:
+        errors.append('month must be between 1 and 12')
+    
+    return errors
+
 def validate_password(password):
     if len(password) < 8:
         return 'Password must be at least 8 characters long'
@@ -0,0 +1,52 @@
+"""Compare row-by-row report aggregation with the NumPy analytics engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_analytics [employees] [days]
+"""
+import sys
+from datetime import date, timedelta
+from sqlalchemy import func
+from app.extensions import db
+from app.models import Employee, Attendance
+from app.services.report_service import ReportService
+from .common import create_benchmark_app, seed_employees, seed_attendance, measure
+
+def statistics_group_by(start_date, end_date):
+    # The GROUP BY over raw rows that /statistics used before the rollup table
+    return db.session.query(
+        Attendance.date,
+        func.count(Attendance.id).label('total'),
+        func.sum((Attendance.status == 'Present').cast(db.Integer)).label('present'),
+        func.sum((Attendance.status == 'Late').cast(db.Integer)).label('late'),
+        func.sum((Attendance.status == 'Absent').cast(db.Integer)).label('absent')
+    ).join(Employee).filter(
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ).group_by(Attendance.date).order_by(Attendance.date).all()
+
+def employee_summaries(report_service, employee_ids, year, month):
+    # What a team view costs today: one summary call per employee
+    return [report_service.generate_employee_summary(employee_id, year, month) for employee_id in employee_ids]
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    day_count = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+    start_date = date(2024, 1, 1)
+    end_date = start_date + timedelta(days=day_count - 1)
+    
+    create_benchmark_app()
+    employee_ids = seed_employees(employee_count)
+    seed_attendance(employee_ids, start_date, end_date)
+    
+    report_service = ReportService()
+    start_str, end_str = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+    print(f'Range analytics, {employee_count} employees x {day_count} days')
+    measure('statistics, GROUP BY over rows', lambda: statistics_group_by(start_date, end_date), repeat=1)
+    measure('monthly report, to_dict per row', lambda: report_service.generate_monthly_report(2024, 1), repeat=1)
+    measure('employee summaries, 1 month', lambda: employee_summaries(report_service, employee_ids, 2024, 1), repeat=1)
+    measure('NumPy engine, 1 month', lambda: report_service.generate_range_analytics('2024-01-01', '2024-01-31'), repeat=1)
+    measure('NumPy engine, full range', lambda: report_service.generate_range_analytics(start_str, end_str), repeat=1)
+
+if __name__ == '__main__':
+    main()
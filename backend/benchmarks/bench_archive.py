@@ -0,0 +1,46 @@
+"""Daily, monthly and history reads before and after moving closed years
+out of the hot attendance table.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_archive [employees] [years]
+"""
+import sys
+from datetime import date
+from app.models import Attendance
+from app.services.archive_service import ArchiveService
+from app.services.attendance_service import AttendanceService
+from app.services.report_service import ReportService
+from .common import create_benchmark_app, seed_employees, seed_attendance, measure
+
+def run_reads(label, employee_ids, current_year):
+    report_service = ReportService()
+    attendance_service = AttendanceService()
+    
+    measure(f'{label}: daily report', lambda: report_service.generate_daily_report(f'{current_year}-03-05'))
+    measure(f'{label}: monthly, current year', lambda: report_service.generate_monthly_report(current_year, 3))
+    measure(f'{label}: monthly, closed year', lambda: report_service.generate_monthly_report(current_year - 1, 3))
+    measure(f'{label}: history across years', lambda: [
+        attendance_service.get_attendance_history(employee_id, f'{current_year - 1}-10-01', f'{current_year}-03-31', per_page=100)
+        for employee_id in employee_ids[:200]
+    ])
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    year_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    current_year = 2024
+    
+    create_benchmark_app()
+    employee_ids = seed_employees(employee_count)
+    seed_attendance(employee_ids, date(current_year - year_count + 1, 1, 1), date(current_year, 3, 31))
+    print(f'{Attendance.query.count()} attendance rows over {year_count} years')
+    
+    run_reads('hot only', employee_ids, current_year)
+    
+    archived = ArchiveService().archive_before(current_year)
+    print(f"Archived {sum(entry['row_count'] for entry in archived)} rows, {Attendance.query.count()} left hot")
+    
+    run_reads('archived', employee_ids, current_year)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Onboarding a site: one create_employee call per person against the
+streamed, chunked import, from CSV and from XLSX.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_employee_import [rows]
+"""
+import io
+import sys
+import time
+from openpyxl import Workbook
+from app.extensions import db
+from app.models import Employee
+from app.services.employee_service import EmployeeService
+from app.services.employee_import_service import EmployeeImportService
+from .common import create_benchmark_app, DEPARTMENTS
+
+HEADER = ['employee_id', 'name', 'department', 'position', 'email', 'phone', 'hire_date']
+
+def employee_rows(count, prefix):
+    for index in range(count):
+        yield [
+            f'{prefix}{index:06d}',
+            f'Employee {index:06d}',
+            DEPARTMENTS[index % len(DEPARTMENTS)],
+            'Operator',
+            f'{prefix.lower()}{index}@example.com',
+            f'555{index:07d}',
+            '2024-03-01'
+        ]
+
+def csv_upload(count, prefix):
+    lines = [','.join(HEADER)] + [','.join(row) for row in employee_rows(count, prefix)]
+    return io.BytesIO('\n'.join(lines).encode())
+
+def xlsx_upload(count, prefix):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in employee_rows(count, prefix):
+        sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+def import_file(upload, filename):
+    service = EmployeeImportService()
+    entries = list(service.import_employees(service.read_rows(upload, filename)))
+    return entries[-1]['summary']
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    per_row_count = min(row_count, 2000)
+    
+    create_benchmark_app()
+    
+    service = EmployeeService()
+    started = time.perf_counter()
+    for row in employee_rows(per_row_count, 'ROW'):
+        service.create_employee(dict(zip(HEADER, row)))
+    elapsed = time.perf_counter() - started
+    print(f'create_employee per row: {per_row_count} rows in {elapsed:.2f} s ({per_row_count / elapsed:.0f} rows/s)')
+    
+    for label, upload, filename, prefix in (
+        ('CSV import', csv_upload, 'site.csv', 'CSV'),
+        ('XLSX import', xlsx_upload, 'site.xlsx', 'XLS')
+    ):
+        data = upload(row_count, prefix)
+        started = time.perf_counter()
+        summary = import_file(data, filename)
+        elapsed = time.perf_counter() - started
+        print(f'{label}: {summary} in {elapsed:.2f} s ({row_count / elapsed:.0f} rows/s)')
+    
+    print(f'{Employee.query.count()} employees in the database')
+    db.session.remove()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Search-box latency over a large roster: the old ILIKE scan against the
+in-memory trigram index, for the prefixes a user types key by key. The
+seeded names are replaced with varied first and last names; the email
+domain, shared by everyone, is the broadest term. The index is built in the
+background; the first search is answered from the database meanwhile.
+
+Run from the backend directory:
+    
+    python -m benchmarks.bench_employee_search [employees]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from sqlalchemy import or_
+from config import config, TestingConfig
+from app.extensions import db
+from app.models import Employee
+from app.employee_search import get_employee_search
+from .common import create_benchmark_app, seed_employees
+
+FIRST_NAMES = [
+    'Maria', 'Mark', 'Martin', 'Anna', 'Andre', 'Li', 'Wei', 'Sofia', 'Omar', 'Fatima',
+    'John', 'Joanna', 'Peter', 'Priya', 'Raj', 'Elena', 'Ivan', 'Yuki', 'Kenji', 'Lucas',
+    'Chloe', 'Noah', 'Emma', 'Amir', 'Sara', 'David', 'Grace', 'Hugo', 'Ines', 'Tomas'
+]
+
+SYLLABLES = ['ko', 'lan', 'mar', 'ti', 'nez', 'ber', 'ga', 'son', 'ri', 'vel', 'do', 'sch', 'ul', 'tz', 'pa', 'chen']
+
+TERMS = ['ma', 'mar', 'mart', 'martin', 'kol', 'kolan', 'emp0123', '0424', 'sales', 'example.com', 'zzz']
+
+def vary_names(employee_ids, seed=7):
+    rng = random.Random(seed)
+    for employee_id in employee_ids:
+        first = rng.choice(FIRST_NAMES)
+        last = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        Employee.query.filter_by(employee_id=employee_id).update({
+            'name': f'{first} {last}',
+            'email': f'{first.lower()}.{last.lower()}.{employee_id.lower()}@example.com'
+        })
+    db.session.commit()
+
+def ilike_search(term):
+    return Employee.query.filter(
+        or_(
+            Employee.employee_id.ilike(f'%{term}%'),
+            Employee.name.ilike(f'%{term}%'),
+            Employee.email.ilike(f'%{term}%'),
+            Employee.department.ilike(f'%{term}%')
+        )
+    ).filter_by(is_active=True).limit(20).all()
+
+def percentiles(label, func, rounds=50):
+    timings = []
+    worst = {}
+    for _ in range(rounds):
+        for term in TERMS:
+            started = time.perf_counter()
+            func(term)
+            elapsed = time.perf_counter() - started
+            timings.append(elapsed)
+            worst[term] = max(worst.get(term, 0), elapsed)
+    timings.sort()
+    slowest = max(worst, key=worst.get)
+    print(
+        f'{label:<24} p50 {timings[len(timings) // 2] * 1000:>8.2f} ms '
+        f'p99 {timings[int(len(timings) * 0.99)] * 1000:>8.2f} ms slowest {slowest!r}'
+    )
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    
+    # The build thread needs its own connection, so not the in-memory database
+    directory = tempfile.mkdtemp()
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'benchmark.db'),
+        'REPORT_JOB_DIR': os.path.join(directory, 'jobs'),
+        'EMPLOYEE_SEARCH_BACKGROUND_BUILD': True
+    })
+    create_benchmark_app('benchmark')
+    vary_names(seed_employees(employee_count))
+    index = get_employee_search()
+    
+    started = time.perf_counter()
+    index.search('mart')
+    first = time.perf_counter() - started
+    while index.stats()['rebuilding']:
+        time.sleep(0.01)
+    print(
+        f'{employee_count} employees, first search {first * 1000:.0f} ms, '
+        f'index built in {(time.perf_counter() - started) * 1000:.0f} ms: {index.stats()}'
+    )
+    
+    percentiles('ILIKE scan, limit 20', ilike_search, rounds=5)
+    percentiles('trigram index, limit 20', lambda term: index.search(term, limit=20))
+
+if __name__ == '__main__':
+    main()
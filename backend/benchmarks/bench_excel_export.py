@@ -0,0 +1,45 @@
+"""Compare the pandas Excel export with the write-only openpyxl engine.
+
+Needs pandas, which is only in requirements-dev.txt. Run from the backend
+directory:
+
+    pip install -r requirements-dev.txt
+    python -m benchmarks.bench_excel_export [employees]
+"""
+import io
+import sys
+from datetime import date
+from app.services.report_service import ReportService
+from .common import create_benchmark_app, seed_employees, seed_attendance, measure
+
+def export_daily_report_excel_pandas(report_service, date_str):
+    # The previous implementation, kept here as the baseline
+    import pandas as pd
+    
+    report = report_service.generate_daily_report(date_str)
+    summary_df = pd.DataFrame({
+        'Metric': ['Total Employees', 'Present', 'Absent', 'Late'],
+        'Value': [report['total_employees'], report['present_count'], report['absent_count'], report['late_count']]
+    })
+    attendance_df = pd.DataFrame(report['attendance_list'])
+    
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        summary_df.to_excel(writer, sheet_name='Summary', index=False)
+        attendance_df.to_excel(writer, sheet_name='Attendance Details', index=False)
+    return output.getvalue()
+
+def main():
+    employee_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    create_benchmark_app()
+    employee_ids = seed_employees(employee_count)
+    seed_attendance(employee_ids, date(2024, 1, 1), date(2024, 1, 31))
+    
+    report_service = ReportService()
+    print(f'Excel export, {employee_count} employees')
+    measure('daily, pandas ExcelWriter', lambda: export_daily_report_excel_pandas(report_service, '2024-01-15'))
+    measure('daily, openpyxl write-only', lambda: report_service.export_daily_report_excel('2024-01-15'))
+    measure('monthly matrix, openpyxl write-only', lambda: report_service.export_monthly_report_excel(2024, 1), repeat=1)
+
+if __name__ == '__main__':
+    main()
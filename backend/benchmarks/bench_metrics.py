@@ -0,0 +1,64 @@
+"""Cost of the instrumentation layer: per-request time for an authenticated
+GET /api/attendance/status/today and per-statement time for SELECT 1, with
+METRICS_ENABLED off and on.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_metrics [requests]
+"""
+import statistics
+import sys
+import time
+from sqlalchemy import text
+from config import config, TestingConfig
+from app import create_app
+from app.extensions import db
+from app.models import Employee
+
+def run_profile(enabled, requests):
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {'METRICS_ENABLED': enabled})
+    app = create_app('benchmark')
+    client = app.test_client()
+    
+    with app.app_context():
+        db.create_all()
+        db.session.add(Employee(employee_id='EMP000001', name='Employee 1', department='Engineering'))
+        db.session.commit()
+        
+        token = client.post('/api/auth/login', json={'employee_id': 'EMP000001'}).get_json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get('/api/attendance/status/today', headers=headers)
+            timings.append(time.perf_counter() - started)
+        
+        statement = text('SELECT 1')
+        statements = requests * 10
+        with db.engine.connect() as connection:
+            started = time.perf_counter()
+            for _ in range(statements):
+                connection.execute(statement)
+            per_statement = (time.perf_counter() - started) / statements
+        
+        db.session.remove()
+        db.engine.dispose()
+    
+    return statistics.median(timings), per_statement
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    
+    for enabled in (False, True):
+        # Warm-up pass, so the first measured profile does not pay for it
+        run_profile(enabled, requests // 10)
+    for enabled in (False, True):
+        request_time, statement_time = run_profile(enabled, requests)
+        print(
+            f"metrics {'on ' if enabled else 'off'}  request p50 {request_time * 1e6:>8.1f} us  "
+            f'SELECT 1 {statement_time * 1e6:>6.2f} us'
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Single-punch ingestion at shift start: one commit per punch against the
+journaled write-behind mode, with concurrent clients on a file database.
+
+Run from the backend directory:
+    
+    python -m benchmarks.bench_punch_journal [clients] [employees]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from config import config, TestingConfig
+from app import create_app
+from app.extensions import db
+from app.models import Attendance
+from app.services.attendance_service import AttendanceService
+from app.services.punch_journal import get_punch_journal, start_punch_journal
+from .common import seed_employees
+
+def run_mode(mode, clients, employee_count):
+    directory = tempfile.mkdtemp()
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'benchmark.db'),
+        'REPORT_JOB_DIR': os.path.join(directory, 'jobs'),
+        'PUNCH_INGEST_MODE': mode,
+        'PUNCH_JOURNAL_DIR': os.path.join(directory, 'journal')
+    })
+    app = create_app('benchmark')
+    
+    with app.app_context():
+        employee_ids = seed_employees(employee_count)
+    if mode == 'journal':
+        # Served processes open it on their first request; keep that out of the timings
+        start_punch_journal(app)
+    
+    latencies = []
+    
+    def client(ids):
+        with app.app_context():
+            service = AttendanceService()
+            journal = get_punch_journal()
+            for employee_id in ids:
+                started = time.perf_counter()
+                if journal:
+                    journal.append([{'employee_id': employee_id, 'type': 'check_in'}])
+                else:
+                    service.check_in(employee_id)
+                latencies.append(time.perf_counter() - started)
+            db.session.remove()
+    
+    threads = [threading.Thread(target=client, args=(employee_ids[index::clients],)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    acknowledged = time.perf_counter() - started
+    
+    with app.app_context():
+        journal = get_punch_journal()
+        if journal:
+            journal.wait_applied(journal.durable_seq)
+            journal.close()
+        applied = time.perf_counter() - started
+        rows = Attendance.query.count()
+    
+    latencies.sort()
+    print(
+        f'{mode:<8} {len(latencies) / acknowledged:>10.1f} acks/s '
+        f'p50 {latencies[len(latencies) // 2] * 1000:>7.2f} ms p99 {latencies[int(len(latencies) * 0.99)] * 1000:>7.2f} ms '
+        f'all applied after {applied:.2f} s ({rows} rows)'
+    )
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    employee_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    
+    print(f'{employee_count} check-ins from {clients} client threads')
+    for mode in ('direct', 'journal'):
+        run_mode(mode, clients, employee_count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Compare ORM entities plus to_dict() with the column-tuple row serializers.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serializers [rows]
+"""
+import sys
+from datetime import date, timedelta
+from app.extensions import db
+from app.models import Employee, Attendance
+from app.serializers import ATTENDANCE_SERIALIZER, EMPLOYEE_SERIALIZER
+from .common import create_benchmark_app, seed_employees, seed_attendance, measure
+
+def to_dicts(query):
+    # Start from an empty identity map so every run hydrates fresh entities
+    db.session.expunge_all()
+    return [record.to_dict() for record in query.all()]
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    
+    # 1000 employees on every weekday until the attendance table holds row_count rows
+    create_benchmark_app()
+    employee_ids = seed_employees(1000)
+    start_date = date(2024, 1, 1)
+    end_date = start_date + timedelta(days=(row_count // 1000) * 7 // 5)
+    seed_attendance(employee_ids, start_date, end_date, presence_rate=1.0)
+    
+    attendance = Attendance.query.order_by(Attendance.id).limit(row_count)
+    employees = Employee.query.order_by(Employee.id)
+    print(f'Serialization, {attendance.count()} attendance rows')
+    measure('attendance, to_dict per entity', lambda: to_dicts(attendance))
+    measure('attendance, row serializer', lambda: ATTENDANCE_SERIALIZER.all(attendance))
+    measure('employees, to_dict per entity', lambda: to_dicts(employees))
+    measure('employees, row serializer', lambda: EMPLOYEE_SERIALIZER.all(employees))
+
+if __name__ == '__main__':
+    main()
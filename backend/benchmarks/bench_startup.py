@@ -0,0 +1,81 @@
+"""Worker startup cost: how long `from app import create_app` and the
+create_app('testing') call take in a fresh interpreter, and which
+packages the import time goes to (self time from `python -X importtime`,
+summed per top-level package). It exits non-zero if a module that should load on first use (NumPy,
+openpyxl, pandas) is imported at startup, so a stray top-level import
+shows up as a failure rather than a slower deploy.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_startup [rounds]
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ('numpy', 'openpyxl', 'pandas')
+
+PROBE = '''
+import sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app('testing')
+created = time.perf_counter()
+print((imported - started) * 1000, (created - imported) * 1000)
+print(' '.join(sorted(sys.modules)))
+'''
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+\d+ \| *(\S+)$')
+
+def run_probe(backend_dir):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=backend_dir, capture_output=True, text=True, check=True
+    )
+    timings, modules = result.stdout.splitlines()[-2:]
+    import_ms, create_ms = (float(value) for value in timings.split())
+    
+    # Self time in microseconds, summed per top-level package
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            package = match.group(2).split('.')[0]
+            packages[package] = packages.get(package, 0) + int(match.group(1))
+    
+    return import_ms, create_ms, packages, set(modules.split())
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    import_times = []
+    create_times = []
+    packages = {}
+    for _ in range(rounds):
+        import_ms, create_ms, self_times, modules = run_probe(backend_dir)
+        import_times.append(import_ms)
+        create_times.append(create_ms)
+        for name, micros in self_times.items():
+            packages.setdefault(name, []).append(micros)
+    
+    print(f'{rounds} fresh interpreters')
+    print(f'import app             median {statistics.median(import_times):>8.1f} ms  min {min(import_times):>8.1f} ms')
+    print(f'create_app(testing)    median {statistics.median(create_times):>8.1f} ms  min {min(create_times):>8.1f} ms')
+    
+    print('import time by package (self time, -X importtime):')
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for name, micros in ranked[:8]:
+        print(f'  {name:<40} {statistics.median(micros) / 1000:>8.1f} ms')
+    
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        print(f'loaded at startup but should be lazy: {", ".join(eager)}')
+        sys.exit(1)
+    print(f'not loaded at startup: {", ".join(LAZY_MODULES)}')
+
+if __name__ == '__main__':
+    main()
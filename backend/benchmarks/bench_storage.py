@@ -0,0 +1,95 @@
+"""Concurrent attendance writes and daily reports against a file SQLite
+database, with the driver defaults and with the tuned storage profile.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_storage [writers] [readers] [writes_per_writer]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from config import config, TestingConfig
+from app import create_app
+from app.extensions import db
+from app.services.attendance_service import AttendanceService
+from app.services.report_service import ReportService
+from .common import seed_employees
+
+def run_profile(profile, writers, readers, writes_per_writer):
+    directory = tempfile.mkdtemp()
+    config['benchmark'] = type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(directory, 'benchmark.db'),
+        'DB_STORAGE_PROFILE': profile,
+        'REPORT_JOB_DIR': os.path.join(directory, 'jobs')
+    })
+    app = create_app('benchmark')
+    
+    with app.app_context():
+        employee_ids = seed_employees(writers)
+    
+    errors = []
+    writes = []
+    reads = []
+    done = threading.Event()
+    
+    def writer(employee_id):
+        # One manual record per day: each write inserts a row and bumps a rollup bucket
+        with app.app_context():
+            service = AttendanceService()
+            for offset in range(writes_per_writer):
+                try:
+                    service.create_manual_attendance({
+                        'employee_id': employee_id,
+                        'date': (date(2024, 1, 1) + timedelta(days=offset)).strftime('%Y-%m-%d'),
+                        'check_in_time': '09:10:00'
+                    })
+                    writes.append(1)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(type(e).__name__)
+    
+    def reader():
+        with app.app_context():
+            service = ReportService()
+            while not done.is_set():
+                try:
+                    service.generate_daily_report('2024-01-02')
+                    reads.append(1)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(type(e).__name__)
+                finally:
+                    db.session.remove()
+    
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(employee_id,)) for employee_id in employee_ids]
+    
+    started = time.perf_counter()
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    
+    print(
+        f'{profile:<10} {len(writes) / elapsed:>10.1f} writes/s {len(reads) / elapsed:>10.1f} reports/s '
+        f'{len(errors):>6} errors {sorted(set(errors))}'
+    )
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writes_per_writer = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    
+    print(f'{writers} writer and {readers} reader threads, {writes_per_writer} writes each')
+    for profile in ('default', 'tuned'):
+        run_profile(profile, writers, readers, writes_per_writer)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import random
+import time
+import tracemalloc
+from datetime import datetime, date, timedelta
+from app import create_app
+from app.extensions import db
+from app.models import Employee, Attendance
+
+DEPARTMENTS = ['Engineering', 'Operations', 'Sales', 'Finance', 'Support']
+
+def create_benchmark_app(config_name='testing'):
+    app = create_app(config_name)
+    app_context = app.app_context()
+    app_context.push()
+    db.create_all()
+    return app, app_context
+
+def seed_employees(count):
+    db.session.bulk_insert_mappings(Employee, [
+        {
+            'employee_id': f'EMP{index:06d}',
+            'name': f'Employee {index:06d}',
+            'department': DEPARTMENTS[index % len(DEPARTMENTS)],
+            'email': f'employee{index}@example.com',
+            'is_active': True,
+            'created_at': datetime(2020, 1, 1),
+            'updated_at': datetime(2020, 1, 1)
+        }
+        for index in range(count)
+    ])
+    db.session.commit()
+    return [f'EMP{index:06d}' for index in range(count)]
+
+def seed_attendance(employee_ids, start_date, end_date, presence_rate=0.9, seed=42):
+    rng = random.Random(seed)
+    current_date = start_date
+    
+    while current_date <= end_date:
+        if current_date.weekday() < 5:
+            mappings = []
+            for employee_id in employee_ids:
+                if rng.random() > presence_rate:
+                    continue
+                check_in = datetime.combine(current_date, datetime.min.time()) + timedelta(
+                    hours=8, minutes=rng.randint(30, 100)
+                )
+                check_out = check_in + timedelta(hours=rng.randint(8, 11), minutes=rng.randint(0, 59))
+                late_minutes = max(0, (check_in.hour * 60 + check_in.minute) - 540)
+                mappings.append({
+                    'employee_id': employee_id,
+                    'date': current_date,
+                    'check_in': check_in,
+                    'check_out': check_out,
+                    'status': 'Present' if late_minutes == 0 else ('Late' if late_minutes <= 30 else 'Half-day'),
+                    'late_minutes': late_minutes,
+                    'overtime_minutes': 0,
+                    'created_at': check_in,
+                    'updated_at': check_out
+                })
+            db.session.bulk_insert_mappings(Attendance, mappings)
+            db.session.commit()
+        current_date += timedelta(days=1)
+
+def measure(label, func, repeat=3):
+    # Report the best wall time and the peak traced allocation of one run
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f'{label:<40} {min(timings) * 1000:>10.1f} ms {peak / 1024 / 1024:>10.1f} MiB peak')
+    return result
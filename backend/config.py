@@ -12,16 +12,68 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
+    MAX_PUNCH_BATCH_SIZE = int(os.environ.get('MAX_PUNCH_BATCH_SIZE', 5000))
+    POLICY_REFRESH_SECONDS = int(os.environ.get('POLICY_REFRESH_SECONDS', 30))
+    ROSTER_CACHE_SIZE = int(os.environ.get('ROSTER_CACHE_SIZE', 50000))
+    ROSTER_CACHE_TTL = int(os.environ.get('ROSTER_CACHE_TTL', 300))
+    EMPLOYEE_SEARCH_REFRESH_SECONDS = int(os.environ.get('EMPLOYEE_SEARCH_REFRESH_SECONDS', 300))
+    EMPLOYEE_SEARCH_BACKGROUND_BUILD = os.environ.get('EMPLOYEE_SEARCH_BACKGROUND_BUILD', 'true').lower() == 'true'
+    MAX_SEARCH_RESULTS = int(os.environ.get('MAX_SEARCH_RESULTS', 100))
+    REPORT_JOB_DIR = os.environ.get('REPORT_JOB_DIR')
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_JOB_TTL = int(os.environ.get('REPORT_JOB_TTL', 3600))
+    # 'journal' acknowledges punches once they are fsynced to a local journal
+    # and applies them to the database in the background. Each serving process
+    # (e.g. each gunicorn worker) claims its own worker-<n> subdirectory of
+    # PUNCH_JOURNAL_DIR on its first request, and a restarted process replays
+    # the one it claims. The directory must be on local disk shared only by
+    # processes of one host, since ownership is an flock. CLI commands never
+    # open a journal; a process finding all PUNCH_JOURNAL_MAX_WORKERS
+    # directories taken logs a warning and writes punches directly
+    PUNCH_INGEST_MODE = os.environ.get('PUNCH_INGEST_MODE', 'direct')
+    PUNCH_JOURNAL_DIR = os.environ.get('PUNCH_JOURNAL_DIR')
+    PUNCH_JOURNAL_MAX_WORKERS = int(os.environ.get('PUNCH_JOURNAL_MAX_WORKERS', 64))
+    PUNCH_JOURNAL_FSYNC_MS = int(os.environ.get('PUNCH_JOURNAL_FSYNC_MS', 3))
+    PUNCH_JOURNAL_APPLY_MS = int(os.environ.get('PUNCH_JOURNAL_APPLY_MS', 20))
+    PUNCH_JOURNAL_BATCH_SIZE = int(os.environ.get('PUNCH_JOURNAL_BATCH_SIZE', 1000))
+    # How long another process may keep reading the hot table for a year that
+    # was just archived
+    ARCHIVE_REFRESH_SECONDS = int(os.environ.get('ARCHIVE_REFRESH_SECONDS', 30))
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 512))
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', 300))
+    # 'tuned' applies the settings below; 'default' leaves the driver defaults
+    DB_STORAGE_PROFILE = os.environ.get('DB_STORAGE_PROFILE', 'tuned')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # 'create' runs create_all on startup; 'check' requires the database to be
+    # at the Alembic head and never changes the schema; 'skip' does neither
+    SCHEMA_MODE = os.environ.get('SCHEMA_MODE', 'create')
+    MIGRATIONS_DIR = os.environ.get('MIGRATIONS_DIR') or os.path.join(basedir, 'migrations')
+    # Request latency, per-request SQL counts and /metrics; off adds no hooks
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    # Statements slower than this are logged while metrics are on; 0 disables
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
+    SCHEMA_MODE = os.environ.get('SCHEMA_MODE', 'check')
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # The in-memory database is one connection shared by every thread
+    EMPLOYEE_SEARCH_BACKGROUND_BUILD = False
 
 config = {
     'development': DevelopmentConfig,
@@ -10,6 +10,7 @@ export const endpoints = {
   // Employee endpoints
   employees: {
     list: '/employees/',
+    search: '/employees/search',
     detail: (id) => `/employees/${id}`,
     create: '/employees/',
     update: (id) => `/employees/${id}`,
@@ -42,8 +42,8 @@ export const employeeService = {
   },
 
   async searchEmployees(searchTerm) {
-    const response = await api.get(endpoints.employees.list, {
-      params: { search: searchTerm, active_only: true }
+    const response = await api.get(endpoints.employees.search, {
+      params: { q: searchTerm, active_only: true }
     });
     return response.data.employees;
   },